@@ -8,13 +8,21 @@ import warnings
 import numpy as np
 import numpy.random as npr
 import scipy.linalg
-from scipy.spatial import Delaunay
+import scipy.sparse
+import scipy.sparse.linalg
+from scipy.spatial import Delaunay, cKDTree
+from scipy.optimize._numdiff import group_columns
+from scipy.sparse.csgraph import reverse_cuthill_mckee
 from scipy.stats import lognorm
-import itertools
 
-from math import exp, log, sqrt
+from math import log, sqrt
 
-from myivp.myivp import solve_ivp
+from myivp.myivp import solve_ivp, OdeResult
+
+try:
+    import forcekernels  # compiled force kernels, require numba
+except ImportError:
+    forcekernels = None
 
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
@@ -90,9 +98,10 @@ def getRotMatArray(Phis):
     """
     Thetas = scipy.linalg.norm(Phis, axis=1)  # calculate the angle of rotation
     phiinds = np.where(Thetas > 1e-5)  # filter for division by 0
-    Phis[phiinds] /= Thetas[..., None][phiinds]
+    Axes = np.array(Phis)  # copy, Phis may be a view on the state of the solver
+    Axes[phiinds] /= Thetas[..., None][phiinds]
     a = np.cos(Thetas / 2)
-    b, c, d = np.transpose(Phis) * np.sin(Thetas / 2)
+    b, c, d = np.transpose(Axes) * np.sin(Thetas / 2)
     RotMat = np.array([[a * a + b * b - c * c - d * d, 2 * (b * c - a * d), 2 * (b * d + a * c)],
                       [2 * (b * c + a * d), a * a + c * c - b * b - d * d, 2 * (c * d - a * b)],
                       [2 * (b * d - a * c), 2 * (c * d + a * b), a * a + d * d - b * b - c * c]])
@@ -114,28 +123,1106 @@ def getRotMat(Phis):
                     [2 * (b * d - a * c), 2 * (c * d + a * b), a * a + d * d - b * b - c * c]])
 
 
+def getQuatArray(Phis):
+    """
+    Calculate quaternions from vectors indicating the rotation axis. Conversion layer between the rotation vectors
+    stored as node orientations and the quaternion representation used by rotateQuatArray()
+    :param Phis: numpy array of shape (n, 3)
+    :return: numpy array of shape (n, 4). Each row (a, b, c, d) holds the quaternion underlying the rotation matrix
+    calculated from the same phi by getRotMatArray()
+    """
+    Thetas = scipy.linalg.norm(Phis, axis=1)  # calculate the angle of rotation
+    phiinds = np.where(Thetas > 1e-5)  # filter for division by 0
+    Quats = np.empty((len(Phis), 4))
+    Quats[:, 0] = np.cos(Thetas / 2)
+    Axes = Quats[:, 1:]
+    Axes[...] = Phis
+    Axes[phiinds] /= Thetas[..., None][phiinds]
+    Axes *= np.sin(Thetas / 2)[:, None]
+    return Quats
+
+
+def rotateMatArray(RotMats, V, out=None, ws=None):
+    """
+    Rotate vectors using rotation matrices
+    :param RotMats: numpy array of shape (n, 3, 3) as returned by getRotMatArray()
+    :param V: numpy array of shape (n, 3)
+    :param out: None or numpy array of shape (n, 3) the result is written to, must not share memory with V
+    :param ws: unused, accepted for the same signature as rotateQuatArray()
+    :return: numpy array of shape (n, 3) containing the rotated vectors
+    """
+    if out is None:
+        out = np.empty((len(V), 3))
+    return np.einsum("ijk, ik -> ij", RotMats, V, out=out)
+
+
+def rotateQuatArray(Quats, V, out=None, ws=None):
+    """
+    Rotate vectors using quaternions without setting up rotation matrices:
+    v' = (a^2 - u.u) v + 2 (u.v) u + 2 a (u x v) with Quats = (a, u). Takes two to three times as long as
+    rotateMatArray(), it matches the rotations of the numba kernels in forcekernels.py
+    :param Quats: numpy array of shape (n, 4) as returned by getQuatArray()
+    :param V: numpy array of shape (n, 3)
+    :param out: None or numpy array of shape (n, 3) the result is written to, must not share memory with V
+    :param ws: None or instance of Workspace holding the buffers for intermediate results
+    :return: numpy array of shape (n, 3) containing the rotated vectors
+    """
+    n = len(V)
+    if out is None:
+        out = np.empty((n, 3))
+    if ws is None:
+        ws = Workspace()
+    a, u = Quats[:, 0], Quats[:, 1:]
+    s, c = ws.get("quats", n), ws.get("quatc", n)
+    w = ws.get("quatw", n, (3,))
+
+    np.multiply(a, a, out=c)
+    c -= np.einsum("ij, ij -> i", u, u, out=s)
+    np.multiply(V, c[:, None], out=out)
+    np.einsum("ij, ij -> i", u, V, out=s)
+    s *= 2
+    out += np.multiply(u, s[:, None], out=w)
+    getCrossArray(u, V, w, s)
+    np.multiply(a, 2, out=c)
+    w *= c[:, None]
+    out += w
+    return out
+
+
+def getCrossArray(a, b, out, tmp):
+    """
+    Calculate cross products of vectors without allocating temporary arrays
+    :param a: numpy array of shape (n, 3)
+    :param b: numpy array of shape (n, 3)
+    :param out: numpy array of shape (n, 3) the result is written to, must not share memory with a or b
+    :param tmp: numpy array of shape (n), used as buffer
+    :return: out, containing the cross products of a and b
+    """
+    for i, j, k in ((0, 1, 2), (1, 2, 0), (2, 0, 1)):
+        np.multiply(a[:, j], b[:, k], out=out[:, i])
+        np.multiply(a[:, k], b[:, j], out=tmp)
+        np.subtract(out[:, i], tmp, out=out[:, i])
+    return out
+
+
+def getPerpNormvec(v, e, tmp, tmp3):
+    """
+    Project vectors onto the planes perpendicular to normed vectors e and normalize the results (vectors
+    \bm{\tilde{n}}_{A, l} in czirok2014cell). Works in place on v.
+    :param v: numpy array of shape (n, 3)
+    :param e: numpy array of shape (n, 3), normed vectors
+    :param tmp: numpy array of shape (n), used as buffer
+    :param tmp3: numpy array of shape (n, 3), used as buffer
+    :return: v, containing the projected and normalized vectors
+    """
+    v -= np.multiply(e, np.einsum("ij, ij -> i", v, e, out=tmp)[:, None], out=tmp3)
+    np.sqrt(np.einsum("ij, ij -> i", v, v, out=tmp), out=tmp)
+    np.divide(v, tmp[:, None], out=v, where=tmp[:, None] > 1e-5)  # filter for division by 0
+    return v
+
+
+class Workspace:
+    def __init__(self):
+        """
+        Preallocated buffers for the intermediate results of the force calculations, so repeated calls by the solver
+        don't allocate new arrays. Buffers are looked up by name and only regrown if more rows are requested than
+        they hold, e.g. because links have been added.
+        """
+        self.buffers = {}
+
+    def get(self, name, n, shape=()):
+        """
+        Get a buffer with n rows
+        :param name: string, the name of the buffer
+        :param n: integer, the number of rows needed
+        :param shape: tuple, the shape of each row
+        :return: numpy array of shape (n,) + shape, a view on the buffer. Its content is left from the last use of the
+        buffer
+        """
+        buf = self.buffers.get(name)
+        if buf is None or len(buf) < n:
+            buf = np.empty((max(n, 8) if buf is None else max(n, 2 * len(buf)),) + shape)
+            self.buffers[name] = buf
+        return buf[:n]
+
+
+def getLinkDirections(X0, X1, inds0, inds1, ws):
+    """
+    Calculate the normed directions and distances between nodes connected by links
+    :param X0: numpy array of shape (n0, 3), positions of the nodes at end 0 of the links
+    :param X1: numpy array of shape (n1, 3), positions of the nodes at end 1 of the links
+    :param inds0: numpy array of shape (nl), indices of the nodes at end 0 of the nl links
+    :param inds1: numpy array of shape (nl), indices of the nodes at end 1 of the nl links
+    :param ws: instance of Workspace holding the buffers for the results
+    :return: normed directions from end 0 to end 1 (nl, 3) and distances (nl), views on buffers "E" and "D" in ws
+    """
+    nl = len(inds0)
+    E = np.take(X1, inds1, axis=0, out=ws.get("E", nl, (3,)), mode="clip")
+    E -= np.take(X0, inds0, axis=0, out=ws.get("tmp3", nl, (3,)), mode="clip")
+    D = ws.get("D", nl)
+    np.sqrt(np.einsum("ij, ij -> i", E, E, out=D), out=D)
+    np.divide(E, D[:, None], out=E, where=D[:, None] > 1e-5)  # filter for division by 0
+    return E, D
+
+
+def getLinkForces3D(rot0, rot1, E, D, T0, T1, Norm0, Norm1, Bend, Twist, K, D0, rotate, ws):
+    """
+    Calculate the forces and torques of links in 3-d-simulations
+    :param rot0: rotations of the nodes at end 0 of the links, as set up by getRotMatArray() or getQuatArray()
+    :param rot1: rotations of the nodes at end 1 of the links
+    :param E: normed directions from end 0 to end 1 of the links
+    :param D: link lengths
+    :param T0: tangent vectors at end 0 of the links
+    :param T1: tangent vectors at end 1 of the links
+    :param Norm0: normal vectors at end 0 of the links
+    :param Norm1: normal vectors at end 1 of the links
+    :param Bend: bending rigidities
+    :param Twist: twist rigidity
+    :param K: Hookean constants
+    :param D0: individual link equilibrium lengths
+    :param rotate: function to rotate vectors matching rot0 and rot1, rotateMatArray() or rotateQuatArray()
+    :param ws: instance of Workspace holding the buffers for the results
+    :return: forces on end 0, torques on end 0, torques on end 1 and tensile forces of the links, views on buffers in
+    ws
+    """
+    nl = len(E)
+    tmp, tmp3 = ws.get("tmp", nl), ws.get("tmp3", nl, (3,))
+
+    # rotated version of Norm to fit current setup, calculated new vector \bm{\tilde{n}}_{A, l}
+    NormTilde0 = getPerpNormvec(rotate(rot0, Norm0, out=ws.get("NormTilde0", nl, (3,)), ws=ws), E, tmp, tmp3)
+    NormTilde1 = getPerpNormvec(rotate(rot1, Norm1, out=ws.get("NormTilde1", nl, (3,)), ws=ws), E, tmp, tmp3)
+
+    Mtwist = getCrossArray(NormTilde0, NormTilde1, ws.get("Mtwist", nl, (3,)), tmp)
+    Mtwist *= Twist[:, None]
+    M0 = getCrossArray(rotate(rot0, T0, out=tmp3, ws=ws), E, ws.get("M0", nl, (3,)), tmp)  # Eq 5
+    M0 *= Bend[:, None]
+    M0 += Mtwist
+    M1 = getCrossArray(rotate(rot1, T1, out=tmp3, ws=ws), E, ws.get("M1", nl, (3,)), tmp)
+    M1 *= Bend[:, None]
+    np.negative(M1, out=M1)
+    M1 -= Mtwist
+
+    M = np.add(M0, M1, out=ws.get("M", nl, (3,)))
+
+    # Eqs. 10, 13, 14, 15
+    Ftens = np.subtract(D, D0, out=ws.get("Ftens", nl))
+    Ftens *= K
+    F = getCrossArray(M, E, ws.get("F", nl, (3,)), tmp)
+    np.divide(F, D[:, None], out=F, where=D[:, None] > 1e-5)  # filter for division by 0
+    F += np.multiply(E, Ftens[:, None], out=tmp3)
+    return F, M0, M1, Ftens
+
+
+def resizeLinkTable(config, names, maxlinks):
+    """
+    Resize the per-link arrays of a link table, keeping the entries of all slots that fit into the new size
+    :param config: instance of NodeConfiguration, SubsConfiguration or LinkRegistry holding the link table
+    :param names: list of strings, names of the attributes of config which are per-link arrays
+    :param maxlinks: integer, the new number of slots
+    :return:
+    """
+    for name in names:
+        old = getattr(config, name)
+        new = np.zeros((maxlinks,) + old.shape[1:], dtype=old.dtype)
+        keep = min(len(old), maxlinks)
+        new[:keep] = old[:keep]
+        setattr(config, name, new)
+
+
+def getCompact(config, cache, compact):
+    """
+    Get compacted link data of a configuration, reusing cached data where the versions of the link data allow it
+    :param config: instance of NodeConfiguration or SubsConfiguration
+    :param cache: None or tuple (linkversion, d0version, data) from a previous call
+    :param compact: function gathering the data from the link table, returns tuple with d0 as second to last and
+        the link indices as last entry
+    :return: tuple (linkversion, d0version, data) to be used as the new cache
+    """
+    if cache is None or cache[0] != config.linkversion:
+        return config.linkversion, config.d0version, compact()
+    if cache[1] != config.d0version:
+        data = cache[2]
+        data[-2][:] = config.d0[data[-1][0]]    # only equilibrium lengths changed: update d0 in place
+        return config.linkversion, config.d0version, data
+    return cache
+
+
+def sumOnNodes(n, inds, v):
+    """
+    Sum vectors (e.g. forces or torques) acting on nodes
+    :param n: integer, the number of nodes
+    :param inds: numpy array of shape (nl), indices of the nodes the nl vectors act on
+    :param v: numpy array of shape (nl, 3), the vectors
+    :return: numpy array of shape (n, 3)
+    """
+    # one bincount over the flattened components instead of the unbuffered np.add.at
+    flatinds = (3 * np.asarray(inds, dtype=int))[:, None] + np.arange(3)
+    return np.bincount(flatinds.ravel(), weights=np.ravel(v), minlength=3 * n).reshape((n, 3))
+
+
+def sumLinkVectors(n, inds0, inds1, v0, v1):
+    """
+    Sum vectors acting on the ends of links (e.g. forces or torques) for each node
+    :param n: integer, the number of nodes
+    :param inds0: numpy array of shape (nl), indices of the nodes at end 0 of the nl links
+    :param inds1: numpy array of shape (nl), indices of the nodes at end 1 of the nl links
+    :param v0: numpy array of shape (nl, 3), vectors acting on the nodes at end 0
+    :param v1: numpy array of shape (nl, 3), vectors acting on the nodes at end 1
+    :return: numpy array of shape (n, 3)
+    """
+    return sumOnNodes(n, np.concatenate((inds0, inds1)), np.concatenate((v0, v1)))
+
+
+def getSkewArray(V):
+    """
+    Set up cross product matrices
+    :param V: numpy array of shape (n, 3)
+    :return: numpy array of shape (n, 3, 3) containing the matrices [v]_x with [v]_x w = v x w for each v in V
+    """
+    S = np.zeros((len(V), 3, 3))
+    S[:, 0, 1], S[:, 0, 2], S[:, 1, 2] = -V[:, 2], V[:, 1], -V[:, 0]
+    S[:, 1, 0], S[:, 2, 0], S[:, 2, 1] = V[:, 2], -V[:, 1], V[:, 0]
+    return S
+
+
+def getRotJacArray(Phis):
+    """
+    Calculate the right Jacobians of the rotations set up from rotation vectors, so that the derivative of a rotated
+    vector R(phi) v with respect to phi is -R(phi) [v]_x J(phi)
+    :param Phis: numpy array of shape (n, 3)
+    :return: numpy array of shape (n, 3, 3) containing the matrices J(phi) = I - (1 - cos(theta)) / theta^2 [phi]_x
+    + (theta - sin(theta)) / theta^3 [phi]_x^2, where theta = |phi|
+    """
+    Thetas = scipy.linalg.norm(Phis, axis=1)
+    c1 = np.full(len(Phis), 0.5)            # limits for small angles
+    c2 = np.full(len(Phis), 1. / 6.)
+    phiinds = np.where(Thetas > 1e-5)       # filter for division by 0
+    th = Thetas[phiinds]
+    c1[phiinds] = (1 - np.cos(th)) / th ** 2
+    c2[phiinds] = (th - np.sin(th)) / th ** 3
+    S = getSkewArray(Phis)
+    return np.eye(3) - c1[:, None, None] * S + c2[:, None, None] * np.einsum("nij, njk -> nik", S, S)
+
+
+def getPerpNormvecJac(v, dv, E, P, G):
+    """
+    Calculate vectors \bm{\tilde{n}}_{A, l} as in getPerpNormvec() together with their derivatives
+    :param v: numpy array of shape (n, 3), the rotated normal vectors
+    :param dv: numpy array of shape (n, 3, 3), derivatives of v with respect to the orientations of the nodes
+    :param E: numpy array of shape (n, 3), normed link directions
+    :param P: numpy array of shape (n, 3, 3), projectors onto the planes perpendicular to E
+    :param G: numpy array of shape (n, 3, 3), derivatives of E with respect to the link vectors
+    :return: numpy arrays of shape (n, 3), (n, 3, 3) and (n, 3, 3): the projected and normalized vectors and their
+    derivatives with respect to the link vectors and the orientations of the nodes
+    """
+    ve = np.einsum("ij, ij -> i", v, E)
+    nt = v - E * ve[:, None]
+    d = scipy.linalg.norm(nt, axis=1)
+    Norm = np.tile(np.eye(3), (len(v), 1, 1))
+    vecinds = np.where(d > 1e-5)    # filter for division by 0, vectors are left unnormalized there
+    nt[vecinds] /= d[vecinds][:, None]
+    Norm[vecinds] = (Norm[vecinds] - nt[vecinds][:, :, None] * nt[vecinds][:, None, :]) / d[vecinds][:, None, None]
+    C = ve[:, None, None] * np.eye(3) + E[:, :, None] * v[:, None, :]
+    return nt, -np.einsum("nij, njk, nkl -> nil", Norm, C, G), np.einsum("nij, njk, nkl -> nil", Norm, P, dv)
+
+
+def getLinkJacobian3D(Phi0, Phi1, E, D, T0, T1, Norm0, Norm1, Bend, Twist, K, D0):
+    """
+    Calculate the derivatives of the forces and torques of links as calculated by getLinkForces3D(). 2-d-simulations
+    are covered by setting Twist to 0
+    :param Phi0: orientations of the nodes at end 0 of the links
+    :param Phi1: orientations of the nodes at end 1 of the links
+    :param E: normed directions from end 0 to end 1 of the links
+    :param D: link lengths
+    :param T0: tangent vectors at end 0 of the links
+    :param T1: tangent vectors at end 1 of the links
+    :param Norm0: normal vectors at end 0 of the links
+    :param Norm1: normal vectors at end 1 of the links
+    :param Bend: bending rigidities
+    :param Twist: twist rigidity
+    :param K: Hookean constants
+    :param D0: individual link equilibrium lengths
+    :return: tuple of three tuples, containing the derivatives of the force on end 0, the torque on end 0 and the torque
+    on end 1 of the links, each with respect to the link vector (position of end 1 minus position of end 0), the
+    orientation of end 0 and the orientation of end 1. All are numpy arrays of shape (nl, 3, 3)
+    """
+    mm = lambda a, b: np.einsum("nij, njk -> nik", a, b)
+    rot = lambda a, v: np.einsum("nij, nj -> ni", a, v)
+    R0, R1 = getRotMatArray(Phi0), getRotMatArray(Phi1)
+    J0, J1 = getRotJacArray(Phi0), getRotJacArray(Phi1)
+    b = Bend[:, None, None]
+    tw = Twist[:, None, None]
+
+    # derivatives of the link direction
+    P = np.eye(3) - E[:, :, None] * E[:, None, :]
+    G = P / D[:, None, None]
+    SE = getSkewArray(E)
+
+    # bending torques, Eq 5
+    T0r, T1r = rot(R0, T0), rot(R1, T1)
+    B0D = b * mm(getSkewArray(T0r), G)
+    B0P0 = b * mm(SE, mm(R0, mm(getSkewArray(T0), J0)))
+    B1D = -b * mm(getSkewArray(T1r), G)
+    B1P1 = -b * mm(SE, mm(R1, mm(getSkewArray(T1), J1)))
+
+    # twisting torques
+    NT0, NT0D, NT0P0 = getPerpNormvecJac(rot(R0, Norm0), -mm(R0, mm(getSkewArray(Norm0), J0)), E, P, G)
+    NT1, NT1D, NT1P1 = getPerpNormvecJac(rot(R1, Norm1), -mm(R1, mm(getSkewArray(Norm1), J1)), E, P, G)
+    SNT0, SNT1 = getSkewArray(NT0), getSkewArray(NT1)
+    TwD = tw * (mm(SNT0, NT1D) - mm(SNT1, NT0D))
+    TwP0 = -tw * mm(SNT1, NT0P0)
+    TwP1 = tw * mm(SNT0, NT1P1)
+
+    M0D, M0P0, M0P1 = B0D + TwD, B0P0 + TwP0, TwP1
+    M1D, M1P0, M1P1 = B1D - TwD, -TwP0, B1P1 - TwP1
+
+    # forces, Eqs. 10, 13, 14, 15
+    M = Bend[:, None] * np.cross(T0r - T1r, E)
+    MxE = np.cross(M, E)
+    Dinv = 1. / D[:, None, None]
+    FD = K[:, None, None] * E[:, :, None] * E[:, None, :] + (K * (D - D0))[:, None, None] * G
+    FD += (mm(getSkewArray(M), G) - mm(SE, M0D + M1D) - MxE[:, :, None] * E[:, None, :] * Dinv) * Dinv
+    FP0 = -mm(SE, M0P0 + M1P0) * Dinv
+    FP1 = -mm(SE, M0P1 + M1P1) * Dinv
+    return (FD, FP0, FP1), (M0D, M0P0, M0P1), (M1D, M1P0, M1P1)
+
+
+def getJacobianEntries(n, blocks, inds0, inds1):
+    """
+    Set up the entries of the Jacobian of the forces and torques on nodes from the derivatives of the link forces and
+    torques
+    :param n: integer, the number of tissue nodes N, which have translational degrees of freedom
+    :param blocks: derivatives of the link forces and torques as returned by getLinkJacobian3D()
+    :param inds0: numpy array of shape (nl), indices of the tissue nodes at end 0 of the links
+    :param inds1: numpy array of shape (nl), indices of the nodes at end 1 of the links, substrate node j has index
+    N + j
+    :return: numpy arrays of the rows, columns and values of the entries. The state of the solver holds the positions of
+    the tissue nodes, followed by the orientations of tissue and substrate nodes. Entries can appear more than once
+    (links sharing nodes) and have to be summed
+    """
+    (FD, FP0, FP1), (M0D, M0P0, M0P1), (M1D, M1P0, M1P1) = blocks
+    istissue = inds1 < n    # substrate nodes have neither forces nor positions in the state
+    x0, x1, p0, p1 = inds0, inds1, n + inds0, n + inds1
+    entries = [(x0, x0, -FD), (x0, x1, FD), (x0, p0, FP0), (x0, p1, FP1),
+               (x1, x0, FD), (x1, x1, -FD), (x1, p0, -FP0), (x1, p1, -FP1),
+               (p0, x0, -M0D), (p0, x1, M0D), (p0, p0, M0P0), (p0, p1, M0P1),
+               (p1, x0, -M1D), (p1, x1, M1D), (p1, p0, M1P0), (p1, p1, M1P1)]
+    rows, cols, vals = [], [], []
+    for r, c, v in entries:
+        if r is x1 or c is x1:
+            r, c, v = r[istissue], c[istissue], v[istissue]
+        rows.append(np.broadcast_to(3 * r[:, None, None] + np.arange(3)[:, None], v.shape).ravel())
+        cols.append(np.broadcast_to(3 * c[:, None, None] + np.arange(3), v.shape).ravel())
+        vals.append(v.ravel())
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+
+
+def assembleJacobian(n, nvar, blocks, inds0, inds1):
+    """
+    Assemble the Jacobian of the forces and torques on nodes from the derivatives of the link forces and torques
+    :param n: integer, the number of tissue nodes N, which have translational degrees of freedom
+    :param nvar: integer, the number of 3-d-vectors in the state of the solver. Positions of tissue nodes come first,
+    followed by the orientations of tissue and substrate nodes
+    :param blocks: derivatives of the link forces and torques as returned by getLinkJacobian3D()
+    :param inds0: numpy array of shape (nl), indices of the tissue nodes at end 0 of the links
+    :param inds1: numpy array of shape (nl), indices of the nodes at end 1 of the links, substrate node j has index
+    N + j
+    :return: scipy.sparse.csr_matrix of shape (3 * nvar, 3 * nvar)
+    """
+    rows, cols, vals = getJacobianEntries(n, blocks, inds0, inds1)
+    return scipy.sparse.coo_matrix((vals, (rows, cols)), shape=(3 * nvar, 3 * nvar)).tocsr()  # duplicates are summed
+
+
+def getBandwidth(J):
+    """
+    Calculate the number of lower and upper diagonals holding nonzero entries of a sparse matrix
+    :param J: scipy sparse matrix
+    :return: tuple (lband, uband) of integers
+    """
+    J = J.tocoo()
+    if J.nnz == 0:
+        return 0, 0
+    return max(0, np.max(J.row - J.col)), max(0, np.max(J.col - J.row))
+
+
+def getBandedJacobian(J, lband, uband):
+    """
+    Pack a sparse Jacobian into the banded form used by LSODA if lband and uband are set: Jb[uband + i - j, j] = J[i, j]
+    :param J: scipy sparse matrix of shape (n, n)
+    :param lband: integer, the number of lower diagonals
+    :param uband: integer, the number of upper diagonals
+    :return: numpy array of shape (2 * lband + uband + 1, n), the last lband rows are left empty as LSODA uses them for
+    the LU decomposition. Entries of J outside of the band are dropped
+    """
+    J = J.tocoo()
+    Jb = np.zeros((2 * lband + uband + 1, J.shape[1]))
+    inband = np.where((J.row - J.col <= lband) & (J.col - J.row <= uband))
+    np.add.at(Jb, (uband + J.row[inband] - J.col[inband], J.col[inband]), J.data[inband])
+    return Jb
+
+
+def getJacSparsity(n, nvar, inds0, inds1):
+    """
+    Set up the sparsity structure of the Jacobian of the forces and torques on nodes, see getJacobianEntries(), and the
+    grouping of its columns for finite difference approximations
+    :param n: integer, the number of tissue nodes N
+    :param nvar: integer, the number of 3-d-vectors in the state of the solver
+    :param inds0: numpy array of shape (nl), indices of the tissue nodes at end 0 of the links
+    :param inds1: numpy array of shape (nl), indices of the nodes at end 1 of the links, substrate node j has index
+    N + j
+    :return: tuple (structure, groups) readable by solve_ivp as jac_sparsity for methods "BDF" and "Radau", with
+    structure a scipy.sparse.csc_matrix of shape (3 * nvar, 3 * nvar) and groups a numpy array of shape (3 * nvar)
+    assigning columns which can be perturbed in the same evaluation to the same group
+    """
+    ones = np.ones((len(inds0), 3, 3))
+    rows, cols, vals = getJacobianEntries(n, ((ones, ones, ones),) * 3, inds0, inds1)
+    structure = scipy.sparse.coo_matrix((np.abs(vals), (rows, cols)), shape=(3 * nvar, 3 * nvar)).tocsc()
+    return structure, group_columns(structure)
+
+
+def getBandOrder(structure):
+    """
+    Reorder the state of the solver so that the bands of the Jacobian are narrow, using the reverse Cuthill-McKee
+    algorithm on the graph of the 3-d-vectors in the state (positions and orientations of nodes) coupled by links
+    :param structure: sparsity structure of the Jacobian as returned by getJacSparsity()
+    :return: numpy array of shape (3 * nvar) containing the indices of the components of the state in the new order,
+    and integers lband and uband, the number of lower and upper diagonals of the reordered Jacobian
+    """
+    nvar = structure.shape[0] // 3
+    S = structure.tocoo()
+    graph = scipy.sparse.coo_matrix((np.ones(S.nnz), (S.row // 3, S.col // 3)), shape=(nvar, nvar)).tocsr()
+    perm = reverse_cuthill_mckee(graph, symmetric_mode=True)
+    order = (3 * perm[:, None] + np.arange(3)).ravel()
+    lband, uband = getBandwidth(structure[order][:, order])
+    return order, lband, uband
+
+
+def relaxFIRE(fun, converged, y0, dt0, dtmax, maxiter, stride=1, nmin=5, finc=1.1, fdec=0.5, alpha0=0.1, falpha=0.99):
+    """
+    Find mechanical equilibrium with the fast inertial relaxation engine (FIRE, Bitzek et al., Phys. Rev. Lett. 97,
+    170201 (2006), with the modifications of Guenole et al., Comput. Mater. Sci. 175, 109584 (2020)). The state
+    follows damped dynamics with unit masses driven by the forces and torques, where the velocity is turned towards the
+    forces while they do positive work and set to 0 otherwise. Only the final state is used for the relaxation, in
+    contrast to the overdamped dynamics solved by solve_ivp
+    :param fun: function fun(t, y) returning the forces and torques on the nodes for state y
+    :param converged: function converged(t, y, f) of the state and the forces f, the relaxation ends when it returns
+    True, or float, the relaxation ends when each component of the forces is smaller
+    :param y0: numpy array, the initial state
+    :param dt0: float, the initial time step
+    :param dtmax: float, the maximum time step
+    :param maxiter: integer, the maximum number of steps
+    :param stride: integer or None, keep the initial state and every stride-th step in the result, the final step is
+    always kept. If None, only the final state is kept
+    :param nmin: integer, the number of steps with positive work before the time step is increased
+    :param finc: float, the factor for increasing the time step
+    :param fdec: float, the factor for decreasing the time step
+    :param alpha0: float, the initial mixing of velocity and forces
+    :param falpha: float, the factor for decreasing the mixing
+    :return: instance of OdeResult like returned by solve_ivp, with the fictitious times and states of the kept steps
+    in t and y
+    """
+    y = np.array(y0, dtype=float)
+    v = np.zeros_like(y)
+    dt, alpha, npos, t = dt0, alpha0, 0, 0.
+    ts, ys = ([t], [y.copy()]) if stride is not None else ([], [])
+    if not callable(converged):
+        fmax = converged
+        converged = lambda t, y, f: np.max(np.abs(f)) < fmax
+    f = np.array(fun(t, y))     # copy, fun may return a view overwritten by the next call
+    nfev = 1
+    status = 0
+    for i in range(maxiter):
+        if converged(t, y, f):
+            status = 1
+            break
+        if np.dot(f, v) > 0:
+            npos += 1
+            if npos > nmin:
+                dt = min(dt * finc, dtmax)
+                alpha *= falpha
+        else:
+            # moving uphill: stop, step back half a step and continue more carefully
+            npos = 0
+            dt *= fdec
+            alpha = alpha0
+            y -= 0.5 * dt * v
+            v[:] = 0
+        v += dt * f
+        fnorm = np.sqrt(np.dot(f, f))
+        if fnorm > 0:
+            v *= 1 - alpha
+            v += alpha * np.sqrt(np.dot(v, v)) / fnorm * f
+        y += dt * v
+        t += dt
+        f = np.array(fun(t, y))
+        nfev += 1
+        if stride is not None and (i + 1) % stride == 0:
+            ts.append(t)
+            ys.append(y.copy())
+    if not ts or ts[-1] != t:
+        ts.append(t)
+        ys.append(y.copy())
+    message = "The relaxation converged." if status == 1 else "Maximum number of steps reached."
+    return OdeResult(t=np.array(ts), y=np.transpose(ys), nfev=nfev, njev=0, nlu=0, status=status, message=message,
+                     success=True)
+
+
+class BlockJacobi:
+    def __init__(self, jac, n):
+        """
+        Block-Jacobi preconditioner for solveNewtonKrylov(), applying the inverses of the diagonal blocks of
+        shift * I - J, where J is the Jacobian: 6x6-blocks coupling position and orientation of each tissue node and
+        3x3-blocks of the orientations of substrate nodes
+        :param jac: function jac(t, y) returning the Jacobian for state y as scipy sparse matrix, see getJacobian()
+        :param n: integer, the number of tissue nodes
+        """
+        self.jac = jac
+        self.n = n
+        self.comps = []     # indices of the components of the state in each block, for tissue and substrate nodes
+        self.invs = []      # inverses of the blocks
+
+    def update(self, x, shift):
+        """
+        Set up the inverses of the diagonal blocks at state x
+        :param x: numpy array, the state
+        :param shift: float, the shift of the diagonal
+        :return:
+        """
+        J = self.jac(0, x).tocoo()
+        nodes = np.arange(self.n)[:, None]
+        self.comps = [np.concatenate((3 * nodes + np.arange(3), 3 * (self.n + nodes) + np.arange(3)), axis=1),
+                      3 * np.arange(2 * self.n, len(x) // 3)[:, None] + np.arange(3)]
+        self.invs = []
+        for comps in self.comps:
+            nb, bs = comps.shape
+            block = -np.ones(len(x), dtype=int)
+            local = np.zeros(len(x), dtype=int)
+            block[comps] = np.arange(nb)[:, None]
+            local[comps] = np.arange(bs)
+            inblock = np.where((block[J.row] >= 0) & (block[J.row] == block[J.col]))
+            B = np.zeros((nb, bs, bs))
+            np.add.at(B, (block[J.row[inblock]], local[J.row[inblock]], local[J.col[inblock]]), -J.data[inblock])
+            B += shift * np.eye(bs)
+            self.invs.append(np.linalg.inv(B) if nb > 0 else B)
+
+    def matvec(self, v):
+        """
+        Apply the preconditioner
+        :param v: numpy array
+        :return: numpy array of same shape as v
+        """
+        v = np.ravel(v)
+        out = np.empty_like(v)
+        for comps, inv in zip(self.comps, self.invs):
+            out[comps] = np.einsum("nij, nj -> ni", inv, v[comps])
+        return out
+
+
+# scipy 1.12 renamed the relative tolerance of its iterative linear solvers from tol to rtol and 1.14 removed tol
+rtolkeyword = "rtol" if tuple(int(v) for v in scipy.__version__.split(".")[:2]) >= (1, 12) else "tol"
+
+
+def solveNewtonKrylov(fun, jac, y0, fmax, n, maxiter, dt0):
+    """
+    Find mechanical equilibrium by solving fun(y) = 0 with Newton-Krylov steps and pseudo-transient continuation: each
+    step solves (I / dt - J) s = fun(y), i.e. takes an implicit Euler step of size dt of the overdamped dynamics, where
+    dt grows as the forces decrease so that the steps turn into Newton steps close to equilibrium. The linear systems
+    are solved with LGMRES preconditioned by BlockJacobi, with products of the Jacobian J and vectors approximated by
+    finite differences of fun. Steps are shortened by a backtracking line search on the norm of the forces. If LGMRES
+    doesn't converge, dt is halved and the step is tried again instead.
+    :param fun: function fun(t, y) returning the forces and torques on the nodes for state y
+    :param jac: function jac(t, y) returning the Jacobian of fun as scipy sparse matrix, used for the preconditioner
+    :param y0: numpy array, the initial state
+    :param fmax: float, the solution is accepted if each component of fun is smaller than fmax
+    :param n: integer, the number of tissue nodes
+    :param maxiter: integer, the maximum number of Newton steps
+    :param dt0: float, the initial pseudo time step
+    :return: instance of OdeResult like returned by solve_ivp with the initial and final state in y and times 0. Field
+    success is False if no solution was found
+    """
+    y = np.array(y0, dtype=float)
+    f = np.array(fun(0, y))     # copy, fun may return a view overwritten by the next call
+    fnorm = np.linalg.norm(f)
+    dt = dt0
+    precond = BlockJacobi(jac, n)
+    M = scipy.sparse.linalg.LinearOperator((len(y), len(y)), matvec=precond.matvec)
+    nfev = 1
+
+    def jacvec(v):
+        vnorm = np.linalg.norm(v)
+        if vnorm == 0:
+            return np.zeros_like(v)
+        h = np.sqrt(np.finfo(float).eps) * max(1., np.linalg.norm(y)) / vnorm
+        return v / dt - (fun(0, y + h * v) - f) / h
+
+    for i in range(maxiter):
+        if np.max(np.abs(f)) < fmax:
+            return OdeResult(t=np.zeros(2), y=np.transpose([y0, y]), nfev=nfev, njev=i, status=1, success=True,
+                             message="Newton-Krylov iteration converged.")
+        precond.update(y, 1. / dt)
+        A = scipy.sparse.linalg.LinearOperator((len(y), len(y)), matvec=jacvec)
+        s, info = scipy.sparse.linalg.lgmres(A, f, M=M, atol=0., maxiter=20, **{rtolkeyword: 1e-2})
+        if info != 0:
+            # no usable search direction, retry with a smaller time step which makes the system better conditioned
+            dt *= 0.5
+            continue
+
+        # backtracking line search
+        lam = 1.
+        while True:
+            ynew = y + lam * s
+            fnew = np.array(fun(0, ynew))
+            nfev += 1
+            fnewnorm = np.linalg.norm(fnew)
+            if fnewnorm <= (1 - 1e-4 * lam) * fnorm or lam < 0.1:
+                break
+            lam *= 0.5
+
+        # switched evolution relaxation: grow time step with decreasing forces, shrink it if they increased
+        dt = dt * fnorm / fnewnorm if fnewnorm < fnorm else 0.5 * dt
+        y, f, fnorm = ynew, fnew, fnewnorm
+    return OdeResult(t=np.zeros(1), y=np.array(y0)[:, None], nfev=nfev, njev=maxiter, status=-1, success=False,
+                     message="Newton-Krylov iteration did not converge.")
+
+
+class Equilibrator:
+    def __init__(self, tmax, warmstart=True, atol=1e-3):
+        """
+        Runs solve_ivp for consecutive mechanical equilibrations. With warmstart, "BDF" and "Radau" start with the
+        Jacobian the previous equilibration ended with instead of evaluating it anew, if it was for the same nodes. It's
+        kept across changes of the links, the solvers replace it as soon as it is too outdated for their Newton
+        iterations to converge. "LSODA", which doesn't take a Jacobian, starts with the last step size of the previous
+        equilibration instead
+        :param tmax: float, the maximum time for each equilibration
+        :param warmstart: bool, whether to warm-start the equilibrations
+        :param atol: float, the absolute tolerance of the solver
+        """
+        self.tmax = tmax
+        self.warmstart = warmstart
+        self.atol = atol
+        self.method = None
+        self.h = None   # last step size of the last equilibration
+        self.J = None   # Jacobian at the end of the last equilibration
+        self.key = None     # key of the state J belongs to
+
+    def solve(self, fun, x, method, converged, key=None, stride=None, **options):
+        """
+        Run solve_ivp for an equilibration
+        :param fun: function returning the forces and torques on the nodes for a state, see getForces()
+        :param x: numpy array, the initial state
+        :param method: "LSODA", "BDF", "Radau" or "RKC", the solver
+        :param converged: float or function converged(t, y, f) ending the equilibration, see solve_ivp()
+        :param key: identifies the nodes whose state x is, the Jacobian of the last equilibration is only reused for
+        the same key
+        :param stride: integer or None, keep the initial state and every stride-th step in the result, or only the
+        final state if None
+        :param options: further options for the solver
+        :return: result of solve_ivp
+        """
+        if method != self.method:
+            self.method, self.h, self.J, self.key = method, None, None, None
+        if self.warmstart:
+            if self.h is not None:
+                options["first_step"] = self.h
+            if self.J is not None and key == self.key and self.J.shape == (len(x), len(x)):
+                options["jac0"] = self.J
+        res = solve_ivp(fun=fun, t_span=[0, self.tmax], y0=x, method=method, converged=converged, atol=self.atol,
+                        stride=stride, **options)
+        if self.warmstart and res.success:
+            if method == "LSODA" and res.solver.step_size:
+                self.h = res.solver.step_size
+            elif method in ("BDF", "Radau"):
+                self.J, self.key = res.solver.J, key
+        del res.solver
+        return res
+
+
+def getNeighbourhood(nodes, inds0, inds1, hops):
+    """
+    Find the nodes within a number of links of a set of nodes
+    :param nodes: numpy array of booleans, True for the nodes in the set
+    :param inds0: numpy array, indices of the nodes at one end of each link
+    :param inds1: numpy array, indices of the nodes at the other end of each link
+    :param hops: integer, the number of links
+    :return: numpy array of booleans, True for the nodes within hops links of the set, including the set itself
+    """
+    region = nodes.copy()
+    for i in range(hops):
+        grown = region.copy()
+        grown[inds1[region[inds0]]] = True
+        grown[inds0[region[inds1]]] = True
+        region = grown
+    return region
+
+
+class LocalRegion:
+    def __init__(self, config, x, region, args):
+        """
+        Part of a configuration made of a region of nodes and the links attached to them, for relaxing the region with
+        the other nodes frozen. Provides getForces(), getJacobian() and getJacSparsity() for the state of the region,
+        evaluating only the links attached to it
+        :param config: instance of NodeConfiguration or CombinedConfiguration
+        :param x: numpy array, the state of all nodes, frozen nodes keep their values
+        :param region: numpy array of booleans, True for the nodes in the region, where substrate node j is node N + j
+        :param args: link data of config in shape returned by config.compactStuffINeed()
+        """
+        self.config = config
+        self.x = np.array(x, dtype=float)
+        nodes = np.nonzero(region)[0]
+        self.N = np.count_nonzero(nodes < config.N)  # number of tissue nodes in the region
+        # positions of tissue nodes and orientations of tissue and substrate nodes in the region, in the order of x
+        rows = np.concatenate((nodes[nodes < config.N], config.N + nodes))
+        self.comps = (3 * rows[:, None] + np.arange(3)).ravel()
+        self.key = (id(config), self.comps.tobytes())  # identifies the state of the region, see Equilibrator.solve()
+        inds0, inds1 = args[-1][-2:]
+        attached = np.nonzero(region[inds0] | region[inds1])[0]
+        self.args = tuple(a[attached] for a in args[:-1]) + (tuple(i[attached] for i in args[-1]),)
+        self.sparsity = None
+
+    def getState(self):
+        """
+        :return: numpy array, the state of the region
+        """
+        return self.x[self.comps]
+
+    def getFullState(self, y):
+        """
+        :param y: numpy array, a state of the region
+        :return: numpy array, the state of all nodes with the region in state y
+        """
+        x = self.x.copy()
+        x[self.comps] = y
+        return x
+
+    def getForces(self, y):
+        """
+        Calculate forces and torques on the nodes of the region, see getForces() of the configuration
+        :param y: numpy array, the state of the region
+        :return: numpy array, forces and torques in the order of y
+        """
+        self.x[self.comps] = y
+        return self.config.getForces(self.x, *self.args)[self.comps]
+
+    def getJacobian(self, y):
+        """
+        Calculate the Jacobian of getForces(), see getJacobian() of the configuration
+        :param y: numpy array, the state of the region
+        :return: scipy.sparse.csr_matrix
+        """
+        self.x[self.comps] = y
+        return self.config.getJacobian(self.x, *self.args)[self.comps][:, self.comps]
+
+    def getJacSparsity(self):
+        """
+        Get the sparsity structure of the Jacobian of the region and the column groups for its estimation, see
+        getJacSparsity() of the configuration
+        :return: scipy.sparse.csc_matrix of the structure and numpy array of the column groups
+        """
+        if self.sparsity is None:
+            structure = self.config.getJacSparsity()[0][self.comps][:, self.comps].tocsc()
+            self.sparsity = (structure, group_columns(structure))
+        return self.sparsity
+
+
 def VoronoiNeighbors(positions, vodims=2):
     """
-    Calculate set of neighbors in a Voronoi tessellation form given positions
+    Calculate neighbors in a Voronoi tessellation form given positions
     :param positions: numpy array of shape (n, 3) indicating the positions of particles
     :param vodims: should be value 2 or 3, indicating the number of dimensions in which the tessellation is performed
-    :return: set of tuples (i, j) indicating the indices of neighboring particles in positions with i<j
+    :return: numpy array of shape (m, 2) of the indices (i, j) of neighboring particles in positions with i<j, sorted
+    along axis 0
     """
-    if vodims == 2:
-        positions = [n[:2] for n in positions]
+    positions = np.asarray(positions)[:, :vodims]
     # tri: list of interconnected particles: [ (a, b, c), (b, c, d), ... ]
     tri = Delaunay(positions, qhull_options='QJ')
-    # neighbors contain pairs of adjacent particles: [ (a,b), (c,d), ... ]
-    neighbors = [list(itertools.combinations(v, 2)) for v in tri.simplices]
-    n = []
-    for (i, j) in itertools.chain.from_iterable(neighbors):
-        if i < j:
-            n.append((i, j))
-        else:
-            n.append((j, i))
-    neighbors = set(n)
+    return getSimplexEdges(tri.simplices, len(positions))
 
-    return neighbors
+
+def getSimplexEdges(simplices, n, keys=False):
+    """
+    Get the edges of a triangulation
+    :param simplices: numpy array of shape (m, k) of the indices of the corners of m simplices
+    :param n: integer, the number of particles
+    :param keys: bool, whether to return the edges (i, j) as sorted keys i * n + j
+    :return: numpy array of shape (l, 2) of the indices (i, j) of the particles connected by an edge with i<j, sorted
+    along axis 0, or numpy array of shape (l) of their keys
+    """
+    # all pairs of corners of each simplex: [ (a, b), (a, c), (b, c), ... ]
+    c0, c1 = np.triu_indices(simplices.shape[1], 1)
+    pairs = np.sort(np.stack((simplices[:, c0].ravel(), simplices[:, c1].ravel()), axis=1), axis=1)
+    # pairs shared by several simplices appear only once
+    edges = np.unique(pairs[:, 0].astype(int) * n + pairs[:, 1])
+    if keys:
+        return edges
+    return np.stack((edges // n, edges % n), axis=1)
+
+
+class Tessellation:
+    def __init__(self, vodims=2, tol=1e-9):
+        """
+        Delaunay triangulation kept across calls for particles which move only a little. The triangulation is reused
+        as long as no simplex flipped its orientation and the hull is still convex. Facets with a corner of the
+        neighboring simplex inside the circumsphere of a simplex are repaired by edge flips in 2-d, in 3-d the
+        triangulation is then set up anew.
+        :param vodims: should be value 2 or 3, indicating the number of dimensions in which the tessellation is performed
+        :param tol: float, relative tolerance of the tests, nearly degenerate configurations within tol keep the
+            triangulation
+        """
+        self.vodims = vodims
+        self.tol = tol
+        self.n = None               # number of particles
+        self.simplices = None       # numpy array of shape (m, vodims + 1), the corners of the simplices
+        self.neighbors = None       # neighbors[i, j] is the simplex opposite of corner simplices[i, j], -1 at the hull
+        self.orientation = None     # signs of the volumes of the simplices when the triangulation was set up
+        self.inner = None           # for each inner facet: simplex and its corner opposite to it, opposite corner
+        self.hull = None            # hull facets, their opposite corners and (facet, corner) pairs of adjacent facets
+        self.keys = None            # sorted keys i * n + j of the edges (i, j) of the triangulation with i<j
+        self.pairs = None           # edges of the triangulation as returned by getSimplexEdges()
+        self.nbuilds = 0
+        self.nflips = 0
+
+    def build(self, positions):
+        """
+        Set up the triangulation for the given positions
+        :param positions: numpy array of shape (n, vodims) indicating the positions of particles
+        :return:
+        """
+        tri = Delaunay(positions, qhull_options='QJ')
+        simplices, neighbors = tri.simplices.copy(), tri.neighbors.copy()
+        m, k = simplices.shape
+        if self.vodims == 2:
+            # counterclockwise triangles for flipEdges()
+            cw = np.linalg.det(positions[simplices[:, 1:]] - positions[simplices[:, :1]]) < 0
+            simplices[cw], neighbors[cw] = simplices[cw][:, [0, 2, 1]], neighbors[cw][:, [0, 2, 1]]
+        self.n = len(positions)
+        self.simplices = simplices
+        self.neighbors = neighbors
+        self.keys = getSimplexEdges(simplices, self.n, keys=True)
+        self.pairs = np.stack((self.keys // self.n, self.keys % self.n), axis=1)
+        self.setInner()
+
+        # hull facets and the corners of the hull facets sharing a corner with them
+        s, j = np.nonzero(neighbors == -1)
+        keep = np.ones((len(s), k), dtype=bool)
+        keep[np.arange(len(s)), j] = False
+        facets = simplices[s][keep].reshape(-1, k - 1)
+        incidence = scipy.sparse.csr_matrix((np.ones(facets.size), (np.repeat(np.arange(len(s)), k - 1),
+                                                                    facets.ravel())), shape=(len(s), self.n))
+        adjacent = incidence.dot(incidence.T).tocoo()
+        keys = np.unique(np.repeat(adjacent.row, k - 1) * self.n + facets[adjacent.col].ravel())
+        self.hull = (facets, simplices[s, j], keys // self.n, keys % self.n)
+
+        self.orientation = np.sign(np.linalg.det(positions[simplices[:, 1:]] - positions[simplices[:, :1]]))
+        self.nbuilds += 1
+
+    def setInner(self):
+        """
+        Set up the list of inner facets of the triangulation, each seen from the simplex with the smaller index
+        :return:
+        """
+        s, j = np.nonzero(self.neighbors > np.arange(len(self.neighbors))[:, None])
+        nb = self.neighbors[s, j]
+        self.inner = (s, j, self.simplices[nb, np.argmax(self.neighbors[nb] == s[:, None], axis=1)])
+
+    def getIllegalFacets(self, positions):
+        """
+        Find the inner facets which violate the Delaunay condition for the given positions
+        :param positions: numpy array of shape (n, vodims) indicating the positions of particles
+        :return: None if a simplex flipped its orientation or the hull is no longer convex, otherwise numpy array of
+        the indices of the facets in self.inner with the opposite corner inside the circumsphere of the simplex
+        """
+        corners = positions[self.simplices]
+        edges = corners[:, 1:] - corners[:, :1]
+        if np.any(np.sign(np.linalg.det(edges)) != self.orientation):
+            return None
+
+        # the hull is convex if no corner of an adjacent hull facet lies outside the plane of a hull facet
+        facets, opposite, f, v = self.hull
+        base = positions[facets[:, 0]]
+        span = positions[facets[:, 1:]] - base[:, None]
+        inside = np.linalg.det(np.concatenate((span, (positions[opposite] - base)[:, None]), axis=1))
+        side = np.linalg.det(np.concatenate((span[f], (positions[v] - base[f])[:, None]), axis=1))
+        if np.any(side / inside[f] < -self.tol):
+            return None
+
+        # circumcenters c solve 2 * (p_i - p_0) . (c - p_0) = |p_i - p_0| ** 2
+        center = 0.5 * np.linalg.solve(edges, np.sum(edges ** 2, axis=2)[:, :, None])[:, :, 0]
+        r2 = np.sum(center ** 2, axis=1)
+        center += corners[:, 0]
+        s, j, opposite = self.inner
+        return np.nonzero(np.sum((positions[opposite] - center[s]) ** 2, axis=1) < r2[s] * (1 - self.tol))[0]
+
+    def incircle(self, X, a, b, c, d):
+        """
+        Check whether point d lies inside the circumcircle of the counterclockwise triangle (a, b, c) in 2-d
+        :param X: list of the positions [x, y] of particles
+        :param a, b, c, d: integers, indices of particles in X
+        :return: bool
+        """
+        (ax, ay), (bx, by), (cx, cy), (dx, dy) = X[a], X[b], X[c], X[d]
+        bx, by, cx, cy = bx - ax, by - ay, cx - ax, cy - ay
+        det = 2 * (bx * cy - by * cx)
+        b2, c2 = bx * bx + by * by, cx * cx + cy * cy
+        ux, uy = (cy * b2 - by * c2) / det, (bx * c2 - cx * b2) / det
+        return (dx - ax - ux) ** 2 + (dy - ay - uy) ** 2 < (ux * ux + uy * uy) * (1 - self.tol)
+
+    def flipEdges(self, positions, illegal):
+        """
+        Restore the Delaunay condition of a 2-d triangulation with counterclockwise triangles by flipping edges
+        (Lawson's algorithm), starting from the given illegal edges. Flips keep the orientation of the triangles and the
+        hull, so only the inner facets and the edges are updated.
+        :param positions: numpy array of shape (n, 2) indicating the positions of particles
+        :param illegal: numpy array of indices of inner facets in self.inner
+        :return:
+        """
+        S, N, n = self.simplices, self.neighbors, self.n
+        X = positions.tolist()
+        s, j, o = self.inner
+        stack = list(zip(s[illegal].tolist(), j[illegal].tolist()))
+        removed, added = set(), set()
+        while stack:
+            t, i = stack.pop()
+            u = N[t, i]
+            if u < 0:
+                continue
+            a, p, q = S[t, i], S[t, (i + 1) % 3], S[t, (i + 2) % 3]
+            k = list(N[u]).index(t)
+            b = S[u, k]
+            if not self.incircle(X, a, p, q, b):
+                continue
+            # triangles (a, p, q) and (b, q, p) become (a, p, b) and (b, q, a)
+            tap, tqa = N[t, (i + 2) % 3], N[t, (i + 1) % 3]
+            tbq, tpb = N[u, (k + 2) % 3], N[u, (k + 1) % 3]
+            S[t], N[t] = (a, p, b), (tpb, u, tap)
+            S[u], N[u] = (b, q, a), (tqa, t, tbq)
+            if tpb >= 0:
+                N[tpb, list(N[tpb]).index(u)] = t
+            if tqa >= 0:
+                N[tqa, list(N[tqa]).index(t)] = u
+            stack += [(t, 0), (t, 2), (u, 0), (u, 2)]
+            for key, this, other in ((min(p, q) * n + max(p, q), removed, added),
+                                     (min(a, b) * n + max(a, b), added, removed)):
+                if key in other:
+                    other.remove(key)
+                else:
+                    this.add(key)
+            self.nflips += 1
+        if removed or added:
+            keys = np.delete(self.keys, np.searchsorted(self.keys, sorted(removed)))
+            added = np.array(sorted(added), dtype=keys.dtype)
+            self.keys = np.insert(keys, np.searchsorted(keys, added), added)
+            self.pairs = np.stack((self.keys // n, self.keys % n), axis=1)
+            self.setInner()
+
+    def getNeighbors(self, positions):
+        """
+        Calculate neighbors in a Voronoi tessellation from given positions, updating the triangulation if necessary
+        :param positions: numpy array of shape (n, 3) indicating the positions of particles
+        :return: numpy array of shape (m, 2) of the indices (i, j) of neighboring particles in positions with i<j, sorted
+        along axis 0
+        """
+        positions = np.asarray(positions)[:, :self.vodims]
+        if self.simplices is None or len(positions) != self.n:
+            self.build(positions)
+            return self.pairs
+        illegal = self.getIllegalFacets(positions)
+        if illegal is None or (len(illegal) > 0 and (self.vodims != 2 or np.any(self.orientation == 0))):
+            self.build(positions)
+        elif len(illegal) > 0:
+            self.flipEdges(positions, illegal)
+        return self.pairs
+
+
+def getCutoffPairs(tree, cutoff):
+    """
+    Find all pairs of particles closer than a cutoff distance
+    :param tree: instance of scipy.spatial.cKDTree of the positions of particles
+    :param cutoff: float, the maximum distance of the pairs
+    :return: numpy array of shape (m, 2) of the indices (i, j) of the pairs with i<j
+    """
+    pairs = tree.sparse_distance_matrix(tree, cutoff, output_type="ndarray")
+    pairs = pairs[pairs["i"] < pairs["j"]]
+    return np.stack((pairs["i"], pairs["j"]), axis=1)
+
+
+def isGabriel(positions, pairs, tree=None):
+    """
+    Test which pairs of particles have no other particle inside the sphere with the pair as diameter. These are the
+    edges of the Gabriel graph, a subgraph of the Delaunay triangulation
+    :param positions: numpy array of shape (n, vodims) indicating the positions of particles
+    :param pairs: numpy array of shape (m, 2) of indices of particles in positions
+    :param tree: instance of scipy.spatial.cKDTree of positions or None
+    :return: boolean numpy array of shape (m)
+    """
+    if tree is None:
+        tree = cKDTree(positions)
+    mid = 0.5 * (positions[pairs[:, 0]] + positions[pairs[:, 1]])
+    r = 0.5 * np.sqrt(np.sum((positions[pairs[:, 0]] - positions[pairs[:, 1]]) ** 2, axis=1))
+    # both particles of a pair are at distance r from its midpoint, any particle closer lies inside the sphere
+    return tree.query(mid)[0] > r * (1 - 1e-8)
+
+
+def CutoffNeighbors(positions, cutoff, vodims=2, gabriel=False):
+    """
+    Calculate pairs of particles closer than a cutoff distance from given positions
+    :param positions: numpy array of shape (n, 3) indicating the positions of particles
+    :param cutoff: float, the maximum distance of neighboring particles
+    :param vodims: should be value 2 or 3, indicating the number of dimensions in which distances are measured
+    :param gabriel: bool, whether to keep only pairs which are neighbors in the Gabriel graph, see isGabriel()
+    :return: numpy array of shape (m, 2) of the indices (i, j) of neighboring particles in positions with i<j
+    """
+    positions = np.asarray(positions)[:, :vodims]
+    tree = cKDTree(positions)
+    pairs = getCutoffPairs(tree, cutoff)
+    if gabriel and len(pairs) > 0:
+        pairs = pairs[isGabriel(positions, pairs, tree)]
+    return pairs
+
+
+class VerletList:
+    def __init__(self, cutoff, skin, vodims=2, gabriel=False):
+        """
+        Verlet list of the pairs of particles closer than cutoff + skin. The list is kept until a particle moved by
+        more than skin / 2 since it was built, until then it contains all pairs closer than cutoff.
+        :param cutoff: float, the maximum distance of neighboring particles
+        :param skin: float, the margin of the listed distances beyond cutoff
+        :param vodims: should be value 2 or 3, indicating the number of dimensions in which distances are measured
+        :param gabriel: bool, whether to keep only pairs which are neighbors in the Gabriel graph, see isGabriel()
+        """
+        self.cutoff = cutoff
+        self.skin = skin
+        self.vodims = vodims
+        self.gabriel = gabriel
+        self.X0 = None          # positions when the list was built
+        self.pairs = None       # numpy array of shape (m, 2) of the listed pairs
+        self.nbuilds = 0
+
+    def build(self, positions):
+        """
+        Set up the list for the given positions
+        :param positions: numpy array of shape (n, vodims) indicating the positions of particles
+        :return:
+        """
+        self.X0 = positions.copy()
+        self.pairs = getCutoffPairs(cKDTree(positions), self.cutoff + self.skin)
+        self.nbuilds += 1
+
+    def getNeighbors(self, positions):
+        """
+        Calculate pairs of particles closer than the cutoff distance from given positions, rebuilding the list if
+        necessary
+        :param positions: numpy array of shape (n, 3) indicating the positions of particles
+        :return: numpy array of shape (m, 2) of the indices (i, j) of neighboring particles in positions with i<j
+        """
+        positions = np.asarray(positions)[:, :self.vodims]
+        if self.X0 is None or len(positions) != len(self.X0) or \
+                np.max(np.sum((positions - self.X0) ** 2, axis=1)) > (0.5 * self.skin) ** 2:
+            self.build(positions)
+        diff = positions[self.pairs[:, 0]] - positions[self.pairs[:, 1]]
+        pairs = self.pairs[np.sum(diff ** 2, axis=1) <= self.cutoff ** 2]
+        if self.gabriel and len(pairs) > 0:
+            pairs = pairs[isGabriel(positions, pairs)]
+        return pairs
 
 
 def relaunch_CellMech(savedir, num_cells, num_subs=0, dt=0.01, nmax=300, qmin=0.001, d0_0=1., p_add=1., p_del=0.2,
@@ -216,11 +1303,12 @@ def relaunch_CellMech(savedir, num_cells, num_subs=0, dt=0.01, nmax=300, qmin=0.
     c.mynodes.flinksnap = c.saveonesnap("linksf", savedir, np.load(savedir + "/linksf.npy"))
 
     # load data on t and n vectors and on individual link equilibrium lengths
-    nodeinds = np.where(c.mynodes.islink == True)
+    slots, ends = c.mynodes.getDirectedLinks()
 
-    c.mynodes.t[nodeinds] = np.load(savedir + "/tang.npy")
-    c.mynodes.norm[nodeinds] = np.load(savedir + "/norm.npy")
-    c.mynodes.d0[nodeinds] = np.load(savedir + "/d0.npy")
+    c.mynodes.t[slots, ends] = np.load(savedir + "/tang.npy")
+    c.mynodes.norm[slots, ends] = np.load(savedir + "/norm.npy")
+    c.mynodes.d0[slots] = np.load(savedir + "/d0.npy")
+    c.mynodes.linkversion += 1
 
     if c.issubs is not False:
         # do everything for substrate
@@ -246,24 +1334,94 @@ def relaunch_CellMech(savedir, num_cells, num_subs=0, dt=0.01, nmax=300, qmin=0.
         c.mynodes.flinksnap = c.saveonesnap("subslinksf", savedir, np.load(savedir + "/subslinksf.npy"))
 
         # load data on t and n vectors and on individual link equilibrium lengths
-        nodeinds = np.where(c.mysubs.islink == True)
+        slots = c.mysubs.getOrderedSlots()
 
-        c.mysubs.tcell[nodeinds] = np.load(savedir + "/substcell.npy")
-        c.mysubs.tsubs[nodeinds] = np.load(savedir + "/substsubs.npy")
-        c.mysubs.normcell[nodeinds] = np.load(savedir + "/subsnormcell.npy")
-        c.mysubs.normsubs[nodeinds] = np.load(savedir + "/subsnormsubs.npy")
-        c.mysubs.d0[nodeinds] = np.load(savedir + "/subsd0.npy")
+        c.mysubs.tcell[slots] = np.load(savedir + "/substcell.npy")
+        c.mysubs.tsubs[slots] = np.load(savedir + "/substsubs.npy")
+        c.mysubs.normcell[slots] = np.load(savedir + "/subsnormcell.npy")
+        c.mysubs.normsubs[slots] = np.load(savedir + "/subsnormsubs.npy")
+        c.mysubs.d0[slots] = np.load(savedir + "/subsd0.npy")
+        c.mysubs.linkversion += 1
 
     c.nsaves += 1
 
     return c
 
 
+class LinkRegistry:
+    def __init__(self, maxlinks):
+        """
+        Registry of the links stored in a link table. Hands out slots for new links and recycles the slots of removed
+        links via a free-list, both in O(1). Keeps the slots and node indices of all existing links in compact arrays
+        which are updated whenever a link is added or removed, so reading the current set of links needs no search.
+        :param maxlinks: integer, initial number of slots
+        """
+        self.slot = {}                                          # slot[(i, j)] is the slot of link between i and j
+        self.maxlinks = maxlinks                                # number of slots currently allocated
+        self.freeslots = list(range(maxlinks - 1, -1, -1))      # unused slots, next one to hand out at the end
+        self.nlinks = 0                                         # number of existing links
+        self.slots = np.zeros((maxlinks,), dtype=int)           # slots of existing links in first nlinks entries
+        self.links = np.zeros((maxlinks, 2), dtype=int)         # node indices of existing links, same order as slots
+        self.pos = np.zeros((maxlinks,), dtype=int)             # pos[slot]: position of slot in self.slots
+
+    def add(self, i, j):
+        """
+        Register the link between nodes i and j
+        :param i: integer, index of the node at end 0 of the link
+        :param j: integer, index of the node at end 1 of the link
+        :return: integer, the slot of the link
+        """
+        slot = self.slot.get((i, j))
+        if slot is not None:
+            return slot
+        if len(self.freeslots) == 0:
+            self.grow()
+        slot = self.freeslots.pop()
+        self.slot[(i, j)] = slot
+        n = self.nlinks
+        self.slots[n] = slot
+        self.links[n] = i, j
+        self.pos[slot] = n
+        self.nlinks += 1
+        return slot
+
+    def remove(self, i, j):
+        """
+        Unregister the link between nodes i and j. The last existing link takes its position in self.slots and
+        self.links, its slot is freed for reuse.
+        :param i: integer, index of the node at end 0 of the link
+        :param j: integer, index of the node at end 1 of the link
+        :return: integer, the former slot of the link
+        """
+        slot = self.slot.pop((i, j))
+        self.nlinks -= 1
+        n = self.nlinks
+        p = self.pos[slot]
+        last = self.slots[n]
+        self.slots[p] = last
+        self.links[p] = self.links[n]
+        self.pos[last] = p
+        self.freeslots.append(slot)
+        return slot
+
+    def grow(self):
+        """
+        Double the number of slots
+        :return:
+        """
+        old = self.maxlinks
+        self.maxlinks *= 2
+        resizeLinkTable(self, ["slots", "links", "pos"], self.maxlinks)
+        self.freeslots = list(range(self.maxlinks - 1, old - 1, -1))
+
+
 class NodeConfiguration:
-    def __init__(self, num, num_subs, d0_0, p_add, p_del, c1, c2, c3, F_contr, dims, isF0, isanchor, plasticity):
+    def __init__(self, num, num_subs, d0_0, p_add, p_del, c1, c2, c3, F_contr, dims, isF0, isanchor, plasticity,
+                 orientation="matrix", backend="numpy"):
         """
         Class containing data for all tissue nodes and tissue-tissue links. Is automatically initialized by class
-        CellMech
+        CellMech. Links are kept in a link table: each link occupies one slot of the per-link arrays, so memory and
+        computation time scale with the number of links instead of the number of possible node pairs.
         :param num: integer, the number of tissue cells
         :param num_subs: integer, the number of substrate cells
         :param d0_0: float, the global equilibrium link length (d_0 in czirok2014cell)
@@ -279,14 +1437,42 @@ class NodeConfiguration:
         :param isanchor: bool, whether or not tissue cells are anchored to a x0-position
         :param plasticity: Either None if Hookean, bend and twist constants are set individually per link, or tuple
             containing global values for the three constants in shape (k1, k2, k3) = (bend, twist, Hooke)
-        """
+        :param orientation: "matrix" or "quaternion", the representation used to rotate link vectors with the node
+            orientations when calculating forces. Node orientations are always stored as rotation vectors. With the
+            numpy backend "quaternion" is slower than "matrix", it is the numpy counterpart of the numba kernels
+        :param backend: "numpy" or "numba", whether forces are calculated with numpy or with the compiled kernels in
+            forcekernels.py (always using quaternions). Falls back to "numpy" if numba is not available
+        """
+        if backend == "numba" and forcekernels is None:
+            print "Numba not available, using numpy force backend."
+            backend = "numpy"
+        if backend == "numpy":
+            self.getForces = lambda x, t, norm, bend, twist, k, d0, nodeinds: \
+                self.getForces_numpy(x, t, norm, bend, twist, k, d0, nodeinds)
+        elif backend == "numba":
+            self.getForces = lambda x, t, norm, bend, twist, k, d0, nodeinds: \
+                self.getForces_numba(x, t, norm, bend, twist, k, d0, nodeinds)
+        else:
+            print "Oops! Unknown force backend."
+            sys.exit()
+
+        if orientation == "matrix":
+            self.getRotations = getRotMatArray
+            self.rotate = rotateMatArray
+        elif orientation == "quaternion":
+            self.getRotations = getQuatArray
+            self.rotate = rotateQuatArray
+        else:
+            print "Oops! Unknown orientation representation."
+            sys.exit()
+
         if dims == 2:
-            self.updateLinkForces = lambda PHI, T, Norm, NormT, Bend, Twist, K, D0, Nodeinds: \
+            self.updateLinkForces = lambda PHI, T, Norm, Bend, Twist, K, D0, Nodeinds: \
                 self.updateLinkForces2D(PHI, T, Bend, K, D0, Nodeinds)
             self.dims = dims
         elif dims == 3:
-            self.updateLinkForces = lambda PHI, T, Norm, NormT, Bend, Twist, K, D0, Nodeinds: \
-                self.updateLinkForces3D(PHI, T, Norm, NormT, Bend, Twist, K, D0, Nodeinds)
+            self.updateLinkForces = lambda PHI, T, Norm, Bend, Twist, K, D0, Nodeinds: \
+                self.updateLinkForces3D(PHI, T, Norm, Bend, Twist, K, D0, Nodeinds)
             self.dims = dims
         else:
             print "Oops! Wrong number of dimensions here."
@@ -301,59 +1487,65 @@ class NodeConfiguration:
         # description of nodes
         self.nodesX = np.zeros((self.N, 3))             # r of nodes
         self.nodesPhi = np.zeros((self.N, 3))           # phi of nodes
-        self.Fnode = np.zeros((self.N, 3))              # total force on node
-        self.Mnode = np.zeros((self.N, 3))              # total torsion on node
+        self.rhs = np.zeros((self.N2 + num_subs, 3))    # forces, torques, zeros for subs nodes, as passed to solver
+        self.Fnode = self.rhs[:self.N]                  # total force on node
+        self.Mnode = self.rhs[self.N:self.N2]           # total torsion on node
         self.isF0 = isF0
         self.F0 = np.zeros((self.N, 3))                 # external force on node
         self.isanchor = isanchor
         self.X0 = np.zeros((self.N, 3))                 # node anchor, must be set if needed!
         self.knode = np.zeros((self.N,))                # spring constant of node to anchor point, defaults to 0
 
-        self.gaps = np.zeros((num_subs, 3))
-
         # description of links
-        # islink[i, j] is True if nodes i and j are connected via link
-        self.islink = np.full((self.N, self.N), False)  # Describes link at node [0] leading to node [1]
-
-        self.e = np.zeros((self.N, self.N, 3))           # direction connecting nodes (a.k.a. "actual direction")
-        self.d = np.zeros((self.N, self.N))              # distance between nodes (a.k.a. "actual distance")
+        # linkreg keeps track of the slot of the link connecting nodes i and j, where i > j. Per-link arrays hold the
+        # information of the link in a slot, with the quantities at both ends of a link stored along axis 1 (end 0 at
+        # node i, end 1 at node j)
+        self.linkreg = LinkRegistry(max(3 * self.N, 8))
+        self.maxlinks = self.linkreg.maxlinks
+
+        self.e = np.zeros((self.maxlinks, 3))            # direction from end 0 to end 1 (a.k.a. "actual direction")
+        self.d = np.zeros((self.maxlinks,))              # distance between nodes (a.k.a. "actual distance")
         self.d0_0 = d0_0                                 # global equilibrium link length
+        self.linkarrays = ["e", "d", "d0", "t", "norm", "Mlink", "Flink", "Flink_tens"]
         if plasticity is None:
-            self.k = np.zeros((self.N, self.N))              # spring constant between nodes
-            self.bend = np.zeros((self.N, self.N))           # bending rigidity
-            self.twist = np.zeros((self.N, self.N))          # torsion spring constant
+            self.k = np.zeros((self.maxlinks,))              # spring constant between nodes
+            self.bend = np.zeros((self.maxlinks,))           # bending rigidity
+            self.twist = np.zeros((self.maxlinks,))          # torsion spring constant
             self.saveram = False
+            self.linkarrays += ["k", "bend", "twist"]
         else:
             self.bend = plasticity[0]
             self.twist = plasticity[1]
             self.k = plasticity[2]
             self.saveram = True
-        self.d0 = np.zeros((self.N, self.N))             # equilibrium distance between nodes,
-        self.t = np.zeros((self.N, self.N, 3))           # tangent vector of link at node (a.k.a. "preferred direction")
-        self.norm = np.zeros((self.N, self.N, 3))        # normal vector of link at node
-        self.Mlink = np.zeros((self.N, self.N, 3))       # Torsion from link on node
-        self.Flink = np.zeros((self.N, self.N, 3))       # Force from link on node
-        self.Flink_tens = np.zeros((self.N, self.N))     # Tensile component of Flink
+        self.d0 = np.zeros((self.maxlinks,))             # equilibrium distance between nodes,
+        self.t = np.zeros((self.maxlinks, 2, 3))         # tangent vector of link at node (a.k.a. "preferred direction")
+        self.norm = np.zeros((self.maxlinks, 2, 3))      # normal vector of link at node
+        self.Mlink = np.zeros((self.maxlinks, 2, 3))     # Torsion from link on node
+        self.Flink = np.zeros((self.maxlinks, 3))        # Force from link on node at end 0 (end 1: -Flink)
+        self.Flink_tens = np.zeros((self.maxlinks,))     # Tensile component of Flink
         self.F_contr = F_contr                           # Target value for contractile force
 
+        # versions of the link data, compacted link data is cached until they change
+        self.linkversion = 0    # incremented when links are added or removed or their t, norm, k, bend, twist change
+        self.d0version = 0      # incremented when equilibrium lengths change
+        self.compactcache = None
+        self.sparsitycache = None
+        self.ws = Workspace()   # buffers for force calculations
+
         self.p_add = p_add
         self.p_del = p_del
         self.c1 = c1
         self.c2 = c2
         self.c3 = c3
 
-        # functions for randoms in default_update_d0
-        self.lowers = np.tril_indices(self.N, -1)
-        self.randomlength = int(self.N * (self.N - 1) / 2)
-        self.randomsummand = np.zeros((self.N, self.N))
-
         # stuff for documentation
         self.nodesnap = []
         self.linksnap = []
         self.fnodesnap = []
         self.flinksnap = []
 
-        self.nodesum = lambda: 0
+        self.nodesum = lambda F: F
 
         self.reset_nodesum()
 
@@ -365,18 +1557,38 @@ class NodeConfiguration:
         """
         if self.isF0 is False and self.isanchor is False:
             # only forces exerted by tissue-tissue links
-            self.nodesum = lambda: np.sum(self.Flink, axis=1)
+            self.nodesum = lambda F: F
         elif self.isF0 is True and self.isanchor is False:
             # tissue-tissue link forces and external forces
-            self.nodesum = lambda: np.sum(self.Flink, axis=1) + self.F0
+            self.nodesum = lambda F: F + self.F0
         elif self.isF0 is False and self.isanchor is True:
             # tissue-tissue link forces and forces resulting from nodes being anchored to r0
-            self.nodesum = lambda: np.sum(self.Flink, axis=1) + \
-                                   np.multiply(self.knode[..., None], (self.X0 - self.nodesX))
+            self.nodesum = lambda F: F + np.multiply(self.knode[..., None], (self.X0 - self.nodesX))
         elif self.isF0 is True and self.isanchor is True:
             # tissue-tissue link forces, forces resulting from nodes being anchored to r0 and external forces
-            self.nodesum = lambda: np.sum(self.Flink, axis=1) + self.F0 + \
-                                   np.multiply(self.knode[..., None], (self.X0 - self.nodesX))
+            self.nodesum = lambda F: F + self.F0 + np.multiply(self.knode[..., None], (self.X0 - self.nodesX))
+
+    def haslink(self, ni, mi):
+        """
+        Check whether cells ni and mi are connected by a link
+        :param ni: integer, index of one of the cells
+        :param mi: integer, index of the second cell
+        :return: bool
+        """
+        return (max(ni, mi), min(ni, mi)) in self.linkreg.slot
+
+    def getNewSlot(self, ni, mi):
+        """
+        Get the slot for the link between cells ni and mi, enlarge the link table if the registry ran out of slots
+        :param ni: integer, index of the cell at end 0 of the link
+        :param mi: integer, index of the cell at end 1 of the link
+        :return: integer, index of the slot
+        """
+        slot = self.linkreg.add(ni, mi)
+        if self.linkreg.maxlinks > self.maxlinks:
+            self.maxlinks = self.linkreg.maxlinks
+            resizeLinkTable(self, self.linkarrays, self.maxlinks)
+        return slot
 
     def addlink(self, ni, mi, t1=None, t2=None, d0=None, bend=1., twist=1., k=1.5, n=None, norm1=None, norm2=None):
         """
@@ -394,44 +1606,50 @@ class NodeConfiguration:
         :param norm2: numpy array of shape (3), the chosen normal vector at cell mi. If None: set to n
         :return:
         """
-        self.islink[ni, mi], self.islink[mi, ni] = True, True
-
-        if not self.saveram:
-            self.k[ni, mi], self.k[mi, ni] = k, k  # spring parameter
-            self.bend[mi, ni], self.bend[ni, mi] = bend, bend
-            self.twist[mi, ni], self.twist[ni, mi] = twist, twist
-
         newdX = self.nodesX[mi] - self.nodesX[ni]
         newd = scipy.linalg.norm(newdX)
         newe = newdX/newd
-        self.d[ni, mi], self.d[mi, ni] = newd, newd
-        self.e[ni, mi], self.e[mi, ni] = newe, -newe
 
         if d0 is None:
-            d0 = self.d[ni, mi]
-        self.d0[ni, mi], self.d0[mi, ni] = d0, d0  # equilibrium distance
+            d0 = newd
         # preferred directions
         RotMat1 = getRotMat(-self.nodesPhi[ni])
         RotMat2 = getRotMat(-self.nodesPhi[mi])
         if t1 is None:
-            self.t[ni, mi] = np.dot(RotMat1, self.e[ni, mi])
+            t1 = np.dot(RotMat1, newe)
         else:
-            self.t[ni, mi] = np.dot(RotMat1, getNormvec(t1))
+            t1 = np.dot(RotMat1, getNormvec(t1))
         if t2 is None:
-            self.t[mi, ni] = np.dot(RotMat2, self.e[mi, ni])
+            t2 = np.dot(RotMat2, -newe)
         else:
-            self.t[mi, ni] = np.dot(RotMat2, getNormvec(t2))
+            t2 = np.dot(RotMat2, getNormvec(t2))
         if n is None:
-            n, q = getNormtoo(np.cross(self.e[ni, mi], ez))  # n is perpendicular to e
+            n, q = getNormtoo(np.cross(newe, ez))  # n is perpendicular to e
             # n is perpendicular to z (l is in the x-y plane)
             if q < 1e-5:
-                n = getNormvec(np.cross(self.e[ni, mi], ex))  # e || ez   =>	n is perpendicular to x
+                n = getNormvec(np.cross(newe, ex))  # e || ez   =>	n is perpendicular to x
         if norm1 is None:
             norm1 = np.dot(RotMat1, n)
-        self.norm[ni, mi] = norm1
         if norm2 is None:
             norm2 = np.dot(RotMat2, n)
-        self.norm[mi, ni] = norm2
+
+        # end 0 of each link is at the node with the larger index
+        if ni < mi:
+            ni, mi, t1, t2, norm1, norm2, newe = mi, ni, t2, t1, norm2, norm1, -newe
+
+        slot = self.getNewSlot(ni, mi)
+
+        if not self.saveram:
+            self.k[slot] = k  # spring parameter
+            self.bend[slot] = bend
+            self.twist[slot] = twist
+
+        self.d[slot] = newd
+        self.e[slot] = newe
+        self.d0[slot] = d0  # equilibrium distance
+        self.t[slot, 0], self.t[slot, 1] = t1, t2
+        self.norm[slot, 0], self.norm[slot, 1] = norm1, norm2
+        self.linkversion += 1
 
     def removelink(self, ni, mi):
         """
@@ -440,55 +1658,62 @@ class NodeConfiguration:
         :param mi: integer, index of the second cell
         :return:
         """
-        self.islink[ni, mi], self.islink[mi, ni] = False, False
-        self.d[ni, mi], self.d[mi, ni] = 0, 0
-        self.e[ni, mi], self.e[mi, ni] = null, null
-        self.Flink[ni, mi], self.Flink[mi, ni], self.Mlink[ni, mi], self.Mlink[mi, ni] = null, null, null, null
-        self.Flink_tens[ni, mi], self.Flink_tens[mi, ni] = 0, 0
-        self.t[ni, mi], self.t[mi, ni], self.norm[ni, mi], self.norm[mi, ni] = null, null, null, null
-        self.d0[ni, mi], self.d0[mi, ni] = 0, 0
+        slot = self.linkreg.remove(max(ni, mi), min(ni, mi))
+        self.d[slot], self.e[slot] = 0, null
+        self.Flink[slot], self.Mlink[slot], self.Flink_tens[slot] = null, 0, 0
+        self.t[slot], self.norm[slot] = 0, 0
+        self.d0[slot] = 0
         if not self.saveram:
-            self.k[ni, mi], self.k[mi, ni] = 0, 0
-            self.bend[ni, mi], self.bend[mi, ni], self.twist[ni, mi], self.twist[mi, ni] = 0, 0, 0, 0
+            self.k[slot], self.bend[slot], self.twist[slot] = 0, 0, 0
+        self.linkversion += 1
 
-    def updateDists(self, X):
+    def updateDists(self, X, Nodeinds):
         """
         Calculate the distances and directions between nodes which are connected by links and save the information in
         self.d (distances) and self.e (normed directions)
         :param X: numpy array of shape (n), containing the positions for which the calculations should be performed
-        :return:
+        :param Nodeinds: link slots and indices of nodes at both link ends as returned by compactStuffINeed()
+        :return: compacted directions and distances, stored in self.ws as "E" and "D"
         """
-        inds0, inds1 = self.getLinkTuple()
-        dX = X[inds1] - X[inds0]
-        d = scipy.linalg.norm(dX, axis=1)
-        e = dX / d[..., None]
-        self.d[inds0, inds1], self.d[inds1, inds0] = d, d
-        self.e[inds0, inds1], self.e[inds1, inds0] = e, -e
+        slots, inds0, inds1 = Nodeinds
+        E, D = getLinkDirections(X, X, inds0, inds1, self.ws)
+        self.d[slots] = D
+        self.e[slots] = E
+        return E, D
 
     def compactStuffINeed(self):
         """
-        Extract the relevant information on existing links from large arrays containing information on all
-        hypothetically possible links
-        :return: compacted numpy arrays for self.t (nl, 3), self.norm (nl, 3), transposed version of self.norm (nl, 3),
-        self.bend (nl), self.twist (nl), self.k (nl), self.d0 (nl) and indices of nodes at ends of links (nl, 2).
+        Extract the relevant information on existing links from the link table. The result is cached until links are
+        added or removed (self.linkversion), if only the equilibrium lengths changed (self.d0version) the cached d0 is
+        updated in place.
+        :return: compacted numpy arrays for self.t (nl, 2, 3), self.norm (nl, 2, 3), self.bend (nl), self.twist (nl),
+        self.k (nl), self.d0 (nl) and tuple of link slots and indices of nodes at both link ends ((nl), (nl), (nl)).
         Parantheses indicate shapes of arrays, nl is the number of links
         """
-        nodeinds = np.where(self.islink == True)
-        nodelen = len(nodeinds[0])
-        t = self.t[nodeinds]
-        norm = self.norm[nodeinds]
-        normT = np.transpose(self.norm, axes=(1, 0, 2))[nodeinds]
+        self.compactcache = getCompact(self, self.compactcache, self.compactLinks)
+        return self.compactcache[2]
+
+    def compactLinks(self):
+        """
+        Gather the information on existing links from the link table, see compactStuffINeed()
+        :return: tuple in shape returned by compactStuffINeed()
+        """
+        slots = self.getSlots()
+        nodelen = len(slots)
+        nodeinds = (slots,) + self.getLinkTuple()
+        t = self.t[slots]
+        norm = self.norm[slots]
         if not self.saveram:
-            bend = self.bend[nodeinds]
-            twist = self.twist[nodeinds]
-            k = self.k[nodeinds]
+            bend = self.bend[slots]
+            twist = self.twist[slots]
+            k = self.k[slots]
         else:
             bend = self.bend * np.ones((nodelen,))
             twist = self.twist * np.ones((nodelen,))
             k = self.k * np.ones((nodelen,))
-        d0 = self.d0[nodeinds]
+        d0 = self.d0[slots]
 
-        return t, norm, normT, bend, twist, k, d0, nodeinds
+        return t, norm, bend, twist, k, d0, nodeinds
 
     def updateLinkForces2D(self, PHI, T, Bend, K, D0, Nodeinds):
         """
@@ -498,67 +1723,71 @@ class NodeConfiguration:
         :param Bend: bending rigidities
         :param K: Hookean constants
         :param D0: individual link equilibrium lengths
-        :param Nodeinds: link indices
-        :return:
-        """
-        E = self.e[Nodeinds]
-        D = self.d[Nodeinds]
-
-        # rotated version of t to fit current setup
-        TNow = np.einsum("ijk, ik -> ij", getRotMatArray(PHI[Nodeinds[0]]), T)
-
-        self.Mlink[Nodeinds] = Bend[..., None] * np.cross(TNow, E)  # Eq 3
-
-        M = self.Mlink + np.transpose(self.Mlink, axes=(1, 0, 2))
-        M = M[Nodeinds]
+        :param Nodeinds: link slots and indices of nodes at both link ends
+        :return: compacted forces on end 0 and torques on ends 0 and 1 of the links, views on buffers in self.ws
+        """
+        slots, inds0, inds1 = Nodeinds
+        nl = len(slots)
+        ws = self.ws
+        E, D = ws.get("E", nl, (3,)), ws.get("D", nl)  # as calculated by updateDists()
+        tmp, tmp3 = ws.get("tmp", nl), ws.get("tmp3", nl, (3,))
+
+        # rotations are set up once per node and gathered for the link ends
+        rot = self.getRotations(PHI)
+        rot0 = np.take(rot, inds0, axis=0, out=ws.get("rot0", nl, rot.shape[1:]), mode="clip")
+        rot1 = np.take(rot, inds1, axis=0, out=ws.get("rot1", nl, rot.shape[1:]), mode="clip")
+
+        # rotated version of t to fit current setup, Eq 3
+        M0 = getCrossArray(self.rotate(rot0, T[:, 0], out=tmp3, ws=ws), E, ws.get("M0", nl, (3,)), tmp)
+        M0 *= Bend[:, None]
+        M1 = getCrossArray(self.rotate(rot1, T[:, 1], out=tmp3, ws=ws), E, ws.get("M1", nl, (3,)), tmp)
+        M1 *= Bend[:, None]
+        np.negative(M1, out=M1)
+        self.Mlink[slots, 0], self.Mlink[slots, 1] = M0, M1
+
+        M = np.add(M0, M1, out=ws.get("M", nl, (3,)))
 
         # Eqs. 10, 13, 14, 15
-        self.Flink_tens[Nodeinds] = K * (D - D0)
-        self.Flink[Nodeinds] = self.Flink_tens[Nodeinds][..., None] * E + np.cross(M, E) / D[:, None]
+        Ftens = np.subtract(D, D0, out=ws.get("Ftens", nl))
+        Ftens *= K
+        F = getCrossArray(M, E, ws.get("F", nl, (3,)), tmp)
+        np.divide(F, D[:, None], out=F, where=D[:, None] > 1e-5)  # filter for division by 0
+        F += np.multiply(E, Ftens[:, None], out=tmp3)
+        self.Flink_tens[slots] = Ftens
+        self.Flink[slots] = F
+        return F, M0, M1
 
-    def updateLinkForces3D(self, PHI, T, Norm, NormT, Bend, Twist, K, D0, Nodeinds):
+    def updateLinkForces3D(self, PHI, T, Norm, Bend, Twist, K, D0, Nodeinds):
         """
         Update the forces exerted on the links for 3-d-simulations. Input is of shape created by compactStuffINeed()
         :param PHI: Orientation of tissue nodes
         :param T: tangent vectors at tissue cell surfaces
         :param Norm: normal vectors at tissue cell surfaces
-        :param NormT: re-ordered normal vectors
         :param Bend: bending rigidities
         :param Twist: twist rigidity
         :param K: Hookean constants
         :param D0: individual link equilibrium lengths
-        :param Nodeinds: link indices
-        :return:
+        :param Nodeinds: link slots and indices of nodes at both link ends
+        :return: compacted forces on end 0 and torques on ends 0 and 1 of the links, views on buffers in self.ws
         """
-        E = self.e[Nodeinds]
-        D = self.d[Nodeinds]
-        # NodesPhi = PHI[Nodeinds[0]]
-        # NodesPhiT = PHI[Nodeinds[1]]
-
-        rot = getRotMatArray(PHI[Nodeinds[0]])
-
-        # rotated version of Norm and NormT to fit current setup
-        NormNow = np.einsum("ijk, ik -> ij", rot, Norm)
-        NormTNow = np.einsum("ijk, ik -> ij", getRotMatArray(PHI[Nodeinds[1]]), NormT)
+        slots, inds0, inds1 = Nodeinds
+        nl = len(slots)
+        ws = self.ws
 
-        # rotated version of t to fit current setup
-        # TNow = np.einsum("ijk, ik -> ij", getRotMatArray(NodesPhi), T)
+        # rotations are set up once per node and gathered for the link ends
+        rot = self.getRotations(PHI)
+        rot0 = np.take(rot, inds0, axis=0, out=ws.get("rot0", nl, rot.shape[1:]), mode="clip")
+        rot1 = np.take(rot, inds1, axis=0, out=ws.get("rot1", nl, rot.shape[1:]), mode="clip")
 
-        # calculated new vector \bm{\tilde{n}}_{A, l}
-        NormTilde = getNormvec(NormNow - np.einsum("ij, ij -> i", NormNow, E)[:, None] * E)
-        NormTTilde = getNormvec(NormTNow - np.einsum("ij, ij -> i", NormTNow, E)[:, None] * E)
+        # directions and distances as calculated by updateDists()
+        F, M0, M1, Ftens = getLinkForces3D(rot0, rot1, ws.get("E", nl, (3,)), ws.get("D", nl), T[:, 0], T[:, 1],
+                                           Norm[:, 0], Norm[:, 1], Bend, Twist, K, D0, self.rotate, ws)
+        self.Mlink[slots, 0], self.Mlink[slots, 1] = M0, M1
+        self.Flink_tens[slots] = Ftens
+        self.Flink[slots] = F
+        return F, M0, M1
 
-        self.Mlink[Nodeinds] = Bend[..., None] * np.cross(np.einsum("ijk, ik -> ij", rot, T), E) + \
-                               Twist[..., None] * np.cross(NormTilde, NormTTilde)  # Eq 5
-
-        M = self.Mlink + np.transpose(self.Mlink, axes=(1, 0, 2))
-        M = M[Nodeinds]
-
-        # Eqs. 10, 13, 14, 15
-        self.Flink_tens[Nodeinds] = K * (D - D0)
-        self.Flink[Nodeinds] = self.Flink_tens[Nodeinds][..., None] * E + np.cross(M, E) / D[:, None]
-
-    def getForces(self, x, t, norm, normT, bend, twist, k, d0, nodeinds):
+    def getForces_numpy(self, x, t, norm, bend, twist, k, d0, nodeinds):
         """
         Calculate forces and torques on tissue nodes and tissue-tissue links. Input except for x in shape returned by
         compactStuffINeed()
@@ -566,25 +1795,100 @@ class NodeConfiguration:
         for which forces should be calculated
         :param t: tangent vectors at tissue cell surfaces
         :param norm: normal vectors at tissue cell surfaces
-        :param normT: re-ordered normal vectors
         :param bend: bending rigidities
         :param twist: twist rigidity
         :param k: Hookean constants
         :param d0: individual link equilibrium lengths
-        :param nodeinds: link indices
-        :return: numpy array of shape (3 * 2 * self.N) containing forces and torques on tissue nodes in form readable by
-        solve_ivp
+        :param nodeinds: link slots and indices of nodes at both link ends
+        :return: numpy array of shape (3 * 2 * self.N + 3 * self.Nsubs) containing forces and torques on tissue nodes
+        in form readable by solve_ivp. The array is a view on self.rhs and overwritten by the next call
         """
 
         # reshape X to form readable by class
         X = x.reshape(-1, 3)
         Phi = X[self.N:self.N2, :]
         X = X[:self.N, :]
-        self.updateDists(X)
-        self.updateLinkForces(Phi, t, norm, normT, bend, twist, k, d0, nodeinds)
-        self.Fnode = self.nodesum()
-        self.Mnode = np.sum(self.Mlink, axis=1)
-        return np.concatenate((self.Fnode, self.Mnode, self.gaps), axis=0).flatten()
+        self.updateDists(X, nodeinds)
+        F, M0, M1 = self.updateLinkForces(Phi, t, norm, bend, twist, k, d0, nodeinds)
+        slots, inds0, inds1 = nodeinds
+        self.Fnode[...] = self.nodesum(sumLinkVectors(self.N, inds0, inds1, F, -F))
+        self.Mnode[...] = sumLinkVectors(self.N, inds0, inds1, M0, M1)
+        return self.rhs.ravel()
+
+    def getForces_numba(self, x, t, norm, bend, twist, k, d0, nodeinds):
+        """
+        Calculate forces and torques on tissue nodes and tissue-tissue links like getForces_numpy(), but with the
+        compiled kernel forcekernels.nodeForces()
+        :param x: numpy array of shape (3 * 2 * self.N) with positions and orientations of tissue nodes
+        for which forces should be calculated
+        :param t: tangent vectors at tissue cell surfaces
+        :param norm: normal vectors at tissue cell surfaces
+        :param bend: bending rigidities
+        :param twist: twist rigidity
+        :param k: Hookean constants
+        :param d0: individual link equilibrium lengths
+        :param nodeinds: link slots and indices of nodes at both link ends
+        :return: numpy array of shape (3 * 2 * self.N + 3 * self.Nsubs) containing forces and torques on tissue nodes
+        in form readable by solve_ivp. The array is a view on self.rhs and overwritten by the next call
+        """
+        X = x.reshape(-1, 3)
+        slots, inds0, inds1 = nodeinds
+        nl = len(slots)
+        ws = self.ws
+        E, D, Flink, Ftens = ws.get("E", nl, (3,)), ws.get("D", nl), ws.get("F", nl, (3,)), ws.get("Ftens", nl)
+        Mlink = ws.get("Mlink", nl, (2, 3))
+        F = ws.get("Fnode", self.N, (3,))
+        forcekernels.nodeForces(X[:self.N], X[self.N:self.N2], t, norm, bend, twist, k, d0, inds0, inds1,
+                                self.dims == 3, E, D, Flink, Ftens, Mlink, F, self.Mnode)
+        self.e[slots], self.d[slots], self.Flink_tens[slots], self.Flink[slots], self.Mlink[slots] = \
+            E, D, Ftens, Flink, Mlink
+        self.Fnode[...] = self.nodesum(F)
+        return self.rhs.ravel()
+
+    def getJacobian(self, x, t, norm, bend, twist, k, d0, nodeinds):
+        """
+        Calculate the Jacobian of getForces() with respect to positions and orientations of the nodes. Input except for
+        x in shape returned by compactStuffINeed(). Forces from anchors and external forces don't depend on the state
+        and don't contribute
+        :param x: numpy array of shape (3 * 2 * self.N + 3 * self.Nsubs) with positions and orientations of tissue nodes
+        :param t: tangent vectors at tissue cell surfaces
+        :param norm: normal vectors at tissue cell surfaces
+        :param bend: bending rigidities
+        :param twist: twist rigidity
+        :param k: Hookean constants
+        :param d0: individual link equilibrium lengths
+        :param nodeinds: link slots and indices of nodes at both link ends
+        :return: scipy.sparse.csr_matrix of shape (len(x), len(x)), readable by solve_ivp as jac for methods "BDF" and
+        "Radau", or by getBandedJacobian() for method "LSODA"
+        """
+        X = x.reshape(-1, 3)
+        Phi = X[self.N:self.N2]
+        slots, inds0, inds1 = nodeinds
+        E, D = getLinkDirections(X[:self.N], X[:self.N], inds0, inds1, Workspace())
+        if self.dims == 2:
+            twist = np.zeros_like(bend)     # no twist torques in 2-d-simulations
+        blocks = getLinkJacobian3D(Phi[inds0], Phi[inds1], E, D, t[:, 0], t[:, 1], norm[:, 0], norm[:, 1], bend, twist,
+                                   k, d0)
+        return assembleJacobian(self.N, len(X), blocks, inds0, inds1)
+
+    def getJacSparsity(self):
+        """
+        Get the sparsity structure of getJacobian() and the grouping of its columns, see getJacSparsity(). The result is
+        cached until links are added or removed (self.linkversion)
+        :return: tuple (structure, groups) readable by solve_ivp as jac_sparsity
+        """
+        if self.sparsitycache is None or self.sparsitycache[0] != self.linkversion:
+            slots, inds0, inds1 = self.compactStuffINeed()[-1]
+            self.sparsitycache = (self.linkversion, getJacSparsity(self.N, len(self.rhs), inds0, inds1))
+        return self.sparsitycache[1]
+
+    def getSlots(self):
+        """
+        Get the slots of all existing links in the link table. The returned array is a view on the link registry and
+        only valid until the next link is added or removed.
+        :return: numpy array of shape (nl), where nl is the number of links
+        """
+        return self.linkreg.slots[:self.linkreg.nlinks]
 
     def getLinkList(self):
         """
@@ -592,18 +1896,29 @@ class NodeConfiguration:
         :return: numpy array of shape (nl, 2) where nl is the number of links. All links along axis 0, the indices of
         the two nodes connected by the link along axis 1, where the node with the larger index is the first entry
         """
-        allLinks0, allLinks1 = np.where(self.islink == True)
-        return np.array([[allLinks0[i], allLinks1[i]] for i in range(len(allLinks0)) if allLinks0[i] > allLinks1[i]])
+        return self.linkreg.links[:self.linkreg.nlinks].copy()
 
     def getLinkTuple(self):
         """
-        Get a tuple of the indices of the nodes at the end of each link
+        Get a tuple of the indices of the nodes at the end of each link. The returned arrays are views on the link
+        registry and only valid until the next link is added or removed.
         :return: tuple (a, b) of numpy arrays of shape (nl), where nl is the number of links. a[i] and b[i] are the
         nodes at the two ends of the i-th link.
         """
-        allLinks0, allLinks1 = np.where(self.islink == True)
-        inds = np.where(allLinks0 > allLinks1)
-        return allLinks0[inds], allLinks1[inds]
+        links = self.linkreg.links[:self.linkreg.nlinks]
+        return links[:, 0], links[:, 1]
+
+    def getDirectedLinks(self):
+        """
+        Get the slots and ends of all links, ordered like the node pairs (i, j) and (j, i) of an N x N adjacency
+        matrix in row-major order. Used to keep the format of files holding per-link data.
+        :return: tuple (slots, ends) of numpy arrays of shape (2 * nl), where nl is the number of links
+        """
+        slots = self.getSlots()
+        inds0, inds1 = self.getLinkTuple()
+        order = np.lexsort((np.concatenate((inds1, inds0)), np.concatenate((inds0, inds1))))
+        ends = np.repeat([0, 1], len(slots))
+        return np.concatenate((slots, slots))[order], ends[order]
 
     def update_d0(self, dt, force=True):
         """
@@ -613,28 +1928,30 @@ class NodeConfiguration:
         included.
         :return:
         """
-        nodeinds = np.where(self.islink == True)
-        myd0 = self.d0[nodeinds]
+        slots = self.getSlots()
+        myd0 = self.d0[slots]
 
-        temprandom = npr.random((self.randomlength,))
-        self.randomsummand[self.lowers], self.randomsummand.T[self.lowers] = temprandom, temprandom
+        temprandom = npr.random((len(slots),))
 
         if force:
             # lognorm fitted to match behavior for d0min==0.8, d0max==2.0 and d0_0==1.0
-            myd0 += self.c1 * ((self.Flink_tens[nodeinds]) - self.F_contr) * dt * \
-                    0.69 * lognorm.pdf(self.d[nodeinds], .7, loc=.7, scale=.5)
+            myd0 += self.c1 * ((self.Flink_tens[slots]) - self.F_contr) * dt * \
+                    0.69 * lognorm.pdf(self.d[slots], .7, loc=.7, scale=.5)
 
-        myd0 += self.c2 * (self.d0_0 - myd0) * dt + self.c3 * sqrt(dt) * (2 * self.randomsummand[nodeinds] - 1)
+        myd0 += self.c2 * (self.d0_0 - myd0) * dt + self.c3 * sqrt(dt) * (2 * temprandom - 1)
 
-        self.d0[nodeinds] = myd0
+        self.d0[slots] = myd0
+        self.d0version += 1
 
 
 class SubsConfiguration:
-    def __init__(self, num_cells, num_subs, d0_0, p_add, p_del, c1, c2, c3, F_contr, plasticity):
+    def __init__(self, num_cells, num_subs, d0_0, p_add, p_del, c1, c2, c3, F_contr, plasticity, orientation="matrix",
+                 backend="numpy"):
         """
         Class containing data for all substrate nodes and substrate-tissue links. Is automatically initialized by class
         CellMech if CellMech.issubs is not False. Substrate nodes behave like tissue nodes, but can only form links
-        with other tissue nodes. They have three rotational but no translational degrees of freedom.
+        with other tissue nodes. They have three rotational but no translational degrees of freedom. Links are kept in
+        a link table like in class NodeConfiguration.
 
         :param num_cells: integer, the number of tissue cells
         :param num_subs:  integer, the number of substrate cells
@@ -648,7 +1965,35 @@ class SubsConfiguration:
         :param F_contr: target value for contractile force
         :param plasticity: Either None if Hookean, bend and twist constants are set individually per link, or tuple
             containing global values for the three constants in shape (k1, k2, k3) = (bend, twist, Hooke)
-        """
+        :param orientation: "matrix" or "quaternion", the representation used to rotate link vectors with the node
+            orientations when calculating forces. Node orientations are always stored as rotation vectors. With the
+            numpy backend "quaternion" is slower than "matrix", it is the numpy counterpart of the numba kernels
+        :param backend: "numpy" or "numba", whether forces are calculated with numpy or with the compiled kernels in
+            forcekernels.py (always using quaternions). Falls back to "numpy" if numba is not available
+        """
+        if backend == "numba" and forcekernels is None:
+            print "Numba not available, using numpy force backend."
+            backend = "numpy"
+        if backend == "numpy":
+            self.getForces = lambda x, tcell, tsubs, normcell, normsubs, bend, twist, k, d0, nodeinds: \
+                self.getForces_numpy(x, tcell, tsubs, normcell, normsubs, bend, twist, k, d0, nodeinds)
+        elif backend == "numba":
+            self.getForces = lambda x, tcell, tsubs, normcell, normsubs, bend, twist, k, d0, nodeinds: \
+                self.getForces_numba(x, tcell, tsubs, normcell, normsubs, bend, twist, k, d0, nodeinds)
+        else:
+            print "Oops! Unknown force backend."
+            sys.exit()
+
+        if orientation == "matrix":
+            self.getRotations = getRotMatArray
+            self.rotate = rotateMatArray
+        elif orientation == "quaternion":
+            self.getRotations = getQuatArray
+            self.rotate = rotateQuatArray
+        else:
+            print "Oops! Unknown orientation representation."
+            sys.exit()
+
         # variables to store cell number and cell positions and angles
         self.N = num_cells
         self.N2 = 2 * self.N
@@ -658,35 +2003,47 @@ class SubsConfiguration:
         self.nodesX = np.zeros((self.Nsubs, 3))              # r of subs nodes
         self.nodesPhi = np.zeros((self.Nsubs, 3))            # phi of subs nodes
         self.Fnode = np.zeros((self.Nsubs, 3))               # force exerted on subs nodes
-        self.Mnode = np.zeros((self.Nsubs, 3))               # torque exerted on subs nodes
+        self.rhs = np.zeros((self.N2 + self.Nsubs, 3))       # forces and torques on cell nodes, torques on subs nodes
+        self.Mnode = self.rhs[self.N2:]                      # torque exerted on subs nodes
 
         # description of links
-        # islink[i, j] is True if nodes i and j are connected via link
-        self.islink = np.full((self.N, self.Nsubs), False)   # Describes link at cell node [0] leading to subs node [1]
-
-        self.e = np.zeros((self.N, self.Nsubs, 3))           # direction from cell node to subs node
-        self.d = np.zeros((self.N, self.Nsubs))              # distance between nodes (a.k.a. "actual distance")
+        # linkreg keeps track of the slot of the link connecting cell node i (end 0) and subs node j (end 1)
+        self.linkreg = LinkRegistry(max(self.N, 8))
+        self.maxlinks = self.linkreg.maxlinks
+
+        self.e = np.zeros((self.maxlinks, 3))           # direction from cell node to subs node
+        self.d = np.zeros((self.maxlinks,))             # distance between nodes (a.k.a. "actual distance")
+        self.linkarrays = ["e", "d", "d0", "tcell", "tsubs", "normcell", "normsubs", "Mcelllink", "Msubslink", "Flink",
+                           "Flink_tens"]
         if plasticity is None:
-            self.k = np.zeros((self.N, self.Nsubs))              # spring constant between nodes
-            self.bend = np.zeros((self.N, self.Nsubs))           # bending rigidity
-            self.twist = np.zeros((self.N, self.Nsubs))          # torsion spring constant
+            self.k = np.zeros((self.maxlinks,))              # spring constant between nodes
+            self.bend = np.zeros((self.maxlinks,))           # bending rigidity
+            self.twist = np.zeros((self.maxlinks,))          # torsion spring constant
             self.saveram = False
+            self.linkarrays += ["k", "bend", "twist"]
         else:
             self.bend = plasticity[0]
             self.twist = plasticity[1]
             self.k = plasticity[2]
             self.saveram = True
-        self.d0 = np.zeros((self.N, self.Nsubs))             # equilibrium distance between nodes
-        self.d0_0 = d0_0                                     # global target equilibrium link length
-        self.tcell = np.zeros((self.N, self.Nsubs, 3))       # tangent vector of link at cell node
-        self.tsubs = np.zeros((self.N, self.Nsubs, 3))       # tangent vector of link at subs node
-        self.normcell = np.zeros((self.N, self.Nsubs, 3))    # normal vector of link at cell node
-        self.normsubs = np.zeros((self.N, self.Nsubs, 3))    # normal vector of link at subs node
-        self.Mcelllink = np.zeros((self.N, self.Nsubs, 3))   # Torsion from link on cell node
-        self.Msubslink = np.zeros((self.N, self.Nsubs, 3))   # Torsion from link on subs node
-        self.Flink = np.zeros((self.N, self.Nsubs, 3))       # Force from link on cell node
-        self.Flink_tens = np.zeros((self.N, self.Nsubs))     # Tensile component of Flink
-        self.F_contr = F_contr                               # target value for contractile force
+        self.d0 = np.zeros((self.maxlinks,))            # equilibrium distance between nodes
+        self.d0_0 = d0_0                                # global target equilibrium link length
+        self.tcell = np.zeros((self.maxlinks, 3))       # tangent vector of link at cell node
+        self.tsubs = np.zeros((self.maxlinks, 3))       # tangent vector of link at subs node
+        self.normcell = np.zeros((self.maxlinks, 3))    # normal vector of link at cell node
+        self.normsubs = np.zeros((self.maxlinks, 3))    # normal vector of link at subs node
+        self.Mcelllink = np.zeros((self.maxlinks, 3))   # Torsion from link on cell node
+        self.Msubslink = np.zeros((self.maxlinks, 3))   # Torsion from link on subs node
+        self.Flink = np.zeros((self.maxlinks, 3))       # Force from link on cell node
+        self.Flink_tens = np.zeros((self.maxlinks,))    # Tensile component of Flink
+        self.F_contr = F_contr                          # target value for contractile force
+
+        # versions of the link data, compacted link data is cached until they change
+        self.linkversion = 0    # incremented when links are added or removed or their t, norm, k, bend, twist change
+        self.d0version = 0      # incremented when equilibrium lengths change
+        self.compactcache = None
+        self.sparsitycache = None
+        self.ws = Workspace()   # buffers for force calculations
 
         self.p_add = p_add
         self.p_del = p_del
@@ -699,6 +2056,29 @@ class SubsConfiguration:
         self.fnodesnap = []
         self.flinksnap = []
 
+    def haslink(self, ni, mi):
+        """
+        Check whether tissue cell ni and substrate cell mi are connected by a link
+        :param ni: integer, index of the tissue cell
+        :param mi: integer, index of the substrate cell
+        :return: bool
+        """
+        return (ni, mi) in self.linkreg.slot
+
+    def getNewSlot(self, ni, mi):
+        """
+        Get the slot for the link between tissue cell ni and substrate cell mi, enlarge the link table if the
+        registry ran out of slots
+        :param ni: integer, index of the tissue cell
+        :param mi: integer, index of the substrate cell
+        :return: integer, index of the slot
+        """
+        slot = self.linkreg.add(ni, mi)
+        if self.linkreg.maxlinks > self.maxlinks:
+            self.maxlinks = self.linkreg.maxlinks
+            resizeLinkTable(self, self.linkarrays, self.maxlinks)
+        return slot
+
     def addlink(self, ni, mi, cellx, cellphi, t1=None, d0=None, bend=1., twist=1., k=1.5,
                 n=None, norm1=None, norm2=None):
         """
@@ -718,40 +2098,40 @@ class SubsConfiguration:
         :param norm2: numpy array of shape (3), the chosen normal vector at substrate cell mi. If None: set to n
         :return:
         """
-
-        self.islink[ni, mi] = True
+        slot = self.getNewSlot(ni, mi)
 
         if not self.saveram:
-            self.k[ni, mi] = k  # spring parameter
-            self.bend[ni, mi] = bend
-            self.twist[ni, mi] = twist
+            self.k[slot] = k  # spring parameter
+            self.bend[slot] = bend
+            self.twist[slot] = twist
 
         newdX = self.nodesX[mi] - cellx
         newd = scipy.linalg.norm(newdX)
-        self.d[ni, mi] = newd
-        self.e[ni, mi] = newdX / newd
+        self.d[slot] = newd
+        self.e[slot] = newdX / newd
 
         if d0 is None:
-            d0 = self.d[ni, mi]
-        self.d0[ni, mi] = d0  # equilibrium distance
+            d0 = self.d[slot]
+        self.d0[slot] = d0  # equilibrium distance
         RotMat1 = getRotMat(-cellphi)
         if t1 is None:
-            self.tcell[ni, mi] = np.dot(RotMat1, self.e[ni, mi])
-            self.tsubs[ni, mi] = -self.e[ni, mi]
+            self.tcell[slot] = np.dot(RotMat1, self.e[slot])
+            self.tsubs[slot] = -self.e[slot]
         else:
-            self.tcell[ni, mi] = np.dot(RotMat1, getNormvec(t1))
-            self.tsubs[ni, mi] = getNormvec(t1)
+            self.tcell[slot] = np.dot(RotMat1, getNormvec(t1))
+            self.tsubs[slot] = getNormvec(t1)
         if n is None:
-            n, q = getNormtoo(np.cross(self.e[ni, mi], ez))  # n is perpendicular to e
+            n, q = getNormtoo(np.cross(self.e[slot], ez))  # n is perpendicular to e
             # n is perpendicular to z (l is in the x-y plane)
             if q < 1e-5:
-                n = getNormvec(np.cross(self.e[ni, mi], ex))  # e || ez   =>	n is perpendicular to x
+                n = getNormvec(np.cross(self.e[slot], ex))  # e || ez   =>	n is perpendicular to x
         if norm1 is None:
             norm1 = np.dot(RotMat1, n)
         if norm2 is None:
             norm2 = n
-        self.normcell[ni, mi] = norm1
-        self.normsubs[ni, mi] = norm2
+        self.normcell[slot] = norm1
+        self.normsubs[slot] = norm2
+        self.linkversion += 1
 
     def removelink(self, ni, mi):
         """
@@ -760,54 +2140,66 @@ class SubsConfiguration:
         :param mi: integer, index of the second cell
         :return:
         """
-        self.islink[ni, mi] = False
-        self.Flink[ni, mi], self.Flink_tens[ni, mi] = null, 0
-        self.e[ni, mi], self.d[ni, mi] = null, 0
-        self.Mcelllink[ni, mi], self.Msubslink[ni, mi] = null, null
-        self.tcell[ni, mi], self.tsubs[ni, mi], self.normcell[ni, mi], self.normsubs[ni, mi] = null, null, null, null
-        self.d0[ni, mi] = 0
+        slot = self.linkreg.remove(ni, mi)
+        self.Flink[slot], self.Flink_tens[slot] = null, 0
+        self.e[slot], self.d[slot] = null, 0
+        self.Mcelllink[slot], self.Msubslink[slot] = null, null
+        self.tcell[slot], self.tsubs[slot], self.normcell[slot], self.normsubs[slot] = null, null, null, null
+        self.d0[slot] = 0
         if not self.saveram:
-            self.k[ni, mi] = 0
-            self.bend[ni, mi], self.twist[ni, mi] = 0, 0
+            self.k[slot] = 0
+            self.bend[slot], self.twist[slot] = 0, 0
+        self.linkversion += 1
 
-    def updateDists(self, X):
+    def updateDists(self, X, Nodeinds):
         """
         Calculate the distances and directions between nodes which are connected by links and save the information in
         self.d (distances) and self.e (normed directions)
         :param X: numpy array of shape (n), containing the positions of the tissue nodes
         for which the calculations should be performed
-        :return:
+        :param Nodeinds: link slots and indices of tissue and substrate nodes as returned by compactStuffINeed()
+        :return: compacted directions and distances, stored in self.ws as "E" and "D"
         """
-        inds0, inds1 = self.getLinkTuple()
-        dX = self.nodesX[inds1] - X[inds0]
-        d = scipy.linalg.norm(dX, axis=1)
-        self.d[inds0, inds1] = d
-        self.e[inds0, inds1] = dX / d[..., None]
+        slots, inds0, inds1 = Nodeinds
+        E, D = getLinkDirections(X, self.nodesX, inds0, inds1, self.ws)
+        self.d[slots] = D
+        self.e[slots] = E
+        return E, D
 
     def compactStuffINeed(self):
         """
-        Extract the relevant information on existing links from large arrays containing information on all
-        hypothetically possible links
+        Extract the relevant information on existing links from the link table. The result is cached until links are
+        added or removed (self.linkversion), if only the equilibrium lengths changed (self.d0version) the cached d0 is
+        updated in place.
         :return: compacted numpy arrays for self.tcell (nl, 3), self.tsubs, self.normcell (nl, 3),
         self.normsubs (nl, 3), self.bend (nl), self.twist (nl), self.k (nl), self.d0 (nl)
-        and indices of nodes at ends of links (nl, 2).
+        and tuple of link slots and indices of tissue and substrate nodes ((nl), (nl), (nl)).
         Parantheses indicate shapes of arrays, nl is the number of links
         """
-        nodeinds = np.where(self.islink == True)
-        nodelen = len(nodeinds[0])
-        tcell = self.tcell[nodeinds]
-        tsubs = self.tsubs[nodeinds]
-        normcell = self.normcell[nodeinds]
-        normsubs = self.normsubs[nodeinds]
+        self.compactcache = getCompact(self, self.compactcache, self.compactLinks)
+        return self.compactcache[2]
+
+    def compactLinks(self):
+        """
+        Gather the information on existing links from the link table, see compactStuffINeed()
+        :return: tuple in shape returned by compactStuffINeed()
+        """
+        slots = self.getSlots()
+        nodelen = len(slots)
+        nodeinds = (slots,) + self.getLinkTuple()
+        tcell = self.tcell[slots]
+        tsubs = self.tsubs[slots]
+        normcell = self.normcell[slots]
+        normsubs = self.normsubs[slots]
         if not self.saveram:
-            bend = self.bend[nodeinds]
-            twist = self.twist[nodeinds]
-            k = self.k[nodeinds]
+            bend = self.bend[slots]
+            twist = self.twist[slots]
+            k = self.k[slots]
         else:
             bend = self.bend * np.ones((nodelen,))
             twist = self.twist * np.ones((nodelen,))
             k = self.k * np.ones((nodelen,))
-        d0 = self.d0[nodeinds]
+        d0 = self.d0[slots]
 
         return tcell, tsubs, normcell, normsubs, bend, twist, k, d0, nodeinds
 
@@ -824,44 +2216,29 @@ class SubsConfiguration:
         :param Twist: twist rigidity
         :param K: Hookean constants
         :param D0: individual link equilibrium lengths
-        :param Nodeinds: link indices
-        :return:
-        """
-
-        E = self.e[Nodeinds]
-        D = self.d[Nodeinds]
-        # NodesPhiCell = PHI[Nodeinds[0]]
-        # NodesPhiSubs = PHIsubs[Nodeinds[1]]
-
-        rotCell = getRotMatArray(PHI[Nodeinds[0]])
-        rotSubs = getRotMatArray(PHIsubs[Nodeinds[1]])
-
-        # rotated version of Norm and NormT to fit current setup
-        NormCellNow = np.einsum("ijk, ik -> ij", rotCell, NormCell)
-        NormSubsNow = np.einsum("ijk, ik -> ij", rotSubs, NormSubs)
-
-        # rotated version of t to fit current setup
-        # TCellNow = np.einsum("ijk, ik -> ij", rotCell, TCell)
-        # TSubsNow = np.einsum("ijk, ik -> ij", rotSubs, TSubs)
-
-        # calculated new vector \bm{\tilde{n}}_{A, l}
-        NormCellTilde = getNormvec(NormCellNow - np.einsum("ij, ij -> i", NormCellNow, E)[:, None] * E)
-        NormSubsTilde = getNormvec(NormSubsNow - np.einsum("ij, ij -> i", NormSubsNow, -E)[:, None] * (-E))
-
-        self.Mcelllink[Nodeinds] = Bend[..., None] * np.cross(np.einsum("ijk, ik -> ij", rotCell, TCell), E) + \
-                                   Twist[..., None] * np.cross(NormCellTilde, NormSubsTilde)  # Eq 5 for cells
-
-        self.Msubslink[Nodeinds] = Bend[..., None] * np.cross(np.einsum("ijk, ik -> ij", rotSubs, TSubs), -E) + \
-                                   Twist[..., None] * np.cross(NormSubsTilde, NormCellTilde)  # Eq 5 for substrate
-
-        M = self.Mcelllink + self.Msubslink
-        M = M[Nodeinds]
-
-        # Eqs. 10, 13, 14, 15
-        self.Flink_tens[Nodeinds] = (K * (D - D0))
-        self.Flink[Nodeinds] = self.Flink_tens[Nodeinds][..., None] * E + np.cross(M, E) / D[:, None]
-
-    def getForces(self, x, tcell, tsubs, normcell, normsubs, bend, twist, k, d0, nodeinds):
+        :param Nodeinds: link slots and indices of tissue and substrate nodes
+        :return: compacted link forces and torques on the tissue and substrate ends of the links, views on buffers in
+        self.ws
+        """
+        slots, inds0, inds1 = Nodeinds
+        nl = len(slots)
+        ws = self.ws
+
+        # rotations are set up once per node and gathered for the link ends
+        rot = self.getRotations(PHI)
+        rotCell = np.take(rot, inds0, axis=0, out=ws.get("rotCell", nl, rot.shape[1:]), mode="clip")
+        rot = self.getRotations(PHIsubs)
+        rotSubs = np.take(rot, inds1, axis=0, out=ws.get("rotSubs", nl, rot.shape[1:]), mode="clip")
+
+        # directions and distances as calculated by updateDists(), Eq 5 for cells (end 0) and substrate (end 1)
+        F, Mcell, Msubs, Ftens = getLinkForces3D(rotCell, rotSubs, ws.get("E", nl, (3,)), ws.get("D", nl), TCell, TSubs,
+                                                 NormCell, NormSubs, Bend, Twist, K, D0, self.rotate, ws)
+        self.Mcelllink[slots], self.Msubslink[slots] = Mcell, Msubs
+        self.Flink_tens[slots] = Ftens
+        self.Flink[slots] = F
+        return F, Mcell, Msubs
+
+    def getForces_numpy(self, x, tcell, tsubs, normcell, normsubs, bend, twist, k, d0, nodeinds):
         """
         Calculate forces and torques on tissue nodes from tissue-substrate links. Input except for x in shape returned
         by compactStuffINeed()
@@ -875,38 +2252,129 @@ class SubsConfiguration:
         :param twist: twist rigidity
         :param k: Hookean constants
         :param d0: individual link equilibrium lengths
-        :param nodeinds: link indices
+        :param nodeinds: link slots and indices of tissue and substrate nodes
         :return: numpy array of shape (3 * 2 * self.N + 3 * self.Nsubs) containing forces and torques on tissue nodes
-        and torques on substrate nodes in form readable by solve_ivp
+        and torques on substrate nodes in form readable by solve_ivp. The array is a view on self.rhs and overwritten
+        by the next call
         """
         # reshape X to form readable by class
         X = x.reshape(-1, 3)
         Phi = X[self.N:self.N2, :]
         Phisubs = X[self.N2:, :]
         X = X[:self.N, :]
-        self.updateDists(X)
-        self.updateLinkForces(Phi, Phisubs, tcell, tsubs, normcell, normsubs, bend, twist, k, d0, nodeinds)
-        self.Fnode = np.sum(self.Flink, axis=0)
-        self.Mnode = np.sum(self.Msubslink, axis=0)
-        return np.concatenate((np.sum(self.Flink, axis=1), np.sum(self.Mcelllink, axis=1), self.Mnode),
-                              axis=0).flatten()
+        self.updateDists(X, nodeinds)
+        F, Mcell, Msubs = self.updateLinkForces(Phi, Phisubs, tcell, tsubs, normcell, normsubs, bend, twist, k, d0,
+                                                nodeinds)
+        slots, inds0, inds1 = nodeinds
+        self.Fnode[...] = sumOnNodes(self.Nsubs, inds1, F)
+        self.Mnode[...] = sumOnNodes(self.Nsubs, inds1, Msubs)
+        self.rhs[:self.N] = sumOnNodes(self.N, inds0, F)
+        self.rhs[self.N:self.N2] = sumOnNodes(self.N, inds0, Mcell)
+        return self.rhs.ravel()
+
+    def getForces_numba(self, x, tcell, tsubs, normcell, normsubs, bend, twist, k, d0, nodeinds):
+        """
+        Calculate forces and torques on tissue nodes from tissue-substrate links like getForces_numpy(), but with the
+        compiled kernel forcekernels.subsForces()
+        :param x: numpy array of shape (3 * 2 * self.N + 3 * self.Nsubs) with positions and orientations of tissue
+        nodes and orientations of substrate nodes
+        :param tcell: tangent vectors at tissue cell surfaces
+        :param tsubs: tangent vectors at substrate cell surfaces
+        :param normcell: normal vectors at tissue cell surfaces
+        :param normsubs: normal vectors at substrate cell surfaces
+        :param bend: bending rigidities
+        :param twist: twist rigidity
+        :param k: Hookean constants
+        :param d0: individual link equilibrium lengths
+        :param nodeinds: link slots and indices of tissue and substrate nodes
+        :return: numpy array of shape (3 * 2 * self.N + 3 * self.Nsubs) containing forces and torques on tissue nodes
+        and torques on substrate nodes in form readable by solve_ivp. The array is a view on self.rhs and overwritten
+        by the next call
+        """
+        X = x.reshape(-1, 3)
+        slots, inds0, inds1 = nodeinds
+        nl = len(slots)
+        ws = self.ws
+        E, D, Flink, Ftens = ws.get("E", nl, (3,)), ws.get("D", nl), ws.get("F", nl, (3,)), ws.get("Ftens", nl)
+        Mcelllink, Msubslink = ws.get("Mcell", nl, (3,)), ws.get("Msubs", nl, (3,))
+        forcekernels.subsForces(X[:self.N], self.nodesX, X[self.N:self.N2], X[self.N2:], tcell, tsubs, normcell,
+                                normsubs, bend, twist, k, d0, inds0, inds1, E, D, Flink, Ftens, Mcelllink, Msubslink,
+                                self.rhs[:self.N], self.rhs[self.N:self.N2], self.Fnode, self.Mnode)
+        self.e[slots], self.d[slots], self.Flink_tens[slots], self.Flink[slots] = E, D, Ftens, Flink
+        self.Mcelllink[slots], self.Msubslink[slots] = Mcelllink, Msubslink
+        return self.rhs.ravel()
+
+    def getJacobian(self, x, tcell, tsubs, normcell, normsubs, bend, twist, k, d0, nodeinds):
+        """
+        Calculate the Jacobian of getForces() with respect to positions and orientations of the nodes. Input except for
+        x in shape returned by compactStuffINeed()
+        :param x: numpy array of shape (3 * 2 * self.N + 3 * self.Nsubs) with positions and orientations of tissue
+        nodes and orientations of substrate nodes
+        :param tcell: tangent vectors at tissue cell surfaces
+        :param tsubs: tangent vectors at substrate cell surfaces
+        :param normcell: normal vectors at tissue cell surfaces
+        :param normsubs: normal vectors at substrate cell surfaces
+        :param bend: bending rigidities
+        :param twist: twist rigidity
+        :param k: Hookean constants
+        :param d0: individual link equilibrium lengths
+        :param nodeinds: link slots and indices of tissue and substrate nodes
+        :return: scipy.sparse.csr_matrix of shape (len(x), len(x)), readable by solve_ivp as jac for methods "BDF" and
+        "Radau", or by getBandedJacobian() for method "LSODA"
+        """
+        X = x.reshape(-1, 3)
+        Phi = X[self.N:]    # orientations of tissue and substrate nodes, substrate node j at N + j
+        slots, inds0, inds1 = nodeinds
+        E, D = getLinkDirections(X[:self.N], self.nodesX, inds0, inds1, Workspace())
+        blocks = getLinkJacobian3D(Phi[inds0], Phi[self.N + inds1], E, D, tcell, tsubs, normcell, normsubs, bend, twist,
+                                   k, d0)
+        return assembleJacobian(self.N, len(X), blocks, inds0, self.N + inds1)
+
+    def getJacSparsity(self):
+        """
+        Get the sparsity structure of getJacobian() and the grouping of its columns, see getJacSparsity(). The result is
+        cached until links are added or removed (self.linkversion)
+        :return: tuple (structure, groups) readable by solve_ivp as jac_sparsity
+        """
+        if self.sparsitycache is None or self.sparsitycache[0] != self.linkversion:
+            slots, inds0, inds1 = self.compactStuffINeed()[-1]
+            self.sparsitycache = (self.linkversion, getJacSparsity(self.N, len(self.rhs), inds0, self.N + inds1))
+        return self.sparsitycache[1]
+
+    def getSlots(self):
+        """
+        Get the slots of all existing links in the link table. The returned array is a view on the link registry and
+        only valid until the next link is added or removed.
+        :return: numpy array of shape (nl), where nl is the number of links
+        """
+        return self.linkreg.slots[:self.linkreg.nlinks]
+
+    def getOrderedSlots(self):
+        """
+        Get the slots of all existing links, ordered like the node pairs (i, j) of an N x Nsubs adjacency matrix in
+        row-major order. Used to keep the format of files holding per-link data.
+        :return: numpy array of shape (nl), where nl is the number of links
+        """
+        inds0, inds1 = self.getLinkTuple()
+        return self.getSlots()[np.lexsort((inds1, inds0))]
 
     def getLinkList(self):
         """
         Get an array of the indices of the nodes at each end of each link
         :return: numpy array of shape (nl, 2) where nl is the number of links. All links along axis 0, the indices of
-        the two nodes connected by the link along axis 1, where the node with the larger index is the first entry
+        the tissue node and the substrate node connected by the link along axis 1
         """
-        allLinks0, allLinks1 = np.where(self.islink == True)
-        return np.array([[allLinks0[i], allLinks1[i]] for i in range(len(allLinks0))])
+        return self.linkreg.links[:self.linkreg.nlinks].copy()
 
     def getLinkTuple(self):
         """
-        Get a tuple of the indices of the nodes at the end of each link
+        Get a tuple of the indices of the nodes at the end of each link. The returned arrays are views on the link
+        registry and only valid until the next link is added or removed.
         :return: tuple (a, b) of numpy arrays of shape (nl), where nl is the number of links. a[i] and b[i] are the
         nodes at the two ends of the i-th link.
         """
-        return np.where(self.islink == True)
+        links = self.linkreg.links[:self.linkreg.nlinks]
+        return links[:, 0], links[:, 1]
 
     def update_d0(self, dt, force=True):
         """
@@ -916,25 +2384,209 @@ class SubsConfiguration:
         included.
         :return:
         """
-        nodeinds = np.where(self.islink == True)
-        myd0 = self.d0[nodeinds]
+        slots = self.getSlots()
+        myd0 = self.d0[slots]
 
-        subsrandom = npr.random(len(nodeinds[0]))
+        subsrandom = npr.random(len(slots))
 
         if force:
             # lognorm fitted to match behavior for d0min==0.8, d0max==2.0 and d0_0==1.0
-            myd0 += self.c1 * ((self.Flink_tens[nodeinds]) - self.F_contr) * dt *\
-                    0.69 * lognorm.pdf(self.d[nodeinds], .7, loc=.7, scale=.5)
+            myd0 += self.c1 * ((self.Flink_tens[slots]) - self.F_contr) * dt *\
+                    0.69 * lognorm.pdf(self.d[slots], .7, loc=.7, scale=.5)
 
         myd0 += self.c2 * (self.d0_0 - myd0) * dt + self.c3 * sqrt(dt) * (2 * subsrandom - 1)
 
-        self.d0[nodeinds] = myd0
+        self.d0[slots] = myd0
+        self.d0version += 1
+
+
+class CombinedConfiguration:
+    def __init__(self, nodes, subs, backend="numpy"):
+        """
+        Force engine for simulations with substrate (CellMech.issubs is True), evaluating tissue-tissue and
+        tissue-substrate links in one pass. Substrate node j is treated as node N + j of a joint set of nodes, so both
+        kinds of links form one link list and the orientations of tissue and substrate nodes, which follow each other in
+        the state vector, are treated together. Is automatically initialized by class CellMech.
+        getForces() only calculates the forces and torques on the nodes. Per-link data and node sums stored in the
+        instances of NodeConfiguration and SubsConfiguration are updated by their own getForces().
+        :param nodes: instance of NodeConfiguration
+        :param subs: instance of SubsConfiguration
+        :param backend: "numpy" or "numba", whether forces are calculated with numpy or with the compiled kernels in
+            forcekernels.py. Falls back to "numpy" if numba is not available
+        """
+        if backend == "numba" and forcekernels is None:
+            print "Numba not available, using numpy force backend."
+            backend = "numpy"
+        if backend == "numpy":
+            self.getForces = lambda x, t, norm, bend, twist, k, d0, nodeinds: \
+                self.getForces_numpy(x, t, norm, bend, twist, k, d0, nodeinds)
+        elif backend == "numba":
+            self.getForces = lambda x, t, norm, bend, twist, k, d0, nodeinds: \
+                self.getForces_numba(x, t, norm, bend, twist, k, d0, nodeinds)
+        else:
+            print "Oops! Unknown force backend."
+            sys.exit()
+
+        self.nodes = nodes
+        self.subs = subs
+        self.N = nodes.N
+        self.N2 = 2 * self.N
+        self.Nsubs = subs.Nsubs
+
+        self.X = np.zeros((self.N + self.Nsubs, 3))          # positions of tissue and substrate nodes
+        self.rhs = np.zeros((self.N2 + self.Nsubs, 3))       # forces and torques on nodes, as passed to solver
+        self.ws = Workspace()                                # buffers for force calculations
+
+        # joined link data is cached until the link data of one of the configurations changes
+        self.versions = None
+        self.compact = None
+        self.sparsityversions = None
+        self.sparsity = None
+
+    def compactStuffINeed(self):
+        """
+        Join the compacted link data of the tissue-tissue and tissue-substrate links, see
+        NodeConfiguration.compactStuffINeed(). The result is cached until the link data of one of the configurations
+        changes.
+        :return: numpy arrays for t (nl, 2, 3), norm (nl, 2, 3), bend (nl), twist (nl), k (nl), d0 (nl) and tuple of
+        indices of nodes at both link ends ((nl), (nl)), where substrate node j has index N + j. nl is the total number
+        of links
+        """
+        versions = (self.nodes.linkversion, self.nodes.d0version, self.subs.linkversion, self.subs.d0version)
+        if versions != self.versions:
+            self.compact = self.compactLinks()
+            self.versions = versions
+        return self.compact
+
+    def compactLinks(self):
+        """
+        Join the compacted link data of both configurations, see compactStuffINeed()
+        :return: tuple in shape returned by compactStuffINeed()
+        """
+        t, norm, bend, twist, k, d0, (slots, inds0, inds1) = self.nodes.compactStuffINeed()
+        tcell, tsubs, normcell, normsubs, bends, twists, ks, d0s, (slotss, inds0s, inds1s) = \
+            self.subs.compactStuffINeed()
+        if self.nodes.dims == 2:
+            twist = np.zeros_like(twist)  # no twist torques between tissue cells in 2-d-simulations
+        return (np.concatenate((t, np.stack((tcell, tsubs), axis=1))),
+                np.concatenate((norm, np.stack((normcell, normsubs), axis=1))),
+                np.concatenate((bend, bends)), np.concatenate((twist, twists)), np.concatenate((k, ks)),
+                np.concatenate((d0, d0s)), (np.concatenate((inds0, inds0s)), np.concatenate((inds1, self.N + inds1s))))
+
+    def getForces_numpy(self, x, t, norm, bend, twist, k, d0, nodeinds):
+        """
+        Calculate forces and torques on tissue nodes and torques on substrate nodes. Input except for x in shape
+        returned by compactStuffINeed()
+        :param x: numpy array of shape (3 * 2 * self.N + 3 * self.Nsubs) with positions and orientations of tissue
+        nodes and orientations of substrate nodes
+        :param t: tangent vectors at link ends
+        :param norm: normal vectors at link ends
+        :param bend: bending rigidities
+        :param twist: twist rigidity
+        :param k: Hookean constants
+        :param d0: individual link equilibrium lengths
+        :param nodeinds: indices of nodes at both link ends
+        :return: numpy array of shape (3 * 2 * self.N + 3 * self.Nsubs) containing forces and torques on tissue nodes
+        and torques on substrate nodes in form readable by solve_ivp. The array is a view on self.rhs and overwritten
+        by the next call
+        """
+        X = x.reshape(-1, 3)
+        self.X[:self.N] = X[:self.N]
+        self.X[self.N:] = self.subs.nodesX
+        inds0, inds1 = nodeinds
+        nl = len(inds0)
+        ws = self.ws
+
+        # rotations are set up once per node and gathered for the link ends
+        rot = self.nodes.getRotations(X[self.N:])
+        rot0 = np.take(rot, inds0, axis=0, out=ws.get("rot0", nl, rot.shape[1:]), mode="clip")
+        rot1 = np.take(rot, inds1, axis=0, out=ws.get("rot1", nl, rot.shape[1:]), mode="clip")
+
+        E, D = getLinkDirections(self.X, self.X, inds0, inds1, ws)
+        F, M0, M1, Ftens = getLinkForces3D(rot0, rot1, E, D, t[:, 0], t[:, 1], norm[:, 0], norm[:, 1], bend, twist, k,
+                                           d0, self.nodes.rotate, ws)
+
+        # forces on substrate nodes are dropped, torques on tissue and substrate nodes follow each other in self.rhs
+        self.rhs[:self.N] = self.nodes.nodesum(sumLinkVectors(self.N + self.Nsubs, inds0, inds1, F, -F)[:self.N])
+        self.rhs[self.N:] = sumLinkVectors(self.N + self.Nsubs, inds0, inds1, M0, M1)
+        return self.rhs.ravel()
+
+    def getForces_numba(self, x, t, norm, bend, twist, k, d0, nodeinds):
+        """
+        Calculate forces and torques on tissue nodes and torques on substrate nodes like getForces_numpy(), but with the
+        compiled kernel forcekernels.nodeForces()
+        :param x: numpy array of shape (3 * 2 * self.N + 3 * self.Nsubs) with positions and orientations of tissue
+        nodes and orientations of substrate nodes
+        :param t: tangent vectors at link ends
+        :param norm: normal vectors at link ends
+        :param bend: bending rigidities
+        :param twist: twist rigidity
+        :param k: Hookean constants
+        :param d0: individual link equilibrium lengths
+        :param nodeinds: indices of nodes at both link ends
+        :return: numpy array of shape (3 * 2 * self.N + 3 * self.Nsubs) containing forces and torques on tissue nodes
+        and torques on substrate nodes in form readable by solve_ivp. The array is a view on self.rhs and overwritten
+        by the next call
+        """
+        X = x.reshape(-1, 3)
+        self.X[:self.N] = X[:self.N]
+        self.X[self.N:] = self.subs.nodesX
+        inds0, inds1 = nodeinds
+        nl = len(inds0)
+        ws = self.ws
+        F = ws.get("Fnode", self.N + self.Nsubs, (3,))
+        forcekernels.nodeForces(self.X, X[self.N:], t, norm, bend, twist, k, d0, inds0, inds1, True,
+                                ws.get("E", nl, (3,)), ws.get("D", nl), ws.get("F", nl, (3,)), ws.get("Ftens", nl),
+                                ws.get("Mlink", nl, (2, 3)), F, self.rhs[self.N:])
+        self.rhs[:self.N] = self.nodes.nodesum(F[:self.N])
+        return self.rhs.ravel()
+
+    def getJacobian(self, x, t, norm, bend, twist, k, d0, nodeinds):
+        """
+        Calculate the Jacobian of getForces() with respect to positions and orientations of the nodes. Input except for
+        x in shape returned by compactStuffINeed()
+        :param x: numpy array of shape (3 * 2 * self.N + 3 * self.Nsubs) with positions and orientations of tissue
+        nodes and orientations of substrate nodes
+        :param t: tangent vectors at link ends
+        :param norm: normal vectors at link ends
+        :param bend: bending rigidities
+        :param twist: twist rigidity
+        :param k: Hookean constants
+        :param d0: individual link equilibrium lengths
+        :param nodeinds: indices of nodes at both link ends
+        :return: scipy.sparse.csr_matrix of shape (len(x), len(x)), readable by solve_ivp as jac for methods "BDF" and
+        "Radau", or by getBandedJacobian() for method "LSODA"
+        """
+        X = x.reshape(-1, 3)
+        Phi = X[self.N:]
+        inds0, inds1 = nodeinds
+        XAll = np.concatenate((X[:self.N], self.subs.nodesX))
+        E, D = getLinkDirections(XAll, XAll, inds0, inds1, Workspace())
+        blocks = getLinkJacobian3D(Phi[inds0], Phi[inds1], E, D, t[:, 0], t[:, 1], norm[:, 0], norm[:, 1], bend, twist,
+                                   k, d0)
+        return assembleJacobian(self.N, len(X), blocks, inds0, inds1)
+
+    def getJacSparsity(self):
+        """
+        Get the sparsity structure of getJacobian() and the grouping of its columns, see getJacSparsity(). The result is
+        cached until links of one of the configurations are added or removed
+        :return: tuple (structure, groups) readable by solve_ivp as jac_sparsity
+        """
+        versions = (self.nodes.linkversion, self.subs.linkversion)
+        if versions != self.sparsityversions:
+            inds0, inds1 = self.compactStuffINeed()[-1]
+            self.sparsity = getJacSparsity(self.N, len(self.rhs), inds0, inds1)
+            self.sparsityversions = versions
+        return self.sparsity
 
 
 class CellMech:
     def __init__(self, num_cells, num_subs=0, dt=0.01, nmax=300, qmin=0.001, d0_0=1., p_add=1., p_del=0.2, c1=0.05,
                  c2=0.1, c3=0.2, subs_scale=False, p_add_subs=None, p_del_subs=None, chkx=False, d0max=2., dims=3,
-                 F_contr=1., isF0=False, isanchor=False, issubs=False, force_contr=True, plasticity=(1., 1., 1.5)):
+                 F_contr=1., isF0=False, isanchor=False, issubs=False, force_contr=True, plasticity=(1., 1., 1.5),
+                 orientation="matrix", backend="numpy", method="LSODA", jacobian="numerical", reorder=False,
+                 warmstart=False, localhops=None, globalsweep=20, neighbors="voronoi",
+                 skin=None, keeptri=False):
         """
         Implementation of model for cell-resolved, multiparticle model of plastic tissue deformations and morphogenesis
         first suggested by Czirok et al in 2014 (https://iopscience.iop.org/article/10.1088/1478-3975/12/1/016005/meta,
@@ -953,7 +2605,9 @@ class CellMech:
         :param dt: float, the time unit for scaling simulation time
         :param nmax: integer, the maximum time (in simulation time) for until cutoff when calculating
             mechanical equilibrium
-        :param qmin: float, the square of the maximum force per cell until mechanical equilibration is cut off
+        :param qmin: float, the square of the maximum force per cell until mechanical equilibration is cut off. It is
+            checked after each solver step. "BDF" takes one extra force evaluation per step for it, "LSODA" only once
+            its estimate of the forces is close to the limit
         :param d0_0: float, the global equilibrium link length (d_0 in czirok2014cell)
         :param p_add: float, base probability for adding tissue-tissue links
         :param p_del: float, base probability for removing tissue-tissue links
@@ -975,6 +2629,40 @@ class CellMech:
             component included.
         :param plasticity: Either None if Hookean, bend and twist constants are set individually per link, or tuple
             containing global values for the three constants in shape (k1, k2, k3) = (bend, twist, Hooke)
+        :param orientation: "matrix" or "quaternion", whether link vectors are rotated with rotation matrices or
+            quaternions set up from the node orientations when calculating forces. With the numpy backend
+            "quaternion" is slower than "matrix", it is the numpy counterpart of the numba kernels
+        :param backend: "numpy" or "numba", whether forces are calculated with numpy or with compiled kernels (only
+            available if numba is installed, always using quaternions)
+        :param method: "LSODA", "BDF", "Radau" or "RKC" (stabilized explicit, without Jacobian), the solver used for
+            mechanical equilibration, or "FIRE" for minimization with relaxFIRE() instead of solving the overdamped
+            dynamics. Then the time needed for equilibration is the fictitious time of the minimization, cut off after
+            10 * nmax steps. Or "NewtonKrylov" for solving for vanishing forces with solveNewtonKrylov(), falling back
+            to "LSODA" if this fails. Then equilibration takes no time
+        :param jacobian: "numerical" or "analytic", whether the solver approximates the Jacobian of the forces by
+            finite differences (for "BDF" and "Radau" evaluated column groups given by the links) or uses the analytic
+            Jacobian
+        :param reorder: bool, whether the nodes are reordered in the state of the solver so that the Jacobian has
+            narrow bands, which LSODA uses for banded LU decompositions. Only used with method "LSODA"
+        :param warmstart: bool, whether consecutive equilibrations are warm-started with an Equilibrator: "BDF" and
+            "Radau" start with the last Jacobian of the previous equilibration of the same nodes, "LSODA" with its last
+            step size
+        :param localhops: None or integer > 0. If None, the whole tissue is equilibrated after each plasticity event.
+            Otherwise only the nodes within localhops links of the modified link, with the other nodes frozen, widening
+            the region by localhops links while the relaxation changes forces on the nodes at its boundary by more than
+            qmin. Not used if issubs is "lonesome"
+        :param globalsweep: integer, with localhops, equilibrate the whole tissue every globalsweep-th equilibration to
+            catch the drift of the equilibrium lengths outside of the relaxed regions
+        :param neighbors: "voronoi", "cutoff" or "gabriel", the candidate pairs for new links: neighbors in the Delaunay
+            triangulation of all nodes, all pairs closer than d0max found with a k-d tree, or only those of them which
+            are neighbors in the Gabriel graph (no other node inside the sphere spanned by the pair). Not used if
+            issubs is "lonesome"
+        :param skin: None or float > 0. If not None, the candidate pairs for neighbors "cutoff" or "gabriel" are taken
+            from a VerletList of the pairs closer than d0max + skin, which is only rebuilt after a node moved by more
+            than skin / 2. Only used with neighbors "cutoff" or "gabriel"
+        :param keeptri: bool, whether the Delaunay triangulation for neighbors "voronoi" is kept in a Tessellation,
+            repaired by edge flips after the nodes moved and only set up anew if a triangle flipped or the hull changed.
+            Only used with neighbors "voronoi" and dims 2
         """
         self.dims = dims
         self.issubs = issubs
@@ -988,6 +2676,24 @@ class CellMech:
         self.nmax = nmax
         self.tmax = nmax * dt
         self.qmin = np.sqrt(qmin)
+        if method not in ("LSODA", "BDF", "Radau", "RKC", "FIRE", "NewtonKrylov"):
+            print "Oops! Unknown solver method."
+            sys.exit()
+        self.method = method
+        if jacobian not in ("numerical", "analytic"):
+            print "Oops! Unknown type of Jacobian."
+            sys.exit()
+        self.jacobian = jacobian
+        self.reorder = reorder
+        self.bandorder = None   # order of the state for the current links, see getBandOrder()
+        self.equilibrator = Equilibrator(self.tmax, warmstart)
+        if localhops is not None and localhops < 1:
+            print "Oops! localhops must be None or positive."
+            sys.exit()
+        self.localhops = localhops
+        self.globalsweep = globalsweep
+        self.nequil = 0         # number of equilibrations, for global sweeps with localhops
+        self.modified = None    # nodes at links modified since the last equilibration, None if not known
 
         # parameters to add/remove links
         self.d0_0 = d0_0
@@ -999,6 +2705,24 @@ class CellMech:
         elif self.dims == 3:
             self.chkx = False
         self.d0max = d0max
+        # candidate pairs for new links
+        if skin is not None and skin <= 0:
+            print "Oops! skin must be None or positive."
+            sys.exit()
+        if neighbors == "voronoi" and keeptri and self.dims == 2:
+            self.tessellation = Tessellation(vodims=self.dims)
+            self.getNeighbors = lambda positions: self.tessellation.getNeighbors(positions)
+        elif neighbors == "voronoi":
+            self.getNeighbors = lambda positions: VoronoiNeighbors(positions, vodims=self.dims)
+        elif neighbors in ("cutoff", "gabriel") and skin is None:
+            self.getNeighbors = lambda positions: CutoffNeighbors(positions, self.d0max, vodims=self.dims,
+                                                                  gabriel=neighbors == "gabriel")
+        elif neighbors in ("cutoff", "gabriel"):
+            self.verletlist = VerletList(self.d0max, skin, vodims=self.dims, gabriel=neighbors == "gabriel")
+            self.getNeighbors = lambda positions: self.verletlist.getNeighbors(positions)
+        else:
+            print "Oops! Unknown type of neighbors."
+            sys.exit()
 
         self.force_contr = force_contr
 
@@ -1010,7 +2734,8 @@ class CellMech:
         # initialize instance of NodeConfiguration containing data on tissue cells
         self.mynodes = NodeConfiguration(num=num_cells, num_subs=num_subs, p_add=p_add, p_del=p_del,
                                          c1=c1, c2=c2, c3=c3, F_contr=F_contr,
-                                         dims=dims, d0_0=d0_0, isF0=isF0, isanchor=isanchor, plasticity=plasticity)
+                                         dims=dims, d0_0=d0_0, isF0=isF0, isanchor=isanchor, plasticity=plasticity,
+                                         orientation=orientation, backend=backend)
 
         if self.issubs is True:
             # initialize instance of SubsConfiguration containing data on substrate cells, set functions to account for
@@ -1022,13 +2747,16 @@ class CellMech:
             if subs_scale is False:
                 self.mysubs = SubsConfiguration(num_cells=num_cells, num_subs=num_subs, d0_0=d0_0,
                                                 c1=c1, c2=c2, c3=c3, F_contr=F_contr,
-                                                p_add=p_add_subs, p_del=p_del_subs, plasticity=plasticity)
+                                                p_add=p_add_subs, p_del=p_del_subs, plasticity=plasticity,
+                                                orientation=orientation, backend=backend)
             else:
                 subsplasticity = (plasticity[0] / subs_scale, plasticity[1] / subs_scale, plasticity[2] / subs_scale)
                 self.mysubs = SubsConfiguration(num_cells=num_cells, num_subs=num_subs, d0_0=d0_0,
                                                 c1=c1, c2=c2, c3=c3, F_contr=F_contr,
                                                 p_add=p_add_subs, p_del=p_del_subs*subs_scale,
-                                                plasticity=subsplasticity)
+                                                plasticity=subsplasticity, orientation=orientation, backend=backend)
+            # initialize instance of CombinedConfiguration evaluating tissue-tissue and tissue-substrate links together
+            self.mycombined = CombinedConfiguration(self.mynodes, self.mysubs, backend=backend)
             self.mechEquilibrium = lambda: self.mechEquilibrium_withsubs()
             self.makesnap = lambda t: self.makesnap_withsubs(t)
             self.addLinkList = lambda: self.addLinkList_withsubs()
@@ -1048,7 +2776,8 @@ class CellMech:
                 p_del_subs = p_del
             self.mysubs = SubsConfiguration(num_cells=num_cells, num_subs=num_subs, d0_0=d0_0,
                                             c1=c1, c2=c2, c3=c3, F_contr=F_contr,
-                                            p_add=p_add_subs, p_del=p_del_subs, plasticity=plasticity)
+                                            p_add=p_add_subs, p_del=p_del_subs, plasticity=plasticity,
+                                            orientation=orientation, backend=backend)
             self.mechEquilibrium = lambda: self.mechEquilibrium_lonesome()
             self.makesnap = lambda t: self.makesnap_lonesome(t)
             self.addLinkList = lambda: self.addLinkList_lonesome()
@@ -1057,10 +2786,15 @@ class CellMech:
             print "I don't know that type of subs"
             sys.exit()
 
+        if self.localhops is not None and self.issubs is not "lonesome":
+            # equilibrate around modified links, keep equilibration of the whole tissue for global sweeps
+            self.mechEquilibrium_global = self.mechEquilibrium
+            self.mechEquilibrium = lambda: self.mechEquilibrium_local()
+
     def mechEquilibrium_nosubs(self):
         """
         Wrapping for calculating mechanical equilibrium in absence of substrate. Uses slightly modified version of
-        scipy.integrate.solve_ivp (exact location of event==0 isn't searched) with method 'LSODA'.
+        scipy.integrate.solve_ivp (convergence is checked after each step) with method self.method.
         Integration ends if each component of the force on each cell drops lower than self.qmin,
         or when self.tmax is reached.
         :return: Time needed for mechanical equilibration
@@ -1068,20 +2802,16 @@ class CellMech:
         # reshape X and Phi for solveivp
         x = np.concatenate((self.mynodes.nodesX, self.mynodes.nodesPhi), axis=0).flatten()
         # extract data not changed by mechanical equilibrium from large arrays
-        t, norm, normT, bend, twist, k, d0, nodeinds = self.mynodes.compactStuffINeed()
+        t, norm, bend, twist, k, d0, nodeinds = self.mynodes.compactStuffINeed()
 
         # produce fun for solve_ivp as lambda
-        def notatallfun(temp, y): return self.mynodes.getForces(y, t, norm, normT, bend, twist, k, d0, nodeinds)
+        def notatallfun(temp, y): return self.mynodes.getForces(y, t, norm, bend, twist, k, d0, nodeinds)
 
-        # produce event function to check whether to end solve_ivp
-        def event(temp, y):
-            k1 = self.mynodes.getForces(y, t, norm, normT, bend, twist, k, d0, nodeinds)
-            return np.max(np.abs(k1) - self.qmin)
-        event.terminal = True
-        event.direction = -1
+        # produce Jacobian of fun for solve_ivp
+        def jac(temp, y): return self.mynodes.getJacobian(y, t, norm, bend, twist, k, d0, nodeinds)
 
         # perform equilibration
-        res = solve_ivp(fun=notatallfun, t_span=[0, self.tmax], y0=x, method='LSODA', events=[event], atol=1e-3)
+        res = self.solveEquilibrium(notatallfun, self.qmin, jac, x, self.mynodes)
 
         # reshape data returned by solve_ivp to data readable by class
         x = res.y.reshape((-1, 3, len(res.t)))
@@ -1093,7 +2823,7 @@ class CellMech:
     def mechEquilibrium_withsubs(self):
         """
         Wrapping for calculating mechanical equilibrium in presence of substrate. Uses slightly modified version of
-        scipy.integrate.solve_ivp (exact location of event==0 isn't searched) with method 'LSODA'.
+        scipy.integrate.solve_ivp (convergence is checked after each step) with method self.method.
         Integration ends if each component of the force on each cell drops lower than self.qmin,
         or when self.tmax is reached.
         :return: Time needed for mechanical equilibration
@@ -1101,38 +2831,37 @@ class CellMech:
         # reshape X and Phi for solveivp
         x = np.concatenate((self.mynodes.nodesX, self.mynodes.nodesPhi, self.mysubs.nodesPhi), axis=0).flatten()
         # extract data not changed by mechanical equilibrium from large arrays
-        t, norm, normT, bend, twist, k, d0, nodeinds = self.mynodes.compactStuffINeed()
-        tcell, tsubs, normcell, normsubs, bends, twists, ks, d0s, nodeindss = self.mysubs.compactStuffINeed()
+        t, norm, bend, twist, k, d0, nodeinds = self.mycombined.compactStuffINeed()
 
         # produce fun for solve_ivp as lambda
-        def notatallfun(temp, y): return self.mynodes.getForces(y, t, norm, normT, bend, twist, k, d0, nodeinds) + \
-                                         self.mysubs.getForces(y, tcell, tsubs, normcell, normsubs,
-                                                               bends, twists, ks, d0s, nodeindss)
+        def notatallfun(temp, y): return self.mycombined.getForces(y, t, norm, bend, twist, k, d0, nodeinds)
+
+        # produce convergence check on the forces at the solver's state to end solve_ivp
+        def converged(temp, y, f): return np.max(np.abs(f[:self.N2])) < self.qmin
 
-        # produce event function to check whether to end solve_ivp
-        def event(temp, y):
-            k1 = self.mynodes.getForces(y, t, norm, normT, bend, twist, k, d0, nodeinds) + \
-                 self.mysubs.getForces(y, tcell, tsubs, normcell, normsubs, bends, twists, ks, d0s, nodeindss)
-            return np.max(np.abs(k1[:self.N2]) - self.qmin)
-        event.terminal = True
-        event.direction = -1
+        # produce Jacobian of fun for solve_ivp
+        def jac(temp, y): return self.mycombined.getJacobian(y, t, norm, bend, twist, k, d0, nodeinds)
 
         # perform equilibration
-        res = solve_ivp(fun=notatallfun, t_span=[0, self.tmax], y0=x, method='LSODA', events=[event], atol=1e-3)
+        res = self.solveEquilibrium(notatallfun, converged, jac, x, self.mycombined)
 
         # reshape data returned by solve_ivp to data readable by class
         x = res.y.reshape((-1, 3, len(res.t)))
         self.mynodes.nodesX = x[:self.N, :, -1]
         self.mynodes.nodesPhi = x[self.N:self.N2, :, -1]
         self.mysubs.nodesPhi = x[self.N2:, :, -1]
+
+        # update link data and forces stored in the configurations for the final state
+        self.mynodes.getForces(res.y[:, -1], *self.mynodes.compactStuffINeed())
+        self.mysubs.getForces(res.y[:, -1], *self.mysubs.compactStuffINeed())
         return res.t[-1]
 
     def mechEquilibrium_lonesome(self):
         """
         Wrapping for calculating mechanical equilibrium in presence of substrate with only one tissue cell.
-        Uses slightly modified version of  scipy.integrate.solve_ivp (exact location of event==0 isn't searched)
-        with method 'LSODA'. Integration ends if each component of the force on each cell drops lower than self.qmin,
-        or when self.tmax is reached.
+        Uses slightly modified version of  scipy.integrate.solve_ivp (convergence is checked after each step)
+        with method self.method. Integration ends if each component of the force on each cell drops lower than
+        self.qmin, or when self.tmax is reached.
         :return: Time needed for mechanical equilibration
         """
         # reshape X and Phi for solveivp
@@ -1144,15 +2873,15 @@ class CellMech:
         def notatallfun(temp, y): return self.mysubs.getForces(y, tcell, tsubs, normcell, normsubs,
                                                                bends, twists, ks, d0s, nodeindss)
 
-        # produce event function to check whether to end solve_ivp
-        def event(temp, y):
-            k1 = self.mysubs.getForces(y, tcell, tsubs, normcell, normsubs, bends, twists, ks, d0s, nodeindss)
-            return np.max(np.abs(k1[:self.N2]) - self.qmin)
-        event.terminal = True
-        event.direction = -1
+        # produce convergence check on the forces at the solver's state to end solve_ivp
+        def converged(temp, y, f): return np.max(np.abs(f[:self.N2])) < self.qmin
+
+        # produce Jacobian of fun for solve_ivp
+        def jac(temp, y): return self.mysubs.getJacobian(y, tcell, tsubs, normcell, normsubs, bends, twists, ks, d0s,
+                                                          nodeindss)
 
         # perform equilibration
-        res = solve_ivp(fun=notatallfun, t_span=[0, self.tmax], y0=x, method='LSODA', events=[event], atol=1e-3)
+        res = self.solveEquilibrium(notatallfun, converged, jac, x, self.mysubs)
 
         # reshape data returned by solve_ivp to data readable by class
         x = res.y.reshape((-1, 3, len(res.t)))
@@ -1161,6 +2890,143 @@ class CellMech:
         self.mysubs.nodesPhi = x[self.N2:, :, -1]
         return res.t[-1]
 
+    def mechEquilibrium_local(self):
+        """
+        Wrapping for calculating mechanical equilibrium only for the nodes within self.localhops links of the links
+        modified since the last equilibration, with the other nodes frozen, see LocalRegion. The region is widened by
+        self.localhops links as long as the relaxation changed a component of the force or torque on a node at its
+        boundary by more than self.qmin. The forces resulting from the changes of the equilibrium lengths of all links
+        in each plasticity step are left to the equilibration of the whole tissue every self.globalsweep-th time, or
+        if the modified links aren't known
+        :return: Time needed for mechanical equilibration
+        """
+        self.nequil += 1
+        modified, self.modified = self.modified, []
+        if modified is None or self.nequil % self.globalsweep == 0:
+            return self.mechEquilibrium_global()
+
+        if self.issubs is True:
+            config = self.mycombined
+            x = np.concatenate((self.mynodes.nodesX, self.mynodes.nodesPhi, self.mysubs.nodesPhi), axis=0).flatten()
+        else:
+            config = self.mynodes
+            x = np.concatenate((self.mynodes.nodesX, self.mynodes.nodesPhi), axis=0).flatten()
+        args = config.compactStuffINeed()
+        inds0, inds1 = args[-1][-2:]
+        region = np.zeros(len(x) // 3 - self.N, dtype=bool)     # tissue nodes followed by substrate nodes
+        region[modified] = True
+        region = getNeighbourhood(region, inds0, inds1, self.localhops)
+        f0 = config.getForces(x, *args).reshape((-1, 3)).copy()
+
+        teq = 0.
+        while region.any():
+            local = LocalRegion(config, x, region, args)
+
+            def notatallfun(temp, y): return local.getForces(y)
+
+            def jac(temp, y): return local.getJacobian(y)
+
+            if self.issubs is True:
+                # like mechEquilibrium_withsubs(), only forces and torques on tissue nodes end the equilibration
+                def converged(temp, y, f): return np.max(np.abs(f[:6 * local.N])) < self.qmin
+            else:
+                converged = self.qmin
+
+            res = self.solveEquilibrium(notatallfun, converged, jac, local.getState(), local)
+            x = local.getFullState(res.y[:, -1])
+            teq += res.t[-1]
+
+            # largest change of a component of the force or torque on each node
+            df = np.abs(config.getForces(x, *args).reshape((-1, 3)) - f0).max(axis=1)
+            dfmax = df[self.N:]
+            dfmax[:self.N] = np.maximum(dfmax[:self.N], df[:self.N])
+            boundary = getNeighbourhood(region, inds0, inds1, 1) & ~region
+            if not np.any(dfmax[boundary] > self.qmin):
+                break
+            region = getNeighbourhood(region, inds0, inds1, self.localhops)
+
+        x = x.reshape((-1, 3))
+        self.mynodes.nodesX = x[:self.N]
+        self.mynodes.nodesPhi = x[self.N:self.N2]
+        if self.issubs is True:
+            self.mysubs.nodesPhi = x[self.N2:]
+            # update link data and forces stored in the configurations for the final state
+            self.mynodes.getForces(x.ravel(), *self.mynodes.compactStuffINeed())
+            self.mysubs.getForces(x.ravel(), *self.mysubs.compactStuffINeed())
+        return teq
+
+    def solveEquilibrium(self, fun, converged, jac, x, config, stride=None):
+        """
+        Run solve_ivp for mechanical equilibration with the solver chosen in self.method, self.jacobian and
+        self.reorder, or relaxFIRE() or solveNewtonKrylov() if chosen in self.method
+        :param fun: function returning the forces and torques on the nodes for a state, see getForces()
+        :param converged: float or function converged(t, y, f) ending the equilibration, see solve_ivp()
+        :param jac: function returning the Jacobian of fun for a state, see getJacobian()
+        :param x: numpy array, the initial state
+        :param config: instance of NodeConfiguration, SubsConfiguration, CombinedConfiguration or LocalRegion providing
+        fun and jac
+        :param stride: integer or None, keep the initial state and every stride-th step in the result, or only the
+        final state if None
+        :return: result of solve_ivp, with states in the original order
+        """
+        method = self.method
+        if method == "FIRE":
+            return relaxFIRE(fun, converged, x, self.dt, 10 * self.dt, 10 * self.nmax, stride=stride)
+        if method == "NewtonKrylov":
+            res = solveNewtonKrylov(fun, jac, x, self.qmin, config.N, 100, 10 * self.dt)
+            if res.success:
+                return res
+            method = "LSODA"    # fall back to solving the overdamped dynamics
+        options = {}
+        order = None
+        if method == "LSODA":
+            if self.reorder:
+                # solve for the reordered state, invisible outside of this function
+                order, lband, uband = self.getBandOrder(config)
+                back = np.argsort(order)
+                fun = lambda temp, y, f=fun: f(temp, y[back])[order]
+                jac = lambda temp, y, j=jac: j(temp, y[back])[order][:, order]
+                if callable(converged):
+                    converged = lambda temp, y, f, c=converged: c(temp, y[back], f[back])
+                x = x[order]
+                options = {"lband": lband, "uband": uband}
+            elif self.jacobian == "analytic":
+                lband, uband = getBandwidth(config.getJacSparsity()[0])
+            if self.jacobian == "analytic":
+                if 2 * lband + uband + 1 < len(x):
+                    # LSODA takes Jacobians with narrow bands in packed form
+                    options = {"jac": lambda temp, y: getBandedJacobian(jac(temp, y), lband, uband),
+                               "lband": lband, "uband": uband}
+                else:
+                    options = {"jac": lambda temp, y: jac(temp, y).toarray()}
+        else:
+            # fun returns a view on an array overwritten by the next call, but BDF, Radau and RKC keep previous values
+            fun = lambda temp, y, f=fun: f(temp, y).copy()
+            if method == "RKC":
+                options = {}    # only the spectral radius of the Jacobian is needed, estimated from fun by RKC
+            elif self.jacobian == "analytic":
+                options = {"jac": jac}
+            else:
+                options = {"jac_sparsity": config.getJacSparsity()}
+        key = config.key if isinstance(config, LocalRegion) else id(config)
+        res = self.equilibrator.solve(fun, x, method, converged, key=key, stride=stride, **options)
+        if order is not None:
+            res.y = res.y[back]
+        return res
+
+    def getBandOrder(self, config):
+        """
+        Get the order of the state of the solver minimizing the bandwidth of the Jacobian, see getBandOrder(). The
+        result is cached until the links change
+        :param config: instance of NodeConfiguration, SubsConfiguration, CombinedConfiguration or LocalRegion
+        :return: numpy array with the indices of the components of the state in the new order, and integers lband and
+        uband, the number of lower and upper diagonals of the reordered Jacobian
+        """
+        structure = config.getJacSparsity()[0]  # same object until the links change
+        if self.bandorder is None or self.bandorder[0] is not structure:
+            self.bandorder = (structure,) + getBandOrder(structure)
+        return self.bandorder[1:]
+
     def intersect_all(self):
         """
         Find intersections in  current 2-d configuration of cell positions saved in subclass self.mynodes.
@@ -1264,156 +3130,127 @@ class CellMech:
             Xs = newXs
         for badlink in delete_list:
             self.mynodes.removelink(badlink[0], badlink[1])
+            self.markModified(badlink[0], badlink[1])
 
     def delLinkList(self):
         """
         Identify possible links for deletion
-        :return: numpy array of shape (3, n). Along first axis: (a) array of n possible links for deletion, each entry
-        is a numpy array of shape (2) containing the indices of the cells connected by the link. (b) array of n deletion
-        probabilities, calculated according to eq. 20 of czirok2014cell. (c) array of n boolean variables, True if
+        :return: tuple of three numpy arrays: (a) integer array of shape (n, 2) of n possible links for deletion, each
+        entry containing the indices of the cells connected by the link. (b) float array of shape (n) of deletion
+        probabilities, calculated according to eq. 20 of czirok2014cell. (c) boolean array of shape (n), True if
         tissue-substrate link, False if tissue-tissue link. Returns no deletable links if there is exactly one
         tissue-substrate link (case relevant for "lonesome" setting of self.issubs).
         """
-        del_links, del_probs, del_bools = [], [], []
+        configs = [(self.mysubs, True)] if self.issubs else []
+        configs.append((self.mynodes, False))
+        candidates = []
         linksum = 0
-        if self.issubs:
-            linklist = self.mysubs.getLinkList()
-            linksum += len(linklist)
-            for link in linklist:
-                if self.mysubs.d[link[0], link[1]] < self.mysubs.d0[link[0], link[1]]:
-                    continue        # compressed links are stable
-                f = scipy.linalg.norm(self.mysubs.Flink[link[0], link[1]])
-                p = exp(f)
-                del_links.append(link)
-                del_probs.append(p * self.mysubs.p_del)
-                del_bools.append(True)  # is tissue-substrate link
-        linklist = self.mynodes.getLinkList()
-        linksum += len(linklist)
+        for config, boo in configs:
+            slots = config.getSlots()
+            linksum += len(slots)
+            stretched = config.d[slots] >= config.d0[slots]     # compressed links are stable
+            slots = slots[stretched]
+            p = np.exp(np.sqrt(np.sum(config.Flink[slots] ** 2, axis=1)))
+            candidates.append((config.getLinkList()[stretched], p * config.p_del, np.full(len(slots), boo, bool)))
         if linksum == 1:
-            return [[], [], []]  # catch case where there is only one tissue-substrate link ("lonesome" setting)
-        for link in linklist:
-            if self.mynodes.d[link[0], link[1]] < self.mynodes.d0[link[0], link[1]]:
-                continue            # compressed links are stable
-            f = scipy.linalg.norm(self.mynodes.Flink[link[0], link[1]])
-            p = exp(f)
-            del_links.append(link)
-            del_probs.append(p * self.mynodes.p_del)
-            del_bools.append(False)  # is tissue-tissue link
-        return np.array([del_links, del_probs, del_bools])
+            # catch case where there is only one tissue-substrate link ("lonesome" setting)
+            return np.zeros((0, 2), int), np.zeros(0), np.zeros(0, bool)
+        return tuple(np.concatenate(c) for c in zip(*candidates))
 
     def tryLink_notsubs(self, n1, n2):
         """
-        Test whether a hypothetical new tissue-tissue link (a) already exists, (b) would intersect another already
+        Test whether hypothetical new tissue-tissue links (a) already exist, (b) would intersect another already
         existing link (only in 2-d) or (c) would be longer than self.d0max
-        :param n1: The index of one of the cells connected by the hypothetical new link
-        :param n2: The index of the second cell
-        :return: actual length of hypothetical link
-        """
-        if self.mynodes.islink[n1, n2]:
-            return -1  # link refused
+        :param n1: numpy array of shape (n) of the indices of one of the cells connected by each hypothetical new link
+        :param n2: numpy array of shape (n) of the indices of the second cells
+        :return: numpy array of shape (n) of the actual lengths of the hypothetical links, -1 where a link is refused
+        """
+        d = np.sqrt(np.sum((self.mynodes.nodesX[n1] - self.mynodes.nodesX[n2]) ** 2, axis=1))
+        d[d > self.d0max] = -1  # link refused
+        # existing links are stored with the larger index first
+        links0, links1 = self.mynodes.getLinkTuple()
+        d[np.in1d(np.maximum(n1, n2) * self.N + np.minimum(n1, n2), links0 * self.N + links1)] = -1  # link refused
         if self.dims == 2:
-            if self.intersect_withone(n1, n2):
-                return -1  # link refused
-        d = scipy.linalg.norm(self.mynodes.nodesX[n1] - self.mynodes.nodesX[n2])
-        if d > self.d0max:
-            return -1  # link refused
+            for k in np.nonzero(d > 0)[0]:
+                if self.intersect_withone(n1[k], n2[k]):
+                    d[k] = -1  # link refused
         return d  # link accepted: d > 0
 
     def tryLink_issubs(self, n1, n2):
         """
-        Test whether a hypothetical new tissue-substrate link (a) already exists, (b) would intersect another already
+        Test whether hypothetical new tissue-substrate links (a) already exist, (b) would intersect another already
         existing link (only in 2-d) or (c) would be longer than self.d0max
-        :param n1: The index of one of the cells connected by the hypothetical new link
-        :param n2: The index of the second cell
-        :return: actual length of hypothetical link
-        """
-        if self.mysubs.islink[n1, n2]:
-            return -1  # link refused
+        :param n1: numpy array of shape (n) of the indices of the tissue cells connected by each hypothetical new link
+        :param n2: numpy array of shape (n) of the indices of the substrate cells
+        :return: numpy array of shape (n) of the actual lengths of the hypothetical links, -1 where a link is refused
+        """
+        d = np.sqrt(np.sum((self.mynodes.nodesX[n1] - self.mysubs.nodesX[n2]) ** 2, axis=1))
+        d[d > self.d0max] = -1  # link refused
+        links0, links1 = self.mysubs.getLinkTuple()
+        nsubs = self.mysubs.Nsubs
+        d[np.in1d(n1 * nsubs + n2, links0 * nsubs + links1)] = -1  # link refused
         if self.dims == 2:
-            if self.intersect_withone(n1, n2):
-                return -1  # link refused
-        d = scipy.linalg.norm(self.mynodes.nodesX[n1] - self.mysubs.nodesX[n2])
-        if d > self.d0max:
-            return -1  # link refused
+            for k in np.nonzero(d > 0)[0]:
+                if self.intersect_withone(n1[k], n2[k]):
+                    d[k] = -1  # link refused
         return d  # link accepted: d > 0
 
     def addLinkList_nosubs(self):
         """
-        Identify possible new links in the case of simulations without a substrate. New links based on Voronoi
-        tessellation of the tissue nodes.
-        :return: numpy array of shape (3, n). Along first axis: (a) array of n possible new links, each entry
-        is a tuple containing the indices of the cells connected by the link. (b) array of n deletion
-        probabilities, calculated according to eq. 21 of czirok2014cell. (c) array of n boolean variables set to False,
+        Identify possible new links in the case of simulations without a substrate. New links based on the neighbors
+        among the tissue nodes given by self.getNeighbors(), by default from the Voronoi tessellation.
+        :return: tuple of three numpy arrays: (a) integer array of shape (n, 2) of n possible new links, each entry
+        containing the indices of the cells connected by the link. (b) float array of shape (n) of addition
+        probabilities, calculated according to eq. 21 of czirok2014cell. (c) boolean array of shape (n) set to False,
         as all possible links are tissue-tissue links
         """
-        add_links, add_probs, add_bools = [], [], []
-        for i, j in VoronoiNeighbors(self.mynodes.nodesX, vodims=self.dims):
-            d = self.tryLink_notsubs(i, j)
-            if d > 1e-5:  # if d < 0: link rejected by tryLink
-                p = (1 - (d / self.d0max))
-                add_links.append((i, j))
-                add_probs.append(p * self.mynodes.p_add)
-                add_bools.append(False)
-        return np.array([add_links, add_probs, add_bools])
+        pairs = self.getNeighbors(self.mynodes.nodesX)
+        d = self.tryLink_notsubs(pairs[:, 0], pairs[:, 1])
+        ok = d > 1e-5  # if d < 0: link rejected by tryLink
+        p = 1 - (d[ok] / self.d0max)
+        return pairs[ok], p * self.mynodes.p_add, np.zeros(len(p), bool)
 
     def addLinkList_withsubs(self):
         """
-        Identify possible new links in the case of simulations with a substrate. New links based on Voronoi
-        tessellation of all tissue and substrate nodes.
-        :return: numpy array of shape (3, n). Along first axis: (a) array of n possible new links, each entry
-        is a tuple containing the indices of the nodes connected by the link. Substrate nodes are numbered as
-        continuation of tissue-node-list. (b) array of n deletion probabilities, calculated according to eq. 21 of
-        czirok2014cell. (c) array of n boolean variables, True if tissue-substrate link, False if tissue-tissue link.
+        Identify possible new links in the case of simulations with a substrate. New links based on the neighbors
+        among all tissue and substrate nodes given by self.getNeighbors(), by default from the Voronoi tessellation.
+        :return: tuple of three numpy arrays: (a) integer array of shape (n, 2) of n possible new links, each entry
+        containing the indices of the nodes connected by the link. Substrate nodes are numbered as continuation of
+        tissue-node-list. (b) float array of shape (n) of addition probabilities, calculated according to eq. 21 of
+        czirok2014cell. (c) boolean array of shape (n), True if tissue-substrate link, False if tissue-tissue link.
         """
-        add_links, add_probs, add_bools = [], [], []
         allnodes = np.concatenate((self.mynodes.nodesX, self.mysubs.nodesX))
-        for i, j in VoronoiNeighbors(allnodes, vodims=self.dims):
-            if j >= self.N:  # at least one node is a substrate node
-                boo = True
-                if i < self.N:
-                    d = self.tryLink_issubs(i, j - self.N)
-                    boo = True
-                else:
-                    d = -1  # is substrate-substrate link
-            else:  # both
-                d = self.tryLink_notsubs(i, j)
-                boo = False
-            if d > 1e-5:  # if d < 0: link either substrate-substrate link or rejected by tryLink
-                p = (1 - (d / self.d0max))
-                add_links.append((i, j))
-                if boo:
-                    add_probs.append(p * self.mysubs.p_add)
-                else:
-                    add_probs.append(p * self.mynodes.p_add)
-                add_bools.append(boo)
-        return np.array([add_links, add_probs, add_bools])
+        pairs = self.getNeighbors(allnodes)
+        pairs = pairs[pairs[:, 0] < self.N]  # drop substrate-substrate pairs
+        boo = pairs[:, 1] >= self.N  # is tissue-substrate link
+        d = np.empty(len(pairs))
+        d[~boo] = self.tryLink_notsubs(pairs[~boo, 0], pairs[~boo, 1])
+        d[boo] = self.tryLink_issubs(pairs[boo, 0], pairs[boo, 1] - self.N)
+        ok = d > 1e-5  # if d < 0: link rejected by tryLink
+        p = 1 - (d[ok] / self.d0max)
+        return pairs[ok], p * np.where(boo[ok], self.mysubs.p_add, self.mynodes.p_add), boo[ok]
 
     def addLinkList_lonesome(self):
         """
         Identify possible new links in the case of simulations with a substrate but only one tissue cell.
-        New links based on Voronoi tessellation of the tissue node and all substrate nodes.
-        :return: numpy array of shape (3, n). Along first axis: (a) array of n possible new links, each entry
-        is a tuple containing the indices of the nodes connected by the link. Substrate nodes are numbered as
-        continuation of tissue-node-list. (b) array of n deletion probabilities, calculated according to eq. 21 of
-        czirok2014cell. (c) array of n boolean variables set to True, as all possible links are tissue-substrate links
-        """
-        add_links, add_probs, add_bools = [], [], []
-        for i in range(self.N):
-            for j in range(self.mysubs.Nsubs):
-                d = self.tryLink_issubs(i, j)
-                if d > 1e-5:   # if d < 0: link rejected by tryLink
-                    p = 1 - (d / self.d0max)
-                    add_links.append((i, j + self.N))
-                    add_probs.append(p * self.mysubs.p_add)
-                    add_bools.append(True)
-        return np.array([add_links, add_probs, add_bools])
+        New links based on all pairs of the tissue node and the substrate nodes.
+        :return: tuple of three numpy arrays: (a) integer array of shape (n, 2) of n possible new links, each entry
+        containing the indices of the nodes connected by the link. Substrate nodes are numbered as continuation of
+        tissue-node-list. (b) float array of shape (n) of addition probabilities, calculated according to eq. 21 of
+        czirok2014cell. (c) boolean array of shape (n) set to True, as all possible links are tissue-substrate links
+        """
+        n1, n2 = [i.ravel() for i in np.indices((self.N, self.mysubs.Nsubs))]
+        d = self.tryLink_issubs(n1, n2)
+        ok = d > 1e-5  # if d < 0: link rejected by tryLink
+        p = 1 - (d[ok] / self.d0max)
+        return np.stack((n1[ok], n2[ok] + self.N), axis=1), p * self.mysubs.p_add, np.ones(len(p), bool)
 
     def pickEvent(self, to_del, to_add):
         """
         Decide on next plasticity step, whether to add a link, delete one or do nothing. Decision based on Gillespie
         algorithm
-        :param to_del: numpy array returned by self.delLinkList()
-        :param to_add: numpy array returned by self.addLinkList()
+        :param to_del: tuple of numpy arrays returned by self.delLinkList()
+        :param to_add: tuple of numpy arrays returned by self.addLinkList()
         :return: time taken up by plasticity step
         """
         l_del, p_del, boo_del = to_del
@@ -1437,9 +3274,11 @@ class CellMech:
             ni = np.where(R < 0)[0][0]
             if not boo_del[ni]:  # link to be removed is tissue-tissue link
                 self.mynodes.removelink(l_del[ni][0], l_del[ni][1])
+                self.markModified(l_del[ni][0], l_del[ni][1])
                 return dt
             else:  # link to be removed is tissue-substrate link
                 self.mysubs.removelink(l_del[ni][0], l_del[ni][1])
+                self.markModified(l_del[ni][0], self.N + l_del[ni][1])
                 return dt
 
         r = r - s1
@@ -1448,13 +3287,25 @@ class CellMech:
             ni = np.where(R < 0)[0][0]
             if not boo_add[ni]:  # link to be removed is tissue-tissue link
                 self.mynodes.addlink(l_add[ni][0], l_add[ni][1])
+                self.markModified(l_add[ni][0], l_add[ni][1])
                 return dt
             else:  # link to be added is tissue-substrate link
                 n1 = l_add[ni][0]
                 n2 = l_add[ni][1]
                 self.mysubs.addlink(n1, n2 - self.N, self.mynodes.nodesX[n1], self.mynodes.nodesPhi[n1])
+                self.markModified(n1, n2)
                 return dt
 
+    def markModified(self, n1, n2):
+        """
+        Remember the nodes at a link modified since the last equilibration, for mechEquilibrium_local()
+        :param n1: index of the tissue node at one end of the link
+        :param n2: index of the node at the other end of the link, N + j for substrate node j
+        :return:
+        """
+        if self.modified is not None:
+            self.modified += [n1, n2]
+
     def modlink(self):
         """
         Perform a plasticity event (add or delete a link)
@@ -1479,9 +3330,8 @@ class CellMech:
         """
         self.mynodes.nodesnap.append(self.mynodes.nodesX.copy())
         self.mynodes.fnodesnap.append(self.mynodes.Fnode.copy())
-        linkList = self.mynodes.getLinkList()
-        self.mynodes.linksnap.append(linkList)
-        self.mynodes.flinksnap.append(self.mynodes.Flink[linkList[..., 0], linkList[..., 1]])
+        self.mynodes.linksnap.append(self.mynodes.getLinkList())
+        self.mynodes.flinksnap.append(self.mynodes.Flink[self.mynodes.getSlots()])
         self.snaptimes.append(t)
 
     def makesnap_withsubs(self, t):
@@ -1494,12 +3344,10 @@ class CellMech:
         self.mynodes.nodesnap.append(self.mynodes.nodesX.copy())
         self.mynodes.fnodesnap.append(self.mynodes.Fnode.copy())
         self.mysubs.fnodesnap.append(self.mysubs.Fnode.copy())
-        linkList = self.mynodes.getLinkList()
-        self.mynodes.linksnap.append(linkList)
-        self.mynodes.flinksnap.append(self.mynodes.Flink[linkList[..., 0], linkList[..., 1]])
-        linkList = self.mysubs.getLinkList()
-        self.mysubs.linksnap.append(linkList)
-        self.mysubs.flinksnap.append(-self.mysubs.Flink[linkList[..., 0], linkList[..., 1]])
+        self.mynodes.linksnap.append(self.mynodes.getLinkList())
+        self.mynodes.flinksnap.append(self.mynodes.Flink[self.mynodes.getSlots()])
+        self.mysubs.linksnap.append(self.mysubs.getLinkList())
+        self.mysubs.flinksnap.append(-self.mysubs.Flink[self.mysubs.getSlots()])
         self.snaptimes.append(t)
 
     def makesnap_lonesome(self, t):
@@ -1512,9 +3360,8 @@ class CellMech:
         self.mynodes.nodesnap.append(self.mynodes.nodesX.copy())
         self.mynodes.fnodesnap.append(self.mynodes.Fnode.copy())
         self.mysubs.fnodesnap.append(self.mysubs.Fnode.copy())
-        linkList = self.mysubs.getLinkList()
-        self.mysubs.linksnap.append(linkList)
-        self.mysubs.flinksnap.append(-self.mysubs.Flink[linkList[..., 0], linkList[..., 1]])
+        self.mysubs.linksnap.append(self.mysubs.getLinkList())
+        self.mysubs.flinksnap.append(-self.mysubs.Flink[self.mysubs.getSlots()])
         self.snaptimes.append(t)
 
     def saveonesnap(self, savewhat, savedir, savelist):
@@ -1547,7 +3394,7 @@ class CellMech:
         :param saved0: boolean, whether to save last d0 values (only needed in case of later relaunch)
         :return:
         """
-        linklist = np.where(self.mynodes.islink == True)
+        slots, ends = self.mynodes.getDirectedLinks()
         if not os.path.isdir("./" + savedir):
             os.mkdir("./" + savedir)
         if savenodes_r:
@@ -1564,14 +3411,14 @@ class CellMech:
         if savephi:
             np.save(savedir + "/phi", self.mynodes.nodesPhi)
         if savetang:
-            np.save(savedir + "/tang", self.mynodes.t[linklist])
+            np.save(savedir + "/tang", self.mynodes.t[slots, ends])
         if savenorm:
-            np.save(savedir + "/norm", self.mynodes.norm[linklist])
+            np.save(savedir + "/norm", self.mynodes.norm[slots, ends])
         if saved0:
-            np.save(savedir + "/d0", self.mynodes.d0[linklist])
+            np.save(savedir + "/d0", self.mynodes.d0[slots])
 
         if self.issubs:
-            linklist = np.where(self.mysubs.islink == True)
+            slots = self.mysubs.getOrderedSlots()
             if savenodes_r:
                 np.save(savedir + "/subsnodesr", self.mysubs.nodesX)
             if savenodes_f:
@@ -1583,13 +3430,13 @@ class CellMech:
             if savephi:
                 np.save(savedir + "/subsphi", self.mysubs.nodesPhi)
             if savetang:
-                np.save(savedir + "/substcell", self.mysubs.tcell[linklist])
-                np.save(savedir + "/substsubs", self.mysubs.tsubs[linklist])
+                np.save(savedir + "/substcell", self.mysubs.tcell[slots])
+                np.save(savedir + "/substsubs", self.mysubs.tsubs[slots])
             if savenorm:
-                np.save(savedir + "/subsnormcell", self.mysubs.normcell[linklist])
-                np.save(savedir + "/subsnormsubs", self.mysubs.normsubs[linklist])
+                np.save(savedir + "/subsnormcell", self.mysubs.normcell[slots])
+                np.save(savedir + "/subsnormsubs", self.mysubs.normsubs[slots])
             if saved0:
-                np.save(savedir + "/subsd0", self.mysubs.d0[linklist])
+                np.save(savedir + "/subsd0", self.mysubs.d0[slots])
 
         self.nsaves += 1
 
@@ -1663,10 +3510,9 @@ class CellMech:
         # pre-production
 
         if isinit:
-            myrandom = npr.random((self.mynodes.randomlength,))
-            self.mynodes.randomsummand[self.mynodes.lowers] = myrandom
-            self.mynodes.randomsummand.T[self.mynodes.lowers] = myrandom
-            self.mynodes.d0 += 0.04 * self.mynodes.randomsummand
+            slots = self.mynodes.getSlots()
+            self.mynodes.d0[slots] += 0.04 * npr.random((len(slots),))
+            self.mynodes.d0version += 1
             t = 0
             if record:
                 self.makesnap(t)
@@ -1713,20 +3559,16 @@ class CellMech:
         linkList = self.mynodes.getLinkList()
         # reshape X and Phi for solveivp
         x = np.concatenate((self.mynodes.nodesX, self.mynodes.nodesPhi), axis=0).flatten()
-        t, norm, normT, bend, twist, k, d0, nodeinds = self.mynodes.compactStuffINeed()
+        t, norm, bend, twist, k, d0, nodeinds = self.mynodes.compactStuffINeed()
 
         # produce fun for solve_ivp as lambda
-        def notatallfun(temp, y): return self.mynodes.getForces(y, t, norm, normT, bend, twist, k, d0, nodeinds)
+        def notatallfun(temp, y): return self.mynodes.getForces(y, t, norm, bend, twist, k, d0, nodeinds)
 
-        # produce event function to check whether to end solve_ivp
-        def event(temp, y):
-            k1 = self.mynodes.getForces(y, t, norm, normT, bend, twist, k, d0, nodeinds)
-            return np.max(np.abs(k1) - self.qmin)
-        event.terminal = True
-        event.direction = -1
+        # produce Jacobian of fun for solve_ivp
+        def jac(temp, y): return self.mynodes.getJacobian(y, t, norm, bend, twist, k, d0, nodeinds)
 
         # perform equilibration
-        res = solve_ivp(fun=notatallfun, t_span=[0, self.tmax], y0=x, events=[event], method="LSODA", atol=1e-3)
+        res = self.solveEquilibrium(notatallfun, self.qmin, jac, x, self.mynodes, stride=1)
 
         # reshape data returned by solve_ivp to date readable by class and save it in appropriate places
         x = res.y.reshape((-1, 3, len(res.t)))
@@ -1746,23 +3588,15 @@ class CellMech:
         linkList = self.mynodes.getLinkList()
         # reshape X and Phi for solveivp
         x = np.concatenate((self.mynodes.nodesX, self.mynodes.nodesPhi, self.mysubs.nodesPhi), axis=0).flatten()
-        t, norm, normT, bend, twist, k, d0, nodeinds = self.mynodes.compactStuffINeed()
-        tcell, tsubs, normcell, normsubs, bends, twists, ks, d0s, nodeindss = self.mysubs.compactStuffINeed()
+        t, norm, bend, twist, k, d0, nodeinds = self.mycombined.compactStuffINeed()
 
         # produce fun for solve_ivp as lambda
-        def notatallfun(temp, y): return self.mynodes.getForces(y, t, norm, normT, bend, twist, k, d0, nodeinds) + \
-                                         self.mysubs.getForces(y, tcell, tsubs, normcell, normsubs,
-                                                               bends, twists, ks, d0s, nodeindss)
+        def notatallfun(temp, y): return self.mycombined.getForces(y, t, norm, bend, twist, k, d0, nodeinds)
 
-        # produce event function to check wether to end solve_ivp
-        def event(temp, y):
-            k1 = self.mynodes.getForces(y, t, norm, normT, bend, twist, k, d0, nodeinds) + \
-                 self.mysubs.getForces(y, tcell, tsubs, normcell, normsubs, bends, twists, ks, d0s, nodeindss)
-            return np.max(np.abs(k1) - self.qmin)
-        event.terminal = True
-        event.direction = -1
+        # produce Jacobian of fun for solve_ivp
+        def jac(temp, y): return self.mycombined.getJacobian(y, t, norm, bend, twist, k, d0, nodeinds)
 
-        res = solve_ivp(fun=notatallfun, t_span=[0, self.tmax], y0=x, events=[event], method="LSODA", atol=1e-3)
+        res = self.solveEquilibrium(notatallfun, self.qmin, jac, x, self.mycombined, stride=1)
         # reshape data returned by solve_ivp to date readable by class and save it in appropriate places
         x = res.y.reshape((-1, 3, len(res.t)))
         self.snaptimes = res.t
@@ -0,0 +1,217 @@
+"""
+Compiled force kernels for classes NodeConfiguration and SubsConfiguration in cell.py. Each kernel calculates
+distances, link forces and torques and the sums on the nodes in one loop over the links, using quaternions to rotate
+the link vectors. Importing this module requires numba, cell.py falls back to its numpy implementation without it.
+"""
+
+from __future__ import division
+
+from math import sqrt, sin, cos
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def getQuats(Phis):
+    """
+    Calculate quaternions from vectors indicating the rotation axis, same as cell.getQuatArray()
+    :param Phis: numpy array of shape (n, 3)
+    :return: numpy array of shape (n, 4)
+    """
+    Quats = np.empty((Phis.shape[0], 4))
+    for i in range(Phis.shape[0]):
+        theta = sqrt(Phis[i, 0] * Phis[i, 0] + Phis[i, 1] * Phis[i, 1] + Phis[i, 2] * Phis[i, 2])
+        s = sin(theta / 2)
+        if theta > 1e-5:  # filter for division by 0
+            s /= theta
+        Quats[i, 0] = cos(theta / 2)
+        Quats[i, 1] = Phis[i, 0] * s
+        Quats[i, 2] = Phis[i, 1] * s
+        Quats[i, 3] = Phis[i, 2] * s
+    return Quats
+
+
+@njit(cache=True)
+def rotate(Quats, i, v0, v1, v2):
+    """
+    Rotate vector (v0, v1, v2) with quaternion Quats[i], same as cell.rotateQuatArray()
+    :return: tuple, the components of the rotated vector
+    """
+    a, b, c, d = Quats[i, 0], Quats[i, 1], Quats[i, 2], Quats[i, 3]
+    f = a * a - (b * b + c * c + d * d)
+    uv = 2 * (b * v0 + c * v1 + d * v2)
+    return (f * v0 + uv * b + 2 * a * (c * v2 - d * v1),
+            f * v1 + uv * c + 2 * a * (d * v0 - b * v2),
+            f * v2 + uv * d + 2 * a * (b * v1 - c * v0))
+
+
+@njit(cache=True)
+def cross(a0, a1, a2, b0, b1, b2):
+    """
+    Cross product of vectors (a0, a1, a2) and (b0, b1, b2)
+    :return: tuple, the components of the cross product
+    """
+    return a1 * b2 - a2 * b1, a2 * b0 - a0 * b2, a0 * b1 - a1 * b0
+
+
+@njit(cache=True)
+def normTilde(n0, n1, n2, e0, e1, e2):
+    """
+    Project vector (n0, n1, n2) onto the plane perpendicular to link direction (e0, e1, e2) and normalize it
+    (the vector n tilde of czirok2014cell)
+    :return: tuple, the components of the projected vector
+    """
+    ne = n0 * e0 + n1 * e1 + n2 * e2
+    n0, n1, n2 = n0 - ne * e0, n1 - ne * e1, n2 - ne * e2
+    l = sqrt(n0 * n0 + n1 * n1 + n2 * n2)
+    if l > 1e-5:  # filter for division by 0
+        n0, n1, n2 = n0 / l, n1 / l, n2 / l
+    return n0, n1, n2
+
+
+@njit(cache=True)
+def nodeForces(X, Phi, T, Norm, Bend, Twist, K, D0, inds0, inds1, istwist, E, D, Flink, Ftens, Mlink, Fnode, Mnode):
+    """
+    Calculate forces and torques of tissue-tissue links and sum them on the tissue nodes. Input except for X, Phi
+    and the output arrays in shape returned by NodeConfiguration.compactStuffINeed()
+    :param X: numpy array of shape (n, 3), positions of tissue nodes
+    :param Phi: numpy array of shape (n, 3), orientations of tissue nodes
+    :param istwist: bool, whether or not twist torques are included (3-d-simulations)
+    :param E: output, numpy array of shape (nl, 3) for normed link directions
+    :param D: output, numpy array of shape (nl) for link lengths
+    :param Flink: output, numpy array of shape (nl, 3) for the forces acting on end 0 of the links
+    :param Ftens: output, numpy array of shape (nl) for the tensile link forces
+    :param Mlink: output, numpy array of shape (nl, 2, 3) for the torques acting on both link ends
+    :param Fnode: output, numpy array of shape (n, 3) for the summed forces on the tissue nodes
+    :param Mnode: output, numpy array of shape (n, 3) for the summed torques on the tissue nodes
+    :return:
+    """
+    Quats = getQuats(Phi)
+    Fnode[:] = 0.
+    Mnode[:] = 0.
+    for l in range(inds0.shape[0]):
+        i, j = inds0[l], inds1[l]
+        e0, e1, e2 = X[j, 0] - X[i, 0], X[j, 1] - X[i, 1], X[j, 2] - X[i, 2]
+        d = sqrt(e0 * e0 + e1 * e1 + e2 * e2)
+        if d > 1e-5:  # filter for division by 0
+            e0, e1, e2 = e0 / d, e1 / d, e2 / d
+
+        # Eq 3 and Eq 5
+        t0, t1, t2 = rotate(Quats, i, T[l, 0, 0], T[l, 0, 1], T[l, 0, 2])
+        m00, m01, m02 = cross(t0, t1, t2, e0, e1, e2)
+        t0, t1, t2 = rotate(Quats, j, T[l, 1, 0], T[l, 1, 1], T[l, 1, 2])
+        m10, m11, m12 = cross(t0, t1, t2, -e0, -e1, -e2)
+        m00, m01, m02 = Bend[l] * m00, Bend[l] * m01, Bend[l] * m02
+        m10, m11, m12 = Bend[l] * m10, Bend[l] * m11, Bend[l] * m12
+        if istwist:
+            n0, n1, n2 = rotate(Quats, i, Norm[l, 0, 0], Norm[l, 0, 1], Norm[l, 0, 2])
+            n0, n1, n2 = normTilde(n0, n1, n2, e0, e1, e2)
+            o0, o1, o2 = rotate(Quats, j, Norm[l, 1, 0], Norm[l, 1, 1], Norm[l, 1, 2])
+            o0, o1, o2 = normTilde(o0, o1, o2, e0, e1, e2)
+            mt0, mt1, mt2 = cross(n0, n1, n2, o0, o1, o2)
+            m00, m01, m02 = m00 + Twist[l] * mt0, m01 + Twist[l] * mt1, m02 + Twist[l] * mt2
+            m10, m11, m12 = m10 - Twist[l] * mt0, m11 - Twist[l] * mt1, m12 - Twist[l] * mt2
+
+        # Eqs. 10, 13, 14, 15
+        ftens = K[l] * (d - D0[l])
+        f0, f1, f2 = cross(m00 + m10, m01 + m11, m02 + m12, e0, e1, e2)
+        if d > 1e-5:  # filter for division by 0
+            f0, f1, f2 = f0 / d, f1 / d, f2 / d
+        f0, f1, f2 = ftens * e0 + f0, ftens * e1 + f1, ftens * e2 + f2
+
+        E[l, 0], E[l, 1], E[l, 2] = e0, e1, e2
+        D[l] = d
+        Ftens[l] = ftens
+        Flink[l, 0], Flink[l, 1], Flink[l, 2] = f0, f1, f2
+        Mlink[l, 0, 0], Mlink[l, 0, 1], Mlink[l, 0, 2] = m00, m01, m02
+        Mlink[l, 1, 0], Mlink[l, 1, 1], Mlink[l, 1, 2] = m10, m11, m12
+        Fnode[i, 0] += f0
+        Fnode[i, 1] += f1
+        Fnode[i, 2] += f2
+        Fnode[j, 0] -= f0
+        Fnode[j, 1] -= f1
+        Fnode[j, 2] -= f2
+        Mnode[i, 0] += m00
+        Mnode[i, 1] += m01
+        Mnode[i, 2] += m02
+        Mnode[j, 0] += m10
+        Mnode[j, 1] += m11
+        Mnode[j, 2] += m12
+
+
+@njit(cache=True)
+def subsForces(X, XSubs, Phi, PhiSubs, TCell, TSubs, NormCell, NormSubs, Bend, Twist, K, D0, inds0, inds1,
+               E, D, Flink, Ftens, Mcelllink, Msubslink, Fcell, Mcell, Fsubs, Msubs):
+    """
+    Calculate forces and torques of tissue-substrate links and sum them on the tissue and substrate nodes. Input
+    except for positions, orientations and the output arrays in shape returned by
+    SubsConfiguration.compactStuffINeed()
+    :param X: numpy array of shape (n, 3), positions of tissue nodes
+    :param XSubs: numpy array of shape (nsubs, 3), positions of substrate nodes
+    :param Phi: numpy array of shape (n, 3), orientations of tissue nodes
+    :param PhiSubs: numpy array of shape (nsubs, 3), orientations of substrate nodes
+    :param E: output, numpy array of shape (nl, 3) for normed link directions
+    :param D: output, numpy array of shape (nl) for link lengths
+    :param Flink: output, numpy array of shape (nl, 3) for the link forces
+    :param Ftens: output, numpy array of shape (nl) for the tensile link forces
+    :param Mcelllink: output, numpy array of shape (nl, 3) for the torques acting on the tissue nodes
+    :param Msubslink: output, numpy array of shape (nl, 3) for the torques acting on the substrate nodes
+    :param Fcell: output, numpy array of shape (n, 3) for the summed forces on the tissue nodes
+    :param Mcell: output, numpy array of shape (n, 3) for the summed torques on the tissue nodes
+    :param Fsubs: output, numpy array of shape (nsubs, 3) for the summed forces on the substrate nodes
+    :param Msubs: output, numpy array of shape (nsubs, 3) for the summed torques on the substrate nodes
+    :return:
+    """
+    Quats = getQuats(Phi)
+    QuatsSubs = getQuats(PhiSubs)
+    Fcell[:] = 0.
+    Mcell[:] = 0.
+    Fsubs[:] = 0.
+    Msubs[:] = 0.
+    for l in range(inds0.shape[0]):
+        i, j = inds0[l], inds1[l]
+        e0, e1, e2 = XSubs[j, 0] - X[i, 0], XSubs[j, 1] - X[i, 1], XSubs[j, 2] - X[i, 2]
+        d = sqrt(e0 * e0 + e1 * e1 + e2 * e2)
+        if d > 1e-5:  # filter for division by 0
+            e0, e1, e2 = e0 / d, e1 / d, e2 / d
+
+        n0, n1, n2 = rotate(Quats, i, NormCell[l, 0], NormCell[l, 1], NormCell[l, 2])
+        n0, n1, n2 = normTilde(n0, n1, n2, e0, e1, e2)
+        o0, o1, o2 = rotate(QuatsSubs, j, NormSubs[l, 0], NormSubs[l, 1], NormSubs[l, 2])
+        o0, o1, o2 = normTilde(o0, o1, o2, e0, e1, e2)
+        mt0, mt1, mt2 = cross(n0, n1, n2, o0, o1, o2)
+
+        # Eq 5 for cells and substrate
+        t0, t1, t2 = rotate(Quats, i, TCell[l, 0], TCell[l, 1], TCell[l, 2])
+        m00, m01, m02 = cross(t0, t1, t2, e0, e1, e2)
+        m00, m01, m02 = Bend[l] * m00 + Twist[l] * mt0, Bend[l] * m01 + Twist[l] * mt1, Bend[l] * m02 + Twist[l] * mt2
+        t0, t1, t2 = rotate(QuatsSubs, j, TSubs[l, 0], TSubs[l, 1], TSubs[l, 2])
+        m10, m11, m12 = cross(t0, t1, t2, -e0, -e1, -e2)
+        m10, m11, m12 = Bend[l] * m10 - Twist[l] * mt0, Bend[l] * m11 - Twist[l] * mt1, Bend[l] * m12 - Twist[l] * mt2
+
+        # Eqs. 10, 13, 14, 15
+        ftens = K[l] * (d - D0[l])
+        f0, f1, f2 = cross(m00 + m10, m01 + m11, m02 + m12, e0, e1, e2)
+        if d > 1e-5:  # filter for division by 0
+            f0, f1, f2 = f0 / d, f1 / d, f2 / d
+        f0, f1, f2 = ftens * e0 + f0, ftens * e1 + f1, ftens * e2 + f2
+
+        E[l, 0], E[l, 1], E[l, 2] = e0, e1, e2
+        D[l] = d
+        Ftens[l] = ftens
+        Flink[l, 0], Flink[l, 1], Flink[l, 2] = f0, f1, f2
+        Mcelllink[l, 0], Mcelllink[l, 1], Mcelllink[l, 2] = m00, m01, m02
+        Msubslink[l, 0], Msubslink[l, 1], Msubslink[l, 2] = m10, m11, m12
+        Fcell[i, 0] += f0
+        Fcell[i, 1] += f1
+        Fcell[i, 2] += f2
+        Mcell[i, 0] += m00
+        Mcell[i, 1] += m01
+        Mcell[i, 2] += m02
+        Fsubs[j, 0] += f0
+        Fsubs[j, 1] += f1
+        Fsubs[j, 2] += f2
+        Msubs[j, 0] += m10
+        Msubs[j, 1] += m11
+        Msubs[j, 2] += m12
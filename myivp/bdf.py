@@ -137,9 +137,17 @@ class BDF(OdeSolver):
         elements in *each* row, providing the sparsity structure will greatly
         speed up the computations [4]_. A zero entry means that a corresponding
         element in the Jacobian is always zero. If None (default), the Jacobian
-        is assumed to be dense.
+        is assumed to be dense. Can also be a tuple (structure, groups) with
+        the column groups already set up by
+        ``scipy.optimize._numdiff.group_columns``, which saves setting them up
+        again when the structure doesn't change between calls.
     vectorized : bool, optional
         Whether `fun` is implemented in a vectorized fashion. Default is False.
+    jac0 : {None, array_like, sparse matrix}, optional
+        Initial approximation of the Jacobian, e.g. kept from a previous
+        integration of a similar problem, used instead of evaluating the
+        Jacobian at `t0`. It's treated as outdated and replaced as soon as
+        Newton iterations fail to converge. Default is None.
 
     Attributes
     ----------
@@ -181,7 +189,7 @@ class BDF(OdeSolver):
     """
     def __init__(self, fun, t0, y0, t_bound, max_step=np.inf,
                  rtol=1e-3, atol=1e-6, jac=None, jac_sparsity=None,
-                 vectorized=False, **extraneous):
+                 vectorized=False, jac0=None, **extraneous):
         warn_extraneous(extraneous)
         super(BDF, self).__init__(fun, t0, y0, t_bound, vectorized,
                                   support_complex=True)
@@ -197,7 +205,7 @@ class BDF(OdeSolver):
         self.newton_tol = max(10 * EPS / rtol, min(0.03, rtol ** 0.5))
 
         self.jac_factor = None
-        self.jac, self.J = self._validate_jac(jac, jac_sparsity)
+        self.jac, self.J = self._validate_jac(jac, jac_sparsity, jac0)
         if issparse(self.J):
             def lu(A):
                 self.nlu += 1
@@ -235,12 +243,14 @@ class BDF(OdeSolver):
         self.n_equal_steps = 0
         self.LU = None
 
-    def _validate_jac(self, jac, sparsity):
+    def _validate_jac(self, jac, sparsity, J0=None):
         t0 = self.t
         y0 = self.y
 
         if jac is None:
-            if sparsity is not None:
+            if isinstance(sparsity, tuple):
+                sparsity = (csc_matrix(sparsity[0]), sparsity[1])  # column groups set up by the caller
+            elif sparsity is not None:
                 if issparse(sparsity):
                     sparsity = csc_matrix(sparsity)
                 groups = group_columns(sparsity)
@@ -253,10 +263,16 @@ class BDF(OdeSolver):
                                              self.atol, self.jac_factor,
                                              sparsity)
                 return J
-            J = jac_wrapped(t0, y0)
+            if J0 is None:
+                J = jac_wrapped(t0, y0)
+            else:
+                J = csc_matrix(J0) if issparse(J0) else np.asarray(J0)
         elif callable(jac):
-            J = jac(t0, y0)
-            self.njev += 1
+            if J0 is None:
+                J = jac(t0, y0)
+                self.njev += 1
+            else:
+                J = J0
             if issparse(J):
                 J = csc_matrix(J, dtype=y0.dtype)
 
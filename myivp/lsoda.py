@@ -158,6 +158,10 @@ class LSODA(OdeSolver):
             # From LSODA Fortran source njev is equal to nlu.
             self.njev = integrator.iwork[12]
             self.nlu = integrator.iwork[12]
+            # Estimate of the derivative at the new state without calling
+            # fun: the second column of the Nordsieck array holds h * y'.
+            self.f_estimate = (integrator.rwork[20 + self.n:20 + 2 * self.n] /
+                               integrator.rwork[11])
             return True, None
         else:
             return False, 'Unexpected istate in LSODA.'
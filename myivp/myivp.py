@@ -4,6 +4,7 @@ import numpy as np
 from .bdf import BDF
 from .radau import Radau
 from .rk import RK23, RK45
+from .rkc import RKC
 from .lsoda import LSODA
 from scipy.optimize import OptimizeResult
 from .common import EPS, OdeSolution
@@ -14,7 +15,8 @@ METHODS = {'RK23': RK23,
            'RK45': RK45,
            'Radau': Radau,
            'BDF': BDF,
-           'LSODA': LSODA}
+           'LSODA': LSODA,
+           'RKC': RKC}
 
 
 MESSAGES = {0: "The solver successfully reached the end of the integration interval.",
@@ -155,7 +157,8 @@ def find_active_events(g, g_new, direction):
 
 
 def solve_ivp(fun, t_span, y0, method='RK45', t_eval=None, dense_output=False,
-              events=None, vectorized=False, **options):
+              events=None, vectorized=False, stride=1, callback=None,
+              converged=None, **options):
     """Solve an initial value problem for a system of ODEs.
 
     This function numerically integrates a system of ordinary differential
@@ -220,6 +223,13 @@ def solve_ivp(fun, t_span, y0, method='RK45', t_eval=None, dense_output=False,
             * 'LSODA': Adams/BDF method with automatic stiffness detection and
               switching [7]_, [8]_. This is a wrapper of the Fortran solver
               from ODEPACK.
+            * 'RKC': Stabilized explicit Runge-Kutta-Chebyshev method of
+              order 2 [12]_ for stiff problems with a Jacobian with eigenvalues
+              close to the negative real axis. The number of stages grows with
+              the step size and the spectral radius of the Jacobian, which is
+              estimated by power iteration. Neither the Jacobian nor linear
+              systems are needed. A cubic Hermite polynomial is used for the
+              dense output.
 
         You should use the 'RK45' or 'RK23' method for non-stiff problems and
         'Radau' or 'BDF' for stiff problems [9]_. If not sure, first try to run
@@ -254,6 +264,27 @@ def solve_ivp(fun, t_span, y0, method='RK45', t_eval=None, dense_output=False,
         function in Python. If None (default), events won't be tracked.
     vectorized : bool, optional
         Whether `fun` is implemented in a vectorized fashion. Default is False.
+    stride : int or None, optional
+        Only used if `t_eval` is None. Keep the initial state and every
+        `stride`-th step in the solution, the final step is always kept.
+        If None, only the final state is kept, so that memory doesn't grow
+        with the number of steps. Default is 1 (all steps).
+    callback : callable or None, optional
+        Function called as ``callback(t, y)`` after each step, e.g. to
+        process intermediate states which are not kept. Default is None.
+    converged : callable, float or None, optional
+        Convergence check for integrating towards a steady state, done after
+        each step with the derivative ``f`` at the new state. The value kept
+        by the solver is used if there is one (RK23, RK45, Radau, RKC). LSODA
+        and BDF keep no derivative at the accepted state and never evaluate
+        `fun` there. LSODA estimates it from its Nordsieck array, and `fun`
+        is only evaluated for the check once the halved estimate passes it
+        or on every 10th step. BDF costs one extra evaluation of `fun` per
+        step. If callable, it must have the signature ``converged(t, y, f)``,
+        terminate the integration by returning True and only pass for small
+        ``abs(f)``. If float, the integration terminates when
+        ``max(abs(f))`` is below it. Cheaper than a terminal event calling
+        `fun` again, and the status is the same. Default is None.
     options
         Options passed to a chosen solver. All options available for already
         implemented solvers are listed below.
@@ -294,7 +325,9 @@ def solve_ivp(fun, t_span, y0, method='RK45', t_eval=None, dense_output=False,
         elements in *each* row, providing the sparsity structure will greatly
         speed up the computations [10]_. A zero entry means that a corresponding
         element in the Jacobian is always zero. If None (default), the Jacobian
-        is assumed to be dense.
+        is assumed to be dense. Can also be a tuple (structure, groups) with
+        the column groups already set up by
+        ``scipy.optimize._numdiff.group_columns``.
         Not supported by 'LSODA', see `lband` and `uband` instead.
     lband, uband : int or None
         Parameters defining the bandwidth of the Jacobian for the 'LSODA' method,
@@ -310,12 +343,17 @@ def solve_ivp(fun, t_span, y0, method='RK45', t_eval=None, dense_output=False,
         The minimum allowed step size and the initial step size respectively
         for 'LSODA' method. By default `min_step` is zero and `first_step` is
         selected automatically.
+    jac0 : {None, array_like, sparse matrix}, optional
+        Initial approximation of the Jacobian for 'BDF' and 'Radau' methods,
+        e.g. kept from a previous integration of a similar problem. It is used
+        instead of evaluating the Jacobian at `t0` and replaced as soon as
+        Newton iterations fail to converge.
 
     Returns
     -------
     Bunch object with the following fields defined:
     t : ndarray, shape (n_points,)
-        Time points.
+        Time points. Only the final time if `stride` is None.
     y : ndarray, shape (n, n_points)
         Values of the solution at `t`.
     sol : `OdeSolution` or None
@@ -330,12 +368,15 @@ def solve_ivp(fun, t_span, y0, method='RK45', t_eval=None, dense_output=False,
         Number of evaluations of the Jacobian.
     nlu : int
         Number of LU decompositions.
+    solver : OdeSolver
+        The solver instance in its final state, e.g. to warm-start a
+        following integration of a similar problem.
     status : int
         Reason for algorithm termination:
 
             * -1: Integration step failed.
             *  0: The solver successfully reached the end of `tspan`.
-            *  1: A termination event occurred.
+            *  1: A termination event occurred or `converged` was met.
 
     message : string
         Human-readable description of the termination reason.
@@ -374,6 +415,9 @@ def solve_ivp(fun, t_span, y0, method='RK45', t_eval=None, dense_output=False,
     .. [11] `Cauchy-Riemann equations
              <https://en.wikipedia.org/wiki/Cauchy-Riemann_equations>`_ on
              Wikipedia.
+    .. [12] B. P. Sommeijer, L. F. Shampine, J. G. Verwer, "RKC: An explicit
+            solver for parabolic PDEs", J. Comput. Appl. Math. 88, pp. 315-326,
+            1998.
 
     Examples
     --------
@@ -453,12 +497,14 @@ def solve_ivp(fun, t_span, y0, method='RK45', t_eval=None, dense_output=False,
 
     solver = method(fun, t0, y0, tf, vectorized=vectorized, **options)
 
-    if t_eval is None:
+    if t_eval is None and stride is not None:
         ts = [t0]
         ys = [y0]
     else:
         ts = []
         ys = []
+    t_last, y_last = t0, y0
+    n_steps = 0
 
     interpolants = []
 
@@ -470,7 +516,12 @@ def solve_ivp(fun, t_span, y0, method='RK45', t_eval=None, dense_output=False,
     else:
         t_events = None
 
+    if converged is not None and not callable(converged):
+        fmax = converged
+        converged = lambda t, y, f: np.max(np.abs(f)) < fmax
+
     status = None
+    n_skipped = 0
     while status is None:
         message = solver.step()
 
@@ -513,9 +564,30 @@ def solve_ivp(fun, t_span, y0, method='RK45', t_eval=None, dense_output=False,
 
             g = g_new
 
+        if converged is not None and status is None:
+            f = getattr(solver, 'f', None)
+            if f is None:
+                # Only call fun once the estimate is close to convergence, but
+                # at least every 10th step as the estimate can be far off.
+                f_estimate = getattr(solver, 'f_estimate', None)
+                if (f_estimate is None or n_skipped == 9 or
+                        converged(t, y, 0.5 * f_estimate)):
+                    f = solver.fun(t, y)
+                    n_skipped = 0
+                else:
+                    n_skipped += 1
+            if f is not None and converged(t, y, f):
+                status = 1
+
+        if callback is not None:
+            callback(t, y)
+
         if t_eval is None:
-            ts.append(t)
-            ys.append(y)
+            n_steps += 1
+            if stride is not None and n_steps % stride == 0:
+                ts.append(t)
+                ys.append(y)
+            t_last, y_last = t, y
         else:
             # The value in t_eval equal to t will be included.
             if solver.direction > 0:
@@ -541,6 +613,9 @@ def solve_ivp(fun, t_span, y0, method='RK45', t_eval=None, dense_output=False,
         t_events = [np.asarray(te) for te in t_events]
 
     if t_eval is None:
+        if stride is None or n_steps % stride != 0:
+            ts.append(t_last)
+            ys.append(y_last)
         ts = np.array(ts)
         ys = np.vstack(ys).T
     else:
@@ -553,5 +628,5 @@ def solve_ivp(fun, t_span, y0, method='RK45', t_eval=None, dense_output=False,
         sol = None
 
     return OdeResult(t=ts, y=ys, sol=sol, t_events=t_events, nfev=solver.nfev,
-                     njev=solver.njev, nlu=solver.nlu, status=status,
-                     message=message, success=status >= 0)
+                     njev=solver.njev, nlu=solver.nlu, solver=solver,
+                     status=status, message=message, success=status >= 0)
@@ -240,9 +240,17 @@ class Radau(OdeSolver):
         elements in *each* row, providing the sparsity structure will greatly
         speed up the computations [2]_. A zero entry means that a corresponding
         element in the Jacobian is always zero. If None (default), the Jacobian
-        is assumed to be dense.
+        is assumed to be dense. Can also be a tuple (structure, groups) with
+        the column groups already set up by
+        ``scipy.optimize._numdiff.group_columns``, which saves setting them up
+        again when the structure doesn't change between calls.
     vectorized : bool, optional
         Whether `fun` is implemented in a vectorized fashion. Default is False.
+    jac0 : {None, array_like, sparse matrix}, optional
+        Initial approximation of the Jacobian, e.g. kept from a previous
+        integration of a similar problem, used instead of evaluating the
+        Jacobian at `t0`. It's treated as outdated and replaced as soon as
+        Newton iterations fail to converge. Default is None.
 
     Attributes
     ----------
@@ -279,7 +287,7 @@ class Radau(OdeSolver):
     """
     def __init__(self, fun, t0, y0, t_bound, max_step=np.inf,
                  rtol=1e-3, atol=1e-6, jac=None, jac_sparsity=None,
-                 vectorized=False, **extraneous):
+                 vectorized=False, jac0=None, **extraneous):
         warn_extraneous(extraneous)
         super(Radau, self).__init__(fun, t0, y0, t_bound, vectorized)
         self.y_old = None
@@ -298,7 +306,7 @@ class Radau(OdeSolver):
         self.sol = None
 
         self.jac_factor = None
-        self.jac, self.J = self._validate_jac(jac, jac_sparsity)
+        self.jac, self.J = self._validate_jac(jac, jac_sparsity, jac0)
         if issparse(self.J):
             def lu(A):
                 self.nlu += 1
@@ -322,17 +330,19 @@ class Radau(OdeSolver):
         self.solve_lu = solve_lu
         self.I = I
 
-        self.current_jac = True
+        self.current_jac = jac0 is None
         self.LU_real = None
         self.LU_complex = None
         self.Z = None
 
-    def _validate_jac(self, jac, sparsity):
+    def _validate_jac(self, jac, sparsity, J0=None):
         t0 = self.t
         y0 = self.y
 
         if jac is None:
-            if sparsity is not None:
+            if isinstance(sparsity, tuple):
+                sparsity = (csc_matrix(sparsity[0]), sparsity[1])  # column groups set up by the caller
+            elif sparsity is not None:
                 if issparse(sparsity):
                     sparsity = csc_matrix(sparsity)
                 groups = group_columns(sparsity)
@@ -344,10 +354,16 @@ class Radau(OdeSolver):
                                              self.atol, self.jac_factor,
                                              sparsity)
                 return J
-            J = jac_wrapped(t0, y0, self.f)
+            if J0 is None:
+                J = jac_wrapped(t0, y0, self.f)
+            else:
+                J = csc_matrix(J0) if issparse(J0) else np.asarray(J0)
         elif callable(jac):
-            J = jac(t0, y0)
-            self.njev = 1
+            if J0 is None:
+                J = jac(t0, y0)
+                self.njev = 1
+            else:
+                J = J0
             if issparse(J):
                 J = csc_matrix(J)
 
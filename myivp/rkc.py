@@ -0,0 +1,343 @@
+from __future__ import division, print_function, absolute_import
+import numpy as np
+from .base import OdeSolver, DenseOutput
+from .common import (validate_max_step, validate_tol, select_initial_step,
+                     EPS, warn_extraneous)
+
+
+# Damping of the Chebyshev polynomials, shrinks the stability interval by
+# about 5 % but keeps the stability region away from the real axis.
+DAMPING = 2 / 13
+
+MAX_STAGES = 250  # Maximum number of stages in a step.
+RHO_INTERVAL = 25  # Re-estimate the spectral radius after this many steps.
+MAX_POWER_ITER = 50  # Maximum number of iterations for the spectral radius.
+
+
+def rkc_coefficients(s):
+    """Compute the parameters of the damped Chebyshev polynomial of degree s.
+
+    Returns
+    -------
+    w0, w1 : float
+        Shift and scaling of the argument of the Chebyshev polynomial.
+    """
+    w0 = 1 + DAMPING / s ** 2
+    temp1 = w0 ** 2 - 1
+    temp2 = np.sqrt(temp1)
+    arg = s * np.log(w0 + temp2)
+    w1 = np.sinh(arg) * temp1 / (np.cosh(arg) * s * temp2 - w0 * np.sinh(arg))
+    return w0, w1
+
+
+def rkc_step(fun, t, y, f, h, s):
+    """Perform a single step of the second-order RKC method with s stages.
+
+    The stages follow the three-term recursion of the Chebyshev polynomials,
+    so only the two previous stages need to be stored [1]_.
+
+    Parameters
+    ----------
+    fun : callable
+        Right-hand side of the system.
+    t : float
+        Current time.
+    y : ndarray, shape (n,)
+        Current state.
+    f : ndarray, shape (n,)
+        Current value of the derivative, i.e. ``fun(t, y)``.
+    h : float
+        Step to use.
+    s : int
+        Number of stages, at least 2.
+
+    Returns
+    -------
+    y_new : ndarray, shape (n,)
+        Solution at t + h.
+    """
+    w0, w1 = rkc_coefficients(s)
+    b_jm1 = b_jm2 = 1 / (2 * w0) ** 2
+    mus = w1 * b_jm1
+    y_jm2 = y
+    y_jm1 = y + h * mus * f
+    th_jm2, th_jm1 = 0., mus
+    z_jm2, z_jm1 = 1., w0
+    dz_jm2, dz_jm1 = 0., 1.
+    d2z_jm2, d2z_jm1 = 0., 0.
+    for j in range(2, s + 1):
+        z_j = 2 * w0 * z_jm1 - z_jm2
+        dz_j = 2 * w0 * dz_jm1 - dz_jm2 + 2 * z_jm1
+        d2z_j = 2 * w0 * d2z_jm1 - d2z_jm2 + 4 * dz_jm1
+        b_j = d2z_j / dz_j ** 2
+        a_jm1 = 1 - z_jm1 * b_jm1
+        mu = 2 * w0 * b_j / b_jm1
+        nu = -b_j / b_jm2
+        mus = mu * w1 / w0
+        f_jm1 = fun(t + h * th_jm1, y_jm1)
+        y_j = (mu * y_jm1 + nu * y_jm2 + (1 - mu - nu) * y +
+               h * mus * (f_jm1 - a_jm1 * f))
+        th_j = mu * th_jm1 + nu * th_jm2 + mus * (1 - a_jm1)
+
+        b_jm2, b_jm1 = b_jm1, b_j
+        th_jm2, th_jm1 = th_jm1, th_j
+        z_jm2, z_jm1 = z_jm1, z_j
+        dz_jm2, dz_jm1 = dz_jm1, dz_j
+        d2z_jm2, d2z_jm1 = d2z_jm1, d2z_j
+        y_jm2, y_jm1 = y_jm1, y_j
+
+    return y_jm1
+
+
+def spectral_radius(fun, t, y, f, v):
+    """Estimate the spectral radius of the Jacobian by power iteration.
+
+    The products of the Jacobian with the iterated vector are approximated by
+    finite differences of `fun`, so the Jacobian is never formed.
+
+    Parameters
+    ----------
+    fun : callable
+        Right-hand side of the system.
+    t : float
+        Current time.
+    y : ndarray, shape (n,)
+        Current state.
+    f : ndarray, shape (n,)
+        Current value of the derivative, i.e. ``fun(t, y)``.
+    v : ndarray, shape (n,)
+        Initial vector, e.g. the eigenvector of the previous estimate.
+
+    Returns
+    -------
+    rho : float
+        Estimated spectral radius, enlarged by 20 % for safety.
+    v : ndarray, shape (n,)
+        Approximate eigenvector belonging to the largest eigenvalue.
+    """
+    y_norm = np.linalg.norm(y)
+    v_norm_target = np.sqrt(EPS) * y_norm if y_norm > 0 else np.sqrt(EPS)
+    v_norm = np.linalg.norm(v)
+    if v_norm == 0:
+        v = np.ones_like(y)
+        v_norm = np.linalg.norm(v)
+    v = v * (v_norm_target / v_norm)
+    v_norm = v_norm_target
+
+    sigma = 0
+    for _ in range(MAX_POWER_ITER):
+        dv = fun(t, y + v) - f
+        dv_norm = np.linalg.norm(dv)
+        sigma_old = sigma
+        sigma = dv_norm / v_norm
+        if dv_norm == 0:
+            break
+        v = dv * (v_norm / dv_norm)
+        if abs(sigma - sigma_old) <= 0.01 * sigma:
+            break
+
+    return 1.2 * sigma, v
+
+
+class RKC(OdeSolver):
+    """Runge-Kutta-Chebyshev method of order 2.
+
+    A stabilized explicit method for mildly stiff problems whose Jacobian has
+    eigenvalues close to the negative real axis, e.g. from diffusion or
+    overdamped relaxation [1]_. The stages follow damped Chebyshev
+    polynomials whose stability interval grows with the square of their
+    number, which is chosen in each step from the step size and an estimate
+    of the spectral radius of the Jacobian, obtained by power iteration on
+    `fun`. Thus large steps are stable without forming the Jacobian or
+    solving linear systems, and only a few vectors are stored. The error is
+    estimated as in [1]_ and a cubic Hermite polynomial is used for the dense
+    output.
+
+    Parameters
+    ----------
+    fun : callable
+        Right-hand side of the system. The calling signature is ``fun(t, y)``.
+        Here ``t`` is a scalar and ``y`` is an ndarray with shape (n,), ``fun``
+        must return array_like with shape (n,).
+    t0 : float
+        Initial time.
+    y0 : array_like, shape (n,)
+        Initial state.
+    t_bound : float
+        Boundary time - the integration won't continue beyond it. It also
+        determines the direction of the integration.
+    max_step : float, optional
+        Maximum allowed step size. Default is np.inf, i.e. the step size is not
+        bounded and determined solely by the solver.
+    rtol, atol : float and array_like, optional
+        Relative and absolute tolerances. The solver keeps the local error
+        estimates less than ``atol + rtol * abs(y)``. Here `rtol` controls a
+        relative accuracy (number of correct digits). But if a component of `y`
+        is approximately below `atol`, the error only needs to fall within
+        the same `atol` threshold, and the number of correct digits is not
+        guaranteed. If components of y have different scales, it might be
+        beneficial to set different `atol` values for different components by
+        passing array_like with shape (n,) for `atol`. Default values are
+        1e-3 for `rtol` and 1e-6 for `atol`.
+    vectorized : bool, optional
+        Whether `fun` is implemented in a vectorized fashion. Default is False.
+
+    Attributes
+    ----------
+    n : int
+        Number of equations.
+    status : string
+        Current status of the solver: 'running', 'finished' or 'failed'.
+    t_bound : float
+        Boundary time.
+    direction : float
+        Integration direction: +1 or -1.
+    t : float
+        Current time.
+    y : ndarray
+        Current state.
+    t_old : float
+        Previous time. None if no steps were made yet.
+    step_size : float
+        Size of the last successful step. None if no steps were made yet.
+    rho : float
+        Current estimate of the spectral radius of the Jacobian.
+    nfev : int
+        Number evaluations of the system's right-hand side.
+    njev : int
+        Number of evaluations of the Jacobian. Is always 0 for this solver as
+        it does not use the Jacobian.
+    nlu : int
+        Number of LU decompositions. Is always 0 for this solver.
+
+    References
+    ----------
+    .. [1] B. P. Sommeijer, L. F. Shampine, J. G. Verwer, "RKC: An explicit
+           solver for parabolic PDEs", J. Comput. Appl. Math. 88, pp. 315-326,
+           1998.
+    """
+    def __init__(self, fun, t0, y0, t_bound, max_step=np.inf,
+                 rtol=1e-3, atol=1e-6, vectorized=False, **extraneous):
+        warn_extraneous(extraneous)
+        super(RKC, self).__init__(fun, t0, y0, t_bound, vectorized)
+        self.y_old = None
+        self.f_old = None
+        self.max_step = validate_max_step(max_step)
+        self.rtol, self.atol = validate_tol(rtol, atol, self.n)
+        self.f = self.fun(self.t, self.y)
+        self.rho, self.v = spectral_radius(self.fun, self.t, self.y, self.f,
+                                           self.f)
+        self.h_abs = select_initial_step(
+            self.fun, self.t, self.y, self.f, self.direction,
+            2, self.rtol, self.atol)
+        self.h_abs_old = None
+        self.error_norm_old = None
+        self.n_rho_steps = 0
+
+    def _step_impl(self):
+        t = self.t
+        y = self.y
+        f = self.f
+
+        max_step = self.max_step
+        rtol = self.rtol
+        atol = self.atol
+
+        min_step = 10 * np.abs(np.nextafter(t, self.direction * np.inf) - t)
+
+        if self.n_rho_steps >= RHO_INTERVAL:
+            self.rho, self.v = spectral_radius(self.fun, t, y, f, self.v)
+            self.n_rho_steps = 0
+
+        if self.h_abs > max_step:
+            h_abs = max_step
+        elif self.h_abs < min_step:
+            h_abs = min_step
+        else:
+            h_abs = self.h_abs
+
+        step_accepted = False
+        while not step_accepted:
+            # the stability interval of s stages is about 0.653 * s ** 2
+            if 1.54 * h_abs * self.rho + 1 > MAX_STAGES ** 2:
+                h_abs = (MAX_STAGES ** 2 - 1) / (1.54 * self.rho)
+
+            if h_abs < min_step:
+                return False, self.TOO_SMALL_STEP
+
+            h = h_abs * self.direction
+            t_new = t + h
+
+            if self.direction * (t_new - self.t_bound) > 0:
+                t_new = self.t_bound
+
+            h = t_new - t
+            h_abs = np.abs(h)
+
+            s = 1 + int(np.sqrt(1 + 1.54 * h_abs * self.rho))
+            y_new = rkc_step(self.fun, t, y, f, h, min(max(s, 2), MAX_STAGES))
+            f_new = self.fun(t_new, y_new)
+
+            error = 0.8 * (y - y_new) + 0.4 * h * (f + f_new)
+            scale = atol + np.maximum(np.abs(y), np.abs(y_new)) * rtol
+            # max norm: an RMS norm over all nodes hides large local errors
+            # on a few nodes, which lets the explicit stages overshoot there
+            error_norm = np.max(np.abs(error / scale))
+
+            if error_norm > 1:
+                h_abs *= max(0.1, 0.8 / error_norm ** (1 / 3))
+                # the rejection may be caused by a too small spectral radius
+                self.rho, self.v = spectral_radius(self.fun, t, y, f, self.v)
+                self.n_rho_steps = 0
+            else:
+                step_accepted = True
+
+        factor = 10
+        if error_norm > 0:
+            if self.error_norm_old is None:
+                factor = min(factor, 0.8 / error_norm ** (1 / 3))
+            else:
+                factor = min(factor, 0.8 * h_abs * self.error_norm_old ** (1 / 3) /
+                             (self.h_abs_old * error_norm ** (2 / 3)))
+        self.h_abs_old = h_abs
+        self.error_norm_old = max(error_norm, EPS)
+        self.h_abs = h_abs * max(0.1, factor)
+        self.n_rho_steps += 1
+
+        self.y_old = y
+        self.f_old = f
+
+        self.t = t_new
+        self.y = y_new
+        self.f = f_new
+
+        return True, None
+
+    def _dense_output_impl(self):
+        return RkcDenseOutput(self.t_old, self.t, self.y_old, self.f_old,
+                              self.y, self.f)
+
+
+class RkcDenseOutput(DenseOutput):
+    def __init__(self, t_old, t, y_old, f_old, y, f):
+        super(RkcDenseOutput, self).__init__(t_old, t)
+        self.h = t - t_old
+        self.y_old = y_old
+        self.dy = y - y_old
+        self.f_old = f_old
+        self.f = f
+
+    def _call_impl(self, t):
+        x = (t - self.t_old) / self.h
+        if t.ndim > 0:
+            x = x[None, :]
+            y_old, dy = self.y_old[:, None], self.dy[:, None]
+            f_old, f = self.h * self.f_old[:, None], self.h * self.f[:, None]
+        else:
+            y_old, dy = self.y_old, self.dy
+            f_old, f = self.h * self.f_old, self.h * self.f
+
+        # cubic Hermite polynomial matching values and derivatives at both ends
+        return (y_old + x * f_old +
+                x ** 2 * (3 * dy - 2 * f_old - f) +
+                x ** 3 * (f_old + f - 2 * dy))
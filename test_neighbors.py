@@ -0,0 +1,88 @@
+from cell import *
+
+npr.seed(seed=0)
+
+
+def bruteCutoff(positions, cutoff):
+    """
+    Find all pairs of particles closer than cutoff by comparing every pair
+    :param positions: numpy array of shape (n, vodims) indicating the positions of particles
+    :param cutoff: float, the maximum distance of the pairs
+    :return: set of tuples (i, j) with i<j
+    """
+    n = len(positions)
+    i, j = np.triu_indices(n, 1)
+    d = np.sqrt(np.sum((positions[i] - positions[j]) ** 2, axis=1))
+    return set(zip(i[d <= cutoff].tolist(), j[d <= cutoff].tolist()))
+
+
+def bruteGabriel(positions, cutoff):
+    """
+    Find all pairs of particles closer than cutoff with no other particle inside the sphere spanned by the pair
+    :param positions: numpy array of shape (n, vodims) indicating the positions of particles
+    :param cutoff: float, the maximum distance of the pairs
+    :return: set of tuples (i, j) with i<j
+    """
+    gabriel = set()
+    for i, j in bruteCutoff(positions, cutoff):
+        mid = 0.5 * (positions[i] + positions[j])
+        r2 = 0.25 * np.sum((positions[i] - positions[j]) ** 2)
+        d2 = np.sum((positions - mid) ** 2, axis=1)
+        d2[[i, j]] = np.inf
+        if not np.any(d2 < r2 * (1 - 1e-8)):
+            gabriel.add((i, j))
+    return gabriel
+
+
+def asSet(pairs):
+    """
+    Convert pairs returned by the neighbor functions of cell.py to a set of tuples
+    :param pairs: numpy array of shape (m, 2)
+    :return: set of tuples (i, j)
+    """
+    return set(map(tuple, np.asarray(pairs).tolist()))
+
+
+if __name__ == '__main__':
+
+    # compare the candidate pairs for new links found by cell.py with a search over all pairs
+
+    ####################
+
+    N = 300                 # Number of particles
+    d0max = 2.              # max distance connected by links
+    skin = 0.5              # margin of the Verlet list beyond d0max
+
+    ####################
+
+    for dims in [2, 3]:
+        X = np.zeros((N, 3))
+        X[:, :dims] = npr.random((N, dims)) * N ** (1. / dims)
+
+        cutoff = bruteCutoff(X[:, :dims], d0max)
+        gabriel = bruteGabriel(X[:, :dims], d0max)
+        assert asSet(CutoffNeighbors(X, d0max, vodims=dims)) == cutoff
+        assert asSet(CutoffNeighbors(X, d0max, vodims=dims, gabriel=True)) == gabriel
+        assert gabriel <= asSet(VoronoiNeighbors(X, vodims=dims))
+
+        # the same candidates through the neighbors option of CellMech
+        for neighbors, expected in [("cutoff", cutoff), ("gabriel", gabriel)]:
+            config = CellMech(N, dims=dims, d0max=d0max, neighbors=neighbors)
+            config.mynodes.nodesX = X.copy()
+            assert asSet(config.getNeighbors(config.mynodes.nodesX)) == expected
+            links = config.addLinkList()[0]
+            assert asSet(links) <= expected
+
+        # the Verlet list is kept while no particle moved by more than skin / 2 and rebuilt afterwards
+        for isgabriel, brute in [(False, bruteCutoff), (True, bruteGabriel)]:
+            verletlist = VerletList(d0max, skin, vodims=dims, gabriel=isgabriel)
+            Y = X.copy()
+            for step in range(5):
+                Y[:, :dims] += 0.09 * skin / np.sqrt(dims) * (2 * npr.random((N, dims)) - 1)
+                assert asSet(verletlist.getNeighbors(Y)) == brute(Y[:, :dims], d0max)
+            assert verletlist.nbuilds == 1
+            Y[0, 0] = X[0, 0] + 0.6 * skin
+            assert asSet(verletlist.getNeighbors(Y)) == brute(Y[:, :dims], d0max)
+            assert verletlist.nbuilds == 2
+
+        print "dims %d: %d cutoff pairs, %d Gabriel pairs match" % (dims, len(cutoff), len(gabriel))